@@ -0,0 +1,18 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Benchmarks for `python_toolbox`.
+
+Run them with:
+
+    python -m benchmark_python_toolbox
+
+This prints the number of operations per second and the peak memory of each
+benchmark. Save the results with `--save results.json`, and later compare new
+results against them with `--baseline results.json`, which fails if any
+benchmark got slower by more than `--tolerance`. (Default 20%.) Use `--help`
+for all the options.
+'''
+
+from .harness import Benchmark, benchmark, run_benchmarks, compare_to_baseline
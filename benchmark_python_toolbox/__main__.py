@@ -0,0 +1,8 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import sys
+
+from .harness import main
+
+sys.exit(main())
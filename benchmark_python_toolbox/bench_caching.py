@@ -0,0 +1,115 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''Benchmarks for `python_toolbox.caching`.'''
+
+import itertools
+
+from python_toolbox import caching
+
+from .harness import benchmark
+
+
+policies = {
+    'unbounded': None,
+    'lru': caching.LruPolicy,
+    'lfu': caching.LfuPolicy,
+    '2q': caching.TwoQueuePolicy,
+    'arc': caching.ArcPolicy,
+}
+
+
+def _make_cached_function(policy):
+    if policy is None:
+        return caching.cache()(lambda a, b=2: a)
+    return caching.cache(max_size=1000, eviction_policy=policy)(
+                                                            lambda a, b=2: a)
+
+
+for _policy_name, _policy in policies.items():
+
+    @benchmark('cache hit %s' % _policy_name)
+    def _(policy=_policy):
+        f = _make_cached_function(policy)
+        f(1)
+        return lambda: f(1)
+
+    @benchmark('cache miss %s' % _policy_name)
+    def _(policy=_policy):
+        f = _make_cached_function(policy)
+        counter = itertools.count()
+        # For bounded caches, most misses evict an entry too.
+        return lambda: f(next(counter))
+
+
+@benchmark('cache hit weakreffable argument')
+def _():
+    class A:
+        pass
+    a = A()
+    f = caching.cache()(lambda a, b=2: a)
+    f(a)
+    return lambda: f(a)
+
+
+@benchmark('cache hit keyword arguments')
+def _():
+    f = caching.cache()(lambda a, b=2, **kwargs: a)
+    f(1, b=3, c=4)
+    return lambda: f(1, b=3, c=4)
+
+
+@benchmark('cache hit time_to_keep')
+def _():
+    f = caching.cache(time_to_keep={'days': 1})(lambda a, b=2: a)
+    f(1)
+    return lambda: f(1)
+
+
+@benchmark('cache hit thread_safe')
+def _():
+    f = caching.cache(max_size=1000, thread_safe=True)(lambda a, b=2: a)
+    f(1)
+    return lambda: f(1)
+
+
+@benchmark('CachedType construction hit')
+def _():
+    class A(metaclass=caching.CachedType):
+        def __init__(self, a, b=2):
+            pass
+    A(1)
+    return lambda: A(1)
+
+
+@benchmark('CachedType construction miss')
+def _():
+    class A(metaclass=caching.CachedType, max_instances=1000):
+        def __init__(self, a, b=2):
+            pass
+    counter = itertools.count()
+    return lambda: A(next(counter))
+
+
+def _make_class_with_property(property_type):
+    class A:
+        __slots__ = ('__dict__', '_cached_personality')
+        personality = property_type(lambda self: 7)
+    return A
+
+
+for _property_type in (caching.CachedProperty,
+                       caching.ThreadSafeCachedProperty,
+                       caching.SlotCachedProperty):
+
+    @benchmark('%s first access' % _property_type.__name__)
+    def _(property_type=_property_type):
+        A = _make_class_with_property(property_type)
+        A().personality # Discovering the property's name in advance.
+        return lambda: A().personality
+
+    @benchmark('%s second access' % _property_type.__name__)
+    def _(property_type=_property_type):
+        a = _make_class_with_property(property_type)()
+        a.personality
+        return lambda: a.personality
@@ -0,0 +1,61 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''Benchmarks for `python_toolbox.sleek_reffing` and `cheat_hashing`.'''
+
+from python_toolbox.sleek_reffing import SleekCallArgs, CallArgsBinder
+from python_toolbox.cheat_hashing import cheat_hash
+
+from .harness import benchmark
+
+
+def f(a, b=2, *args, **kwargs):
+    pass
+
+
+class A:
+    pass
+
+
+payloads = {
+    'values': ((1, 'meow', (2.5, None)), {}),
+    'weakreffable': ((A(), A()), {}),
+    'unhashable': (([1, 2], {'x': [3]}), {}),
+    'keywords': ((1,), {'b': 'meow', 'c': 3}),
+}
+
+
+for _payload_name, (_args, _kwargs) in payloads.items():
+
+    @benchmark('SleekCallArgs construction %s' % _payload_name)
+    def _(args=_args, kwargs=_kwargs):
+        binder = CallArgsBinder(f)
+        containing_dict = {}
+        return lambda: SleekCallArgs(containing_dict, binder, *args, **kwargs)
+
+    @benchmark('SleekCallArgs equality %s' % _payload_name)
+    def _(args=_args, kwargs=_kwargs):
+        binder = CallArgsBinder(f)
+        containing_dict = {}
+        first = SleekCallArgs(containing_dict, binder, *args, **kwargs)
+        second = SleekCallArgs(containing_dict, binder, *args, **kwargs)
+        return lambda: first == second
+
+
+@benchmark('cheat_hash call args')
+def _():
+    thing = ({'a': 1, 'b': 'meow'}, (), {})
+    return lambda: cheat_hash(thing)
+
+
+@benchmark('cheat_hash nested dict')
+def _():
+    thing = {i: [i, {'x': str(i)}] for i in range(1000)}
+    return lambda: cheat_hash(thing)
+
+
+@benchmark('cheat_hash repeated sub-objects')
+def _():
+    row = list(range(100))
+    thing = [[row] * 100] * 10
+    return lambda: cheat_hash(thing)
@@ -0,0 +1,206 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines the benchmark harness.
+
+See documentation of `benchmark` for how to define a benchmark.
+'''
+
+import gc
+import sys
+import json
+import time
+import argparse
+import importlib
+import tracemalloc
+
+
+benchmark_module_names = ('bench_caching', 'bench_sleek_reffing')
+'''Modules that define benchmarks, relative to this package.'''
+
+_benchmarks = {}
+
+
+class Benchmark:
+    '''
+    A benchmark of one operation.
+
+    `setup` is a function that prepares everything the operation needs and
+    returns a function that performs the operation once. The harness calls
+    that function many times and measures how many times per second it can
+    call it, and the peak memory allocated while calling it.
+    '''
+    def __init__(self, name, setup):
+        self.name = name
+        self.setup = setup
+
+
+    def measure_speed(self, min_time=0.2, n_repeats=5):
+        '''
+        Get the number of operations per second.
+
+        We find a number of operations that takes at least `min_time`
+        seconds, time it `n_repeats` times, and take the fastest, which is the
+        one least disturbed by other processes.
+        '''
+        operation = self.setup()
+        n_operations = 1
+        while True:
+            duration = self._time(operation, n_operations)
+            if duration >= min_time:
+                break
+            n_operations *= 10 if duration < min_time / 10 else 2
+        durations = [duration] + [self._time(operation, n_operations)
+                                  for _ in range(n_repeats - 1)]
+        return n_operations / min(durations)
+
+
+    def measure_peak_memory(self, n_operations=1000):
+        '''
+        Get the peak memory allocated by `n_operations` operations, in bytes.
+        '''
+        operation = self.setup()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            for _ in range(n_operations):
+                operation()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+    @staticmethod
+    def _time(operation, n_operations):
+        iterator = range(n_operations)
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start_time = time.perf_counter()
+            for _ in iterator:
+                operation()
+            return time.perf_counter() - start_time
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+
+    def __repr__(self):
+        return '<%s: %s>' % (type(self).__name__, self.name)
+
+
+def benchmark(name):
+    '''
+    Decorator for registering a benchmark setup function.
+
+    Example:
+
+        @benchmark('cheat_hash small dict')
+        def _():
+            thing = {'a': 1, 'b': [2]}
+            return lambda: cheat_hash(thing)
+
+    '''
+    def decorator(setup):
+        assert name not in _benchmarks
+        _benchmarks[name] = Benchmark(name, setup)
+        return setup
+    return decorator
+
+
+def get_benchmarks(name_filter=None):
+    '''Get all the benchmarks whose names contain `name_filter`.'''
+    for module_name in benchmark_module_names:
+        importlib.import_module('.' + module_name, __package__)
+    return [benchmark for name, benchmark in sorted(_benchmarks.items())
+            if name_filter is None or name_filter in name]
+
+
+def run_benchmarks(benchmarks, min_time=0.2, n_repeats=5, file=None):
+    '''
+    Run benchmarks and print their results as they come.
+
+    Returns a `dict` mapping each benchmark's name to a `dict` with its
+    `ops_per_second` and `peak_memory`.
+    '''
+    file = sys.stdout if file is None else file
+    results = {}
+    print('%-50s %14s %14s' % ('Benchmark', 'Ops/sec', 'Peak memory'),
+          file=file)
+    for benchmark in benchmarks:
+        results[benchmark.name] = result = {
+            'ops_per_second': benchmark.measure_speed(min_time=min_time,
+                                                      n_repeats=n_repeats),
+            'peak_memory': benchmark.measure_peak_memory(),
+        }
+        print('%-50s %14.0f %14d' % (benchmark.name, result['ops_per_second'],
+                                     result['peak_memory']), file=file)
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance=0.2):
+    '''
+    Find the benchmarks that are slower than in the baseline.
+
+    `results` and `baseline` are like the results of `run_benchmarks`. A
+    benchmark is a regression if it does fewer than `1 - tolerance` times the
+    operations per second that it did in the baseline. Benchmarks that aren't
+    in both are ignored.
+
+    Returns a list of `(name, ratio)`, where `ratio` is the new number of
+    operations per second divided by the old one.
+    '''
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        ratio = result['ops_per_second'] / \
+                                         baseline[name]['ops_per_second']
+        if ratio < 1 - tolerance:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def main(arguments=None):
+    '''Run the benchmarks from the command line. Returns an exit code.'''
+    parser = argparse.ArgumentParser(prog='python -m benchmark_python_toolbox',
+                                     description='Benchmark python_toolbox.')
+    parser.add_argument('-k', '--filter', default=None,
+                        help='Run only benchmarks whose names contain this.')
+    parser.add_argument('--save', metavar='PATH', default=None,
+                        help='Save the results as JSON to this file.')
+    parser.add_argument('--baseline', metavar='PATH', default=None,
+                        help='Compare the results to results saved before, '
+                             'and fail if any benchmark got slower.')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='Fraction of slowdown that is not considered a '
+                             'regression. (Default: 0.2)')
+    parser.add_argument('--min-time', type=float, default=0.2,
+                        help='Minimum seconds for each timing. (Default: 0.2)')
+    parser.add_argument('--repeats', type=int, default=5,
+                        help='Number of timings of each benchmark, of which '
+                             'the fastest is taken. (Default: 5)')
+    options = parser.parse_args(arguments)
+
+    results = run_benchmarks(get_benchmarks(options.filter),
+                             min_time=options.min_time,
+                             n_repeats=options.repeats)
+
+    if options.save is not None:
+        with open(options.save, 'w') as file:
+            json.dump(results, file, indent=4, sort_keys=True)
+
+    if options.baseline is not None:
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare_to_baseline(results, baseline,
+                                          tolerance=options.tolerance)
+        for name, ratio in regressions:
+            print('Regression: %s is at %.0f%% of its baseline speed.' %
+                  (name, ratio * 100))
+        if regressions:
+            return 1
+        print('No regressions compared to the baseline.')
+
+    return 0
@@ -6,5 +6,11 @@
 # todo: examine thread-safety
 
 from .decorators import cache
+from .eviction_policies import (EvictionPolicy, LruPolicy, LfuPolicy,
+                                TwoQueuePolicy, ArcPolicy)
+from .cache_statistics import (CacheStatistics, get_all_cache_statistics,
+                               dump_cache_statistics)
 from .cached_type import CachedType
-from .cached_property import CachedProperty
\ No newline at end of file
+from .cached_property import (CachedProperty, ThreadSafeCachedProperty,
+                              SlotCachedProperty, ThreadSafeSlotCachedProperty)
+from .invalidating_attribute import InvalidatingAttribute
\ No newline at end of file
@@ -0,0 +1,180 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines the `CacheStatistics` class and a registry of cached functions.
+
+See documentation of `CacheStatistics` for more details.
+'''
+
+import sys
+import time
+import inspect
+import weakref
+import itertools
+
+
+_cached_functions = weakref.WeakSet()
+'''All the functions decorated with `cache` that are still alive.'''
+
+
+class CacheStatistics:
+    '''
+    Statistics about the cache of a function decorated with `cache`.
+
+    Every cached function has one of these as its `.cache_statistics`. Hits,
+    misses, evictions, expirations and the current size are always counted.
+    If the cache has a persistent tier, misses that were found there are
+    counted in `n_persistent_hits` too.
+
+    Time spent building keys (i.e. analyzing call args) and computing values
+    is measured only if you asked `cache` for a `timing_sample_interval`. If
+    it's 1, every call is timed; if it's `n`, only every `n`th call is timed,
+    and the measured time is multiplied by `n` to estimate the total time.
+    This keeps the overhead of timing low for functions that are called very
+    often.
+
+    In thread-safe caches, calls that waited for another thread to compute
+    their value are counted as hits.
+    '''
+    def __init__(self, function, cache_dict, timing_sample_interval=None):
+        self.function_name = '%s.%s' % (function.__module__,
+                                        function.__qualname__)
+        '''The full name of the cached function.'''
+
+        self.timing_sample_interval = timing_sample_interval
+        '''Every how many calls we measure time, or `None` for never.'''
+
+        self._cache_dict = cache_dict
+        self.reset()
+
+
+    def reset(self):
+        '''Reset all the counters to zero.'''
+        self.n_hits = 0
+        self.n_misses = 0
+        self.n_persistent_hits = 0
+        '''Misses in memory that were found in the persistent tier.'''
+        self.n_expirations = 0
+        self.key_building_time = 0.
+        '''Estimated total seconds spent analyzing call args.'''
+        self.computing_time = 0.
+        '''Estimated total seconds spent computing values on misses.'''
+        self._initial_n_evictions = \
+                                  getattr(self._cache_dict, 'n_evictions', 0)
+
+
+    size = property(lambda self: len(self._cache_dict),
+                    doc='''The number of values currently cached.''')
+
+    n_evictions = property(
+        lambda self: getattr(self._cache_dict, 'n_evictions', 0) -
+                                                   self._initial_n_evictions,
+        doc='''The number of values thrown away to keep the cache small.'''
+    )
+
+    @property
+    def hit_rate(self):
+        '''The fraction of calls that were served from the cache.'''
+        n_calls = self.n_hits + self.n_misses
+        return self.n_hits / n_calls if n_calls else 0.
+
+
+    def to_dict(self):
+        '''Get the statistics as a `dict`.'''
+        return {
+            'function_name': self.function_name,
+            'n_hits': self.n_hits,
+            'n_misses': self.n_misses,
+            'n_persistent_hits': self.n_persistent_hits,
+            'hit_rate': self.hit_rate,
+            'n_evictions': self.n_evictions,
+            'n_expirations': self.n_expirations,
+            'size': self.size,
+            'key_building_time': self.key_building_time,
+            'computing_time': self.computing_time,
+        }
+
+
+    def _time(self, function, attribute_name):
+        '''
+        Wrap `function` so that time spent in it is added to an attribute.
+
+        Only every `timing_sample_interval`th call is timed. If `function` is
+        a coroutine function, the time until its result is ready is measured.
+        '''
+        timing_sample_interval = self.timing_sample_interval
+        if timing_sample_interval is None:
+            return function
+        counter = itertools.count()
+        if inspect.iscoroutinefunction(function):
+            async def timed(*args, **kwargs):
+                if next(counter) % timing_sample_interval:
+                    return await function(*args, **kwargs)
+                start_time = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    setattr(
+                        self, attribute_name,
+                        getattr(self, attribute_name) +
+                        timing_sample_interval *
+                                          (time.perf_counter() - start_time)
+                    )
+            return timed
+        def timed(*args, **kwargs):
+            if next(counter) % timing_sample_interval:
+                return function(*args, **kwargs)
+            start_time = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                setattr(
+                    self, attribute_name,
+                    getattr(self, attribute_name) + timing_sample_interval *
+                                          (time.perf_counter() - start_time)
+                )
+        return timed
+
+
+    def __repr__(self):
+        return ('<%s for %s: %s hits, %s misses, %s evictions, '
+                '%s expirations, size %s>' % (
+                    type(self).__name__, self.function_name, self.n_hits,
+                    self.n_misses, self.n_evictions, self.n_expirations,
+                    self.size
+                ))
+
+
+def get_all_cache_statistics():
+    '''
+    Get the statistics of all the cached functions in the process.
+
+    Returns a list of `CacheStatistics`, sorted by function name.
+    '''
+    return sorted(
+        (cached_function.cache_statistics for cached_function in
+         tuple(_cached_functions)),
+        key=lambda cache_statistics: cache_statistics.function_name
+    )
+
+
+def dump_cache_statistics(file=None):
+    '''
+    Print a table of statistics of all the cached functions in the process.
+
+    Prints to `sys.stdout` unless you specify a different `file`.
+    '''
+    file = sys.stdout if file is None else file
+    print('%-50s %10s %10s %8s %10s %10s %8s %10s %10s' % (
+        'Function', 'Hits', 'Misses', 'Hit rate', 'Evictions', 'Expired',
+        'Size', 'Keys (s)', 'Compute (s)'
+    ), file=file)
+    for cache_statistics in get_all_cache_statistics():
+        print('%-50s %10d %10d %8.2f %10d %10d %8d %10.3f %10.3f' % (
+            cache_statistics.function_name[-50:], cache_statistics.n_hits,
+            cache_statistics.n_misses, cache_statistics.hit_rate,
+            cache_statistics.n_evictions, cache_statistics.n_expirations,
+            cache_statistics.size, cache_statistics.key_building_time,
+            cache_statistics.computing_time
+        ), file=file)
@@ -2,11 +2,15 @@
 # This program is distributed under the MIT license.
 
 '''
-Defines the `CachedProperty` class.
+Defines the `CachedProperty` class and its thread-safe and `__slots__`
+variants.
 
-See its documentation for more details.
+See their documentation for more details.
 '''
 
+import threading
+import concurrent.futures
+
 from python_toolbox import misc_tools
 from python_toolbox.third_party.decorator import decorator
 
@@ -32,9 +36,16 @@ class CachedProperty(misc_tools.OwnNameDiscoveringDescriptor):
     returned instead of using a getter. (It can be a totally static value like
     `0`). If this value happens to be a callable but you'd still like it to be
     used as a static value, use `force_value_not_getter=True`.
+
+    If the property is calculated from attributes that may change, list their
+    names in `depends_on`, and define these attributes as
+    `caching.InvalidatingAttribute`. Then setting any of these attributes
+    would throw away the cached value, so it'll be calculated again on next
+    access. `depends_on` may include names of other cached properties too, in
+    which case the cached value is thrown away whenever theirs is.
     '''
     def __init__(self, getter_or_value, doc=None, name=None,
-                 force_value_not_getter=False):
+                 force_value_not_getter=False, depends_on=()):
         '''
         Construct the cached property.
 
@@ -46,6 +57,9 @@ class CachedProperty(misc_tools.OwnNameDiscoveringDescriptor):
         class; this will save a bit of processing later.
         '''
         misc_tools.OwnNameDiscoveringDescriptor.__init__(self, name=name)
+        self.depends_on = (depends_on,) if isinstance(depends_on, str) \
+                                                       else tuple(depends_on)
+        '''Names of the attributes that this property is calculated from.'''
         if callable(getter_or_value) and not force_value_not_getter:
             self.getter = getter_or_value
         else:
@@ -59,11 +73,33 @@ class CachedProperty(misc_tools.OwnNameDiscoveringDescriptor):
             # We're being accessed from the class itself, not from an object
             return self
 
+        return self._compute_and_store_value(thing, our_type)
+
+
+    def _compute_and_store_value(self, thing, our_type=None):
         value = self.getter(thing)
+        self._store_value(thing, value, our_type)
+        return value
+
 
+    def _load_value(self, thing, our_type=None):
+        '''
+        Get the cached value, raising `AttributeError` if there isn't one.
+        '''
+        name = self.get_our_name(thing, our_type=our_type)
+        try:
+            return vars(thing)[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+    def _store_value(self, thing, value, our_type=None):
         setattr(thing, self.get_our_name(thing, our_type=our_type), value)
 
-        return value
+
+    def _forget_value(self, thing, our_type=None):
+        '''Throw away the cached value, if there is one.'''
+        vars(thing).pop(self.get_our_name(thing, our_type=our_type), None)
 
 
     def __call__(self, method_function):
@@ -78,3 +114,144 @@ class CachedProperty(misc_tools.OwnNameDiscoveringDescriptor):
 
     def __repr__(self):
         return f'<{type(self).__name__}: {self.our_name or self.getter}>'
+
+
+class ThreadSafeCachedProperty(CachedProperty):
+    '''
+    A `CachedProperty` that's computed only once even when accessed by threads.
+
+    When several threads access the property of an object at the same time
+    before it was computed, only one of them computes it and the others wait
+    for its value. (If computing it raises an exception, all the waiting
+    threads get it too, and it'll be computed again on the next access.)
+    Threads that access the property on different objects don't wait for
+    each other.
+
+    Once the value is computed, accessing it costs the same as in a plain
+    `CachedProperty`.
+    '''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self._in_flight_futures = {}
+        '''
+        Values being computed, by `id` of their objects.
+
+        Each value is a tuple of a future and the ident of the thread that's
+        computing it.
+        '''
+
+
+    def _compute_and_store_value(self, thing, our_type=None):
+        # While the value is being computed, its object is alive, so its
+        # `id` is unique.
+        key = id(thing)
+        with self._lock:
+            try:
+                return self._load_value(thing, our_type)
+            except AttributeError:
+                pass
+            thread_ident = threading.get_ident()
+            try:
+                future, computing_thread_ident = self._in_flight_futures[key]
+            except KeyError:
+                future = concurrent.futures.Future()
+                self._in_flight_futures[key] = (future, thread_ident)
+                is_computing_thread = True
+            else:
+                is_computing_thread = False
+
+        if not is_computing_thread:
+            if computing_thread_ident == thread_ident:
+                # The getter accessed its own property. Waiting for our own
+                # computation would deadlock, so we fail like a plain
+                # `CachedProperty`, which would recurse forever.
+                raise RecursionError(
+                    "The getter of `%s` accessed it on the same object "
+                    "while computing it." %
+                    self.get_our_name(thing, our_type=our_type)
+                )
+            return future.result()
+
+        try:
+            value = super()._compute_and_store_value(thing, our_type)
+        except BaseException as exception:
+            with self._lock:
+                del self._in_flight_futures[key]
+            future.set_exception(exception)
+            raise
+        with self._lock:
+            del self._in_flight_futures[key]
+        future.set_result(value)
+        return value
+
+
+class SlotCachedProperty(CachedProperty):
+    '''
+    A `CachedProperty` for classes that use `__slots__` instead of `__dict__`.
+
+    The value is stored in a slot, by default named `_cached_` followed by the
+    name of the property, which you need to include in the class's
+    `__slots__`:
+
+        class MyObject:
+            __slots__ = ('_cached_personality',)
+
+            @SlotCachedProperty
+            def personality(self):
+                return 'Nice person'
+
+    You may choose a different slot with the `slot_name` argument. Unlike
+    `CachedProperty`, the value isn't stored under the name of the property
+    itself, so every access goes through the property; it's still quick.
+    '''
+    def __init__(self, getter_or_value, doc=None, name=None,
+                 force_value_not_getter=False, depends_on=(), slot_name=None):
+        super().__init__(getter_or_value, doc=doc, name=name,
+                         force_value_not_getter=force_value_not_getter,
+                         depends_on=depends_on)
+        self.slot_name = slot_name
+        '''The name of the slot in which the value is stored.'''
+
+
+    def get_slot_name(self, thing, our_type=None):
+        if self.slot_name is None:
+            self.slot_name = \
+                    '_cached_%s' % self.get_our_name(thing, our_type=our_type)
+        return self.slot_name
+
+
+    def __get__(self, thing, our_type=None):
+
+        if thing is None:
+            # We're being accessed from the class itself, not from an object
+            return self
+
+        try:
+            return getattr(thing, self.slot_name or
+                                  self.get_slot_name(thing, our_type))
+        except AttributeError:
+            return self._compute_and_store_value(thing, our_type)
+
+
+    def _load_value(self, thing, our_type=None):
+        return getattr(thing, self.get_slot_name(thing, our_type))
+
+
+    def _store_value(self, thing, value, our_type=None):
+        setattr(thing, self.get_slot_name(thing, our_type), value)
+
+
+    def _forget_value(self, thing, our_type=None):
+        try:
+            delattr(thing, self.get_slot_name(thing, our_type))
+        except AttributeError:
+            pass
+
+
+class ThreadSafeSlotCachedProperty(ThreadSafeCachedProperty,
+                                   SlotCachedProperty):
+    '''
+    A `SlotCachedProperty` that's computed only once even when accessed by
+    threads. See documentation of `ThreadSafeCachedProperty`.
+    '''
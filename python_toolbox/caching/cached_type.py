@@ -7,11 +7,20 @@ Defines the `CachedType` metaclass.
 See its documentation for more details.
 '''
 
-from python_toolbox.sleek_reffing import SleekCallArgs
+import inspect
 
+from python_toolbox import misc_tools
 
-class SelfPlaceholder:
-    '''Placeholder for `self` when storing call-args.'''
+from .decorators import cache
+
+infinity = float('inf')
+
+_SELF_PARAMETER_KINDS = (inspect.Parameter.POSITIONAL_ONLY,
+                         inspect.Parameter.POSITIONAL_OR_KEYWORD)
+
+
+class _SelfPlaceholder(misc_tools.NonInstantiable):
+    '''Placeholder for `self` when binding args to a signature without it.'''
 
 
 class CachedType(type):
@@ -39,24 +48,98 @@ class CachedType(type):
     you can avoid memory leaks when using weakreffable arguments, but if you
     ever want to use non-weakreffable arguments you are still able to.
     (Assuming you don't mind the memory leaks.)
+
+    Since non-weakreffable arguments like numbers and strings never die, a
+    class that's instantiated with many different such arguments would keep
+    all of its instances forever. To avoid that, you may bound the number of
+    instances that are kept, using keyword arguments in the class definition:
+
+        class Grokker(metaclass=caching.CachedType, max_instances=1000,
+                      time_to_keep={'hours': 1}, thread_safe=True):
+            ...
+
+    These work like the arguments of the same names to `caching.cache`:
+    `max_instances` is the maximum number of instances to keep, (old ones are
+    forgotten according to the `eviction_policy`, by default LRU,)
+    `time_to_keep` is the time after which an instance is forgotten, and
+    `thread_safe=True` makes sure that threads that instantiate the class with
+    the same arguments at the same time get the same instance. A forgotten
+    instance is still usable, but instantiating the class again with the same
+    arguments would create a new instance. Subclasses use the same bounds as
+    their base class unless they specify their own, but each class keeps its
+    own instances.
+
+    The statistics of the instance cache are available as
+    `Grokker.instance_cache_statistics`. (See documentation of
+    `caching.CacheStatistics` for more details.)
     '''
 
-    def __new__(mcls, *args, **kwargs):
-        result = super().__new__(mcls, *args, **kwargs)
-        result.__cache = {}
+    def __new__(mcls, name, bases, namespace, *, max_instances=None,
+                time_to_keep=None, eviction_policy=None, thread_safe=None,
+                **kwargs):
+        result = super().__new__(mcls, name, bases, namespace, **kwargs)
+
+        ### Figuring out the bounds of the instance cache: ####################
+        #                                                                     #
+        # Arguments that weren't specified are inherited from the base class.
+        instance_cache_options = dict(
+            getattr(result, '_CachedType__instance_cache_options',
+                    {'max_size': infinity, 'time_to_keep': None,
+                     'eviction_policy': None, 'thread_safe': False})
+        )
+        for option_name, value in (('max_size', max_instances),
+                                   ('time_to_keep', time_to_keep),
+                                   ('eviction_policy', eviction_policy),
+                                   ('thread_safe', thread_safe)):
+            if value is not None:
+                instance_cache_options[option_name] = value
+        result.__instance_cache_options = instance_cache_options
+        #                                                                     #
+        ### Finished figuring out the bounds of the instance cache. ###########
+
+        # We cache a function with the same signature as `__init__` without
+        # `self`, so that its call args are analyzed like those of `__init__`.
+        # If `__init__` doesn't have a `self` parameter we can drop, like
+        # `def __init__(*args)`, we keep its whole signature and pass a
+        # placeholder for `self` instead.
+        init_signature = inspect.signature(result.__init__)
+        init_parameters = tuple(init_signature.parameters.values())
+        has_self_parameter = bool(init_parameters) and \
+                            (init_parameters[0].kind in _SELF_PARAMETER_KINDS)
+        if has_self_parameter:
+            def create_instance(*args, **kwargs):
+                return super(CachedType, result).__call__(*args, **kwargs)
+            create_instance.__signature__ = init_signature.replace(
+                parameters=init_parameters[1:]
+            )
+        else:
+            def create_instance(self_placeholder, *args, **kwargs):
+                assert self_placeholder is _SelfPlaceholder
+                return super(CachedType, result).__call__(*args, **kwargs)
+            create_instance.__signature__ = init_signature
+        result.__has_self_parameter = has_self_parameter
+        create_instance.__module__ = result.__module__
+        create_instance.__qualname__ = result.__qualname__
+
+        result.__create_instance = cache(**instance_cache_options)(
+                                                               create_instance)
         return result
 
 
+    def __init__(cls, name, bases, namespace, **kwargs):
+        # Not passing on the bounds of the instance cache, which `type`
+        # wouldn't accept:
+        super().__init__(name, bases, namespace)
+
+
+    @property
+    def instance_cache_statistics(cls):
+        '''Statistics of the cache of instances of this class.'''
+        return cls.__create_instance.cache_statistics
+
+
     def __call__(cls, *args, **kwargs):
-        sleek_call_args = SleekCallArgs(
-            cls.__cache,
-            cls.__init__,
-            *((SelfPlaceholder,) + args),
-            **kwargs
-        )
-        try:
-            return cls.__cache[sleek_call_args]
-        except KeyError:
-            cls.__cache[sleek_call_args] = value = \
-                                              super().__call__(*args, **kwargs)
-            return value
+        if cls.__has_self_parameter:
+            return cls.__create_instance(*args, **kwargs)
+        else:
+            return cls.__create_instance(_SelfPlaceholder, *args, **kwargs)
@@ -6,16 +6,25 @@ Defines the `cache` decorator.
 
 See its documentation for more details.
 '''
-# todo: examine thread-safety
 
+import bisect
+import asyncio
+import inspect
+import operator
+import threading
+import collections
+import concurrent.futures
 import datetime as datetime_module
 
 from python_toolbox import misc_tools
-from python_toolbox import binary_search
 from python_toolbox import decorator_tools
-from python_toolbox.sleek_reffing import SleekCallArgs
+from python_toolbox.sleek_reffing import SleekCallArgs, CallArgsBinder
 from python_toolbox.third_party.decorator import decorator as decorator_
 
+from .eviction_policies import LruPolicy
+from .cache_statistics import CacheStatistics, _cached_functions
+from .persistent_tier import PersistentTier
+
 infinity = float('inf')
 
 
@@ -32,8 +41,25 @@ def _get_now():
     return datetime_module.datetime.now()
 
 
+class _LockedContainer:
+    '''Wrapper for a cache that deletes entries from it under a lock.'''
+    def __init__(self, cache_dict, lock):
+        self.cache_dict = cache_dict
+        self.lock = lock
+
+    def __bool__(self):
+        return bool(self.cache_dict)
+
+    def __delitem__(self, key):
+        with self.lock:
+            del self.cache_dict[key]
+
+
 @decorator_tools.helpful_decorator_builder
-def cache(max_size=infinity, time_to_keep=None):
+def cache(max_size=infinity, time_to_keep=None, *, eviction_policy=None,
+          sizeof=None, thread_safe=False, n_lock_stripes=16,
+          timing_sample_interval=None, persistent_path=None,
+          persistent_namespace=None):
     '''
     Cache a function, saving results so they won't have to be computed again.
 
@@ -60,20 +86,66 @@ def cache(max_size=infinity, time_to_keep=None):
     results to store; old entries are thrown away according to a
     least-recently-used alogrithm. (Often abbreivated LRU.)
 
+    You may specify a different `eviction_policy` for choosing which entries
+    to throw away, like `caching.LfuPolicy`, `caching.ArcPolicy` or
+    `caching.TwoQueuePolicy`. (Or your own subclass of
+    `caching.EvictionPolicy`.) The last two are scan-resistant, i.e. calling
+    the function with many different arguments once won't throw away the
+    results that are used often. If you pass in a `sizeof` function,
+    `max_size` will be the maximum total of `sizeof(result)` over the cached
+    results, rather than the maximum number of results. This is useful when
+    the results differ a lot in size.
+
     You may optionally specific a `time_to_keep`, which is a time period after
     which a cache entry will expire. (Pass in either a `timedelta` object or
-    keyword arguments to create one.)
+    keyword arguments to create one.) You may specify both `max_size` and
+    `time_to_keep`.
+
+    Specify a `persistent_path` to also store the cached results in an sqlite
+    database file at that path. Results stored there survive process restarts
+    and are shared by all processes that use the same file, so a result is
+    computed only if it's in neither the in-memory cache nor the file. The
+    results are keyed by the function's name and a stable hash of the call
+    args; calls whose arguments or result can't be pickled are cached only in
+    memory. `time_to_keep` applies to results in the file too, but `max_size`
+    doesn't.
+
+    The name that the results are stored under is the function's module and
+    qualified name, unless you specify a different `persistent_namespace`.
+    Functions that have the same name in the same file get each other's
+    results, so a lambda or a function defined inside another function can be
+    cached in a file only if you give it a `persistent_namespace` of its own.
+
+    Specify `thread_safe=True` to make the cached function safe to call from
+    multiple threads at once. In this mode, when several threads call the
+    function with the same arguments and the value isn't cached yet, only one
+    of them computes the value while the others wait for its result. (If the
+    computation raises an exception, all the waiting threads get it too.)
+    Threads calling with different arguments don't wait for each other;
+    `n_lock_stripes` sets the number of locks that the in-progress calls are
+    spread over.
+
+    The cached function has a `.cache_statistics` attribute with the number of
+    hits, misses, evictions and expirations and the current size of the cache.
+    Specify `timing_sample_interval=1` to also measure the time spent building
+    cache keys and computing values, or `timing_sample_interval=n` to measure
+    it only on every `n`th call, which costs less. (See documentation of
+    `caching.CacheStatistics` for more details.) Use
+    `caching.dump_cache_statistics` to print the statistics of all the cached
+    functions in the process.
+
+    You may also decorate a coroutine function (i.e. an `async def` function.)
+    The cached function is a coroutine function too, and the awaited results
+    are the ones that are cached. When several coroutines await calls with the
+    same arguments and the result isn't cached yet, the result is computed
+    only once, in a single task that all of them await. (If it raises an
+    exception, all of them get it, and nothing is cached.) `max_size`,
+    `time_to_keep` and the rest of the options work the same as for normal
+    functions.
     '''
-    # todo idea: figure how how complex the function's argspec is, and then
-    # compile a function accordingly, so functions with a simple argspec won't
-    # have to go through so much shit. update: probably it will help only for
-    # completely argumentless function. so do one for those.
-
-    from python_toolbox.nifty_collections import OrderedDict
+    from python_toolbox import context_management
 
     if time_to_keep is not None:
-        if max_size != infinity:
-            raise NotImplementedError
         if not isinstance(time_to_keep, datetime_module.timedelta):
             try:
                 time_to_keep = datetime_module.timedelta(**time_to_keep)
@@ -91,89 +163,350 @@ def cache(max_size=infinity, time_to_keep=None):
         # In case we're being given a function that is already cached:
         if getattr(function, 'is_cached', False): return function
 
-        if max_size == infinity:
-
-            if time_to_keep:
-
-                sorting_key_function = lambda sleek_call_args: \
-                                              cached._cache[sleek_call_args][1]
+        ### Choosing how to look up and store values: #########################
+        #                                                                     #
+        # `get_cached_value` raises `KeyError` when the value isn't cached.
+
+        if max_size == infinity and sizeof is None and \
+                                                     eviction_policy is None:
+            cache_dict = {}
+        else:
+            if sizeof is not None and time_to_keep:
+                # The cache holds `(value, expiry_time)` entries.
+                entry_sizeof = lambda entry: sizeof(entry[0])
+            else:
+                entry_sizeof = sizeof
+            cache_dict = (eviction_policy or LruPolicy)(max_size=max_size,
+                                                        sizeof=entry_sizeof)
+
+        is_coroutine_function = inspect.iscoroutinefunction(function)
+
+        statistics = CacheStatistics(function, cache_dict,
+                                     timing_sample_interval)
+        compute_value = statistics._time(function, 'computing_time')
+
+        ### Choosing how to get values that aren't cached in memory: ##########
+        #                                                                     #
+        # `load_persisted_value` returns `(value, expiry_time)` or raises
+        # `KeyError`, and `persist_value` returns the `expiry_time` of the
+        # value it persisted. An `expiry_time` of `None` means the default.
+        if persistent_path is None:
+
+            def load_persisted_value(sleek_call_args):
+                raise KeyError(sleek_call_args)
+
+            def persist_value(sleek_call_args, value):
+                return None
+
+        else: # persistent_path is not None
+
+            if persistent_namespace is None:
+                qualname = function.__qualname__
+                if '<lambda>' in qualname or '<locals>' in qualname:
+                    # Other functions may have the same qualname, and we
+                    # don't want them to get each other's results.
+                    raise ValueError(
+                        "Can't keep the results of `%s` in a persistent "
+                        "file, because other functions may have the same "
+                        "name. Specify a `persistent_namespace`." % qualname
+                    )
+                namespace = '%s.%s' % (function.__module__, qualname)
+            else:
+                namespace = persistent_namespace
+
+            persistent_tier = PersistentTier(persistent_path, namespace)
+
+            def load_persisted_value(sleek_call_args):
+                value, expiry_timestamp = persistent_tier.get(
+                    sleek_call_args,
+                    now_timestamp=_get_now().timestamp()
+                )
+                statistics.n_persistent_hits += 1
+                return (value, None if expiry_timestamp is None else
+                        datetime_module.datetime.fromtimestamp(
+                                                            expiry_timestamp))
+
+            def persist_value(sleek_call_args, value):
+                if time_to_keep:
+                    expiry_time = _get_now() + time_to_keep
+                    expiry_timestamp = expiry_time.timestamp()
+                else:
+                    expiry_time = expiry_timestamp = None
+                persistent_tier.set(sleek_call_args, value, expiry_timestamp)
+                return expiry_time
+
+        if not is_coroutine_function:
+
+            def get_missing_value(sleek_call_args, args, kwargs):
+                try:
+                    return load_persisted_value(sleek_call_args)
+                except KeyError:
+                    value = compute_value(*args, **kwargs)
+                    return (value, persist_value(sleek_call_args, value))
 
+        else: # is_coroutine_function
 
-                def remove_expired_entries():
-                    almost_cutting_point = \
-                                          binary_search.binary_search_by_index(
-                        list(cached._cache.keys()),
-                        _get_now(),
-                        sorting_key_function,
-                        rounding=binary_search.LOW
-                    )
-                    if almost_cutting_point is not None:
-                        cutting_point = almost_cutting_point + 1
-                        for key in list(cached._cache.keys())[:cutting_point]:
-                            del cached._cache[key]
-
-                @misc_tools.set_attributes(_cache=OrderedDict())
-                def cached(function, *args, **kwargs):
-                    remove_expired_entries()
-                    sleek_call_args = \
-                        SleekCallArgs(cached._cache, function, *args, **kwargs)
+            async def get_missing_value(sleek_call_args, args, kwargs):
+                try:
+                    return load_persisted_value(sleek_call_args)
+                except KeyError:
+                    value = await compute_value(*args, **kwargs)
+                    return (value, persist_value(sleek_call_args, value))
+
+        #                                                                     #
+        ### Finished choosing how to get values that aren't cached in memory. #
+
+        if time_to_keep:
+
+            # Since `time_to_keep` is the same for all entries, entries expire
+            # in the order in which they were stored. We keep that order in a
+            # queue of `(expiry_time, sleek_call_args)`, so removing expired
+            # entries only needs to look at the head of the queue. Queue items
+            # for entries that were already evicted are skipped when they
+            # reach the head, or dropped when the queue is compacted. (Values
+            # loaded from the persistent tier keep their original expiry time,
+            # which may be earlier than that of entries stored before them, so
+            # they're inserted into the queue in their sorted position.)
+            expiry_queue = collections.deque()
+
+            def remove_expired_entries():
+                if not expiry_queue:
+                    return
+                now = _get_now()
+                while expiry_queue and expiry_queue[0][0] <= now:
+                    expiry_time, sleek_call_args = expiry_queue.popleft()
+                    entry = cached._cache.get(sleek_call_args)
+                    if entry is not None and entry[1] == expiry_time:
+                        del cached._cache[sleek_call_args]
+                        statistics.n_expirations += 1
+
+            def compact_expiry_queue():
+                live_items = [
+                    (expiry_time, sleek_call_args) for
+                    expiry_time, sleek_call_args in expiry_queue if
+                    cached._cache.get(sleek_call_args, (None, None))[1] ==
+                                                                    expiry_time
+                ]
+                expiry_queue.clear()
+                expiry_queue.extend(live_items)
+
+            def get_cached_value(sleek_call_args):
+                remove_expired_entries()
+                value, _ = cached._cache[sleek_call_args]
+                return value
+
+            def store_value(sleek_call_args, value, expiry_time=None):
+                if expiry_time is None:
+                    expiry_time = _get_now() + time_to_keep
+                cached._cache[sleek_call_args] = (value, expiry_time)
+                if expiry_queue and expiry_time < expiry_queue[-1][0]:
+                    bisect.insort(expiry_queue, (expiry_time, sleek_call_args),
+                                  key=operator.itemgetter(0))
+                else:
+                    expiry_queue.append((expiry_time, sleek_call_args))
+                if len(expiry_queue) > 2 * len(cached._cache) + 100:
+                    # Amortized over the stale items we've accumulated.
+                    compact_expiry_queue()
+
+        else: # not time_to_keep
+
+            def get_cached_value(sleek_call_args):
+                return cached._cache[sleek_call_args]
+
+            def store_value(sleek_call_args, value, expiry_time=None):
+                cached._cache[sleek_call_args] = value
+
+        #                                                                     #
+        ### Finished choosing how to look up and store values. ################
+
+        if thread_safe:
+            # The cache lock guards the structure of the cache, and is held
+            # only for quick lookups and stores.
+            cache_lock = threading.RLock()
+            # Sleekrefs may die in any thread, and then their call args remove
+            # themselves from the cache, so they must do it under the lock:
+            sleek_call_args_container = \
+                                       _LockedContainer(cache_dict, cache_lock)
+        else:
+            cache_lock = context_management.BlankContextManager()
+            sleek_call_args_container = cache_dict
+
+        # Analyzing the function's signature once rather than on every call:
+        call_args_binder = CallArgsBinder(function)
+
+        if call_args_binder.is_argumentless:
+            # All valid calls have the same call args, so we make them once.
+            argumentless_sleek_call_args = \
+                                   SleekCallArgs(cache_dict, call_args_binder)
+            def make_sleek_call_args(*args, **kwargs):
+                if args or kwargs:
+                    # This would raise the appropriate `TypeError`:
+                    return SleekCallArgs(sleek_call_args_container,
+                                         call_args_binder, *args, **kwargs)
+                return argumentless_sleek_call_args
+        else:
+            def make_sleek_call_args(*args, **kwargs):
+                return SleekCallArgs(sleek_call_args_container,
+                                     call_args_binder, *args, **kwargs)
+
+        make_sleek_call_args = statistics._time(make_sleek_call_args,
+                                                'key_building_time')
+
+        if is_coroutine_function:
+
+            # Tasks computing the values that are currently missing. Concurrent
+            # awaits of the same call args all await the same task, so the
+            # value is computed only once.
+            in_flight_tasks = {}
+
+            async def compute_and_store(sleek_call_args, args, kwargs):
+                value, expiry_time = \
+                        await get_missing_value(sleek_call_args, args, kwargs)
+                with cache_lock:
+                    store_value(sleek_call_args, value, expiry_time)
+                return value
+
+            def forget_task(sleek_call_args, task):
+                with cache_lock:
+                    if in_flight_tasks.get(sleek_call_args) is task:
+                        del in_flight_tasks[sleek_call_args]
+
+            @misc_tools.set_attributes(_cache=cache_dict)
+            async def cached(function, *args, **kwargs):
+                sleek_call_args = make_sleek_call_args(*args, **kwargs)
+                with cache_lock:
                     try:
-                        return cached._cache[sleek_call_args][0]
+                        value = get_cached_value(sleek_call_args)
                     except KeyError:
-                        value = function(*args, **kwargs)
-                        cached._cache[sleek_call_args] = (
-                            value,
-                            _get_now() + time_to_keep
-                        )
-                        cached._cache.sort(key=sorting_key_function)
+                        pass
+                    else:
+                        statistics.n_hits += 1
                         return value
+                    task = in_flight_tasks.get(sleek_call_args)
+                    # A task can only be awaited in the event loop that runs
+                    # it, so calls from other event loops compute the value
+                    # by themselves.
+                    if task is None or (task.get_loop() is not
+                                        asyncio.get_running_loop()):
+                        task = asyncio.ensure_future(
+                            compute_and_store(sleek_call_args, args, kwargs)
+                        )
+                        in_flight_tasks[sleek_call_args] = task
+                        task.add_done_callback(
+                            lambda task: forget_task(sleek_call_args, task)
+                        )
+                        statistics.n_misses += 1
+                    else:
+                        statistics.n_hits += 1
+                # Shielding the task so that cancelling one of the awaiting
+                # coroutines doesn't cancel the computation for the others. If
+                # it raises an exception, all of them get it, and nothing is
+                # cached.
+                return await asyncio.shield(task)
+
+        elif not thread_safe:
+
+            @misc_tools.set_attributes(_cache=cache_dict)
+            def cached(function, *args, **kwargs):
+                sleek_call_args = make_sleek_call_args(*args, **kwargs)
+                try:
+                    value = get_cached_value(sleek_call_args)
+                except KeyError:
+                    statistics.n_misses += 1
+                    value, expiry_time = \
+                             get_missing_value(sleek_call_args, args, kwargs)
+                    store_value(sleek_call_args, value, expiry_time)
+                    return value
+                else:
+                    statistics.n_hits += 1
+                    return value
 
-            else: # not time_to_keep
+        else: # thread_safe
 
-                @misc_tools.set_attributes(_cache={})
-                def cached(function, *args, **kwargs):
-                    sleek_call_args = \
-                        SleekCallArgs(cached._cache, function, *args, **kwargs)
+            # The striped locks guard the calls that are currently being
+            # computed, so that threads calling with different arguments rarely
+            # contend for the same lock.
+            lock_stripes = tuple(
+                (threading.Lock(), {}) for _ in range(n_lock_stripes)
+            )
+
+            @misc_tools.set_attributes(_cache=cache_dict)
+            def cached(function, *args, **kwargs):
+                sleek_call_args = make_sleek_call_args(*args, **kwargs)
+                stripe_lock, in_flight_futures = \
+                          lock_stripes[hash(sleek_call_args) % n_lock_stripes]
+
+                with stripe_lock:
+                    with cache_lock:
+                        try:
+                            value = get_cached_value(sleek_call_args)
+                        except KeyError:
+                            pass
+                        else:
+                            statistics.n_hits += 1
+                            return value
                     try:
-                        return cached._cache[sleek_call_args]
+                        future = in_flight_futures[sleek_call_args]
                     except KeyError:
-                        cached._cache[sleek_call_args] = value = \
-                              function(*args, **kwargs)
-                        return value
-
-        else: # max_size < infinity
+                        future = in_flight_futures[sleek_call_args] = \
+                                                 concurrent.futures.Future()
+                        is_computing_thread = True
+                    else:
+                        is_computing_thread = False
+
+                if not is_computing_thread:
+                    # Another thread is already computing this value; we'll
+                    # wait for it rather than compute it again. If it raises an
+                    # exception, we'll raise it too.
+                    value = future.result()
+                    with cache_lock:
+                        statistics.n_hits += 1
+                    return value
 
-            @misc_tools.set_attributes(_cache=OrderedDict())
-            def cached(function, *args, **kwargs):
-                sleek_call_args = \
-                    SleekCallArgs(cached._cache, function, *args, **kwargs)
+                with cache_lock:
+                    statistics.n_misses += 1
                 try:
-                    result = cached._cache[sleek_call_args]
-                    cached._cache.move_to_end(sleek_call_args)
-                    return result
-                except KeyError:
-                    cached._cache[sleek_call_args] = value = \
-                        function(*args, **kwargs)
-                    if len(cached._cache) > max_size:
-                        cached._cache.popitem(last=False)
+                    value, expiry_time = \
+                             get_missing_value(sleek_call_args, args, kwargs)
+                    with cache_lock:
+                        # (This may raise too, e.g. in `sizeof`.)
+                        store_value(sleek_call_args, value, expiry_time)
+                except BaseException as exception:
+                    future.set_exception(exception)
+                    raise
+                else:
+                    future.set_result(value)
                     return value
+                finally:
+                    with stripe_lock:
+                        del in_flight_futures[sleek_call_args]
 
 
         result = decorator_(cached, function)
 
         def cache_clear(key=CLEAR_ENTIRE_CACHE):
-            if key is CLEAR_ENTIRE_CACHE:
-                cached._cache.clear()
-            else:
-                try:
-                    del cached._cache[key]
-                except KeyError:
-                    pass
+            with cache_lock:
+                if key is CLEAR_ENTIRE_CACHE:
+                    cached._cache.clear()
+                else:
+                    try:
+                        del cached._cache[key]
+                    except KeyError:
+                        pass
+            if persistent_path is not None:
+                if key is CLEAR_ENTIRE_CACHE:
+                    persistent_tier.clear()
+                else:
+                    persistent_tier.delete(key)
 
         result.cache_clear = cache_clear
 
+        result.cache_statistics = statistics
+
         result.is_cached = True
 
+        _cached_functions.add(result)
+
         return result
 
     return decorator
@@ -0,0 +1,342 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines eviction policies for the `cache` decorator.
+
+An eviction policy holds the entries of a cache, and decides which entries to
+throw away when the cache gets too big. See documentation of `EvictionPolicy`
+for more details.
+'''
+
+import collections
+
+infinity = float('inf')
+
+
+class EvictionPolicy(collections.abc.MutableMapping):
+    '''
+    A mapping that evicts entries when their total size exceeds `max_size`.
+
+    This is the base class for eviction policies. By default, every entry has
+    a size of 1, so `max_size` is the maximum number of entries. If you pass in
+    a `sizeof` function, the size of each entry is `sizeof(value)`, so you can
+    bound the cache by the total size of the values, e.g. in bytes.
+
+    Getting an item with `policy[key]` counts as a use of that entry, which
+    the policy may take into account when choosing which entry to evict.
+    `policy.get(key)` and `key in policy` don't count as a use.
+
+    Entries are evicted before a new entry is inserted, to make room for it. An
+    entry that's bigger than `max_size` isn't stored at all.
+
+    Subclasses decide which entries to evict by implementing `_on_insert`,
+    `_on_use`, `_on_remove` and `_pick_entry_to_evict`, and optionally
+    `_prepare_insert`. The size of each entry is available in `self._sizes`.
+    '''
+    def __init__(self, max_size=infinity, sizeof=None):
+        self.max_size = max_size
+        '''The maximum total size of the entries.'''
+
+        self.sizeof = sizeof
+        '''Function for getting the size of a value, or `None` for size 1.'''
+
+        self.total_size = 0
+        '''The total size of the entries currently held.'''
+
+        self.n_evictions = 0
+        '''The number of entries evicted so far.'''
+
+        self._values = {}
+        self._sizes = {}
+
+    def __getitem__(self, key):
+        value = self._values[key]
+        self._on_use(key)
+        return value
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def __contains__(self, key):
+        return key in self._values
+
+    def __setitem__(self, key, value):
+        if key in self._values:
+            self._remove(key)
+        size = 1 if self.sizeof is None else self.sizeof(value)
+        if size > self.max_size:
+            # Too big to keep at all; no sense in evicting anything for it.
+            return
+        self._prepare_insert(key, size)
+        while self.total_size + size > self.max_size:
+            self._remove(self._pick_entry_to_evict())
+            self.n_evictions += 1
+        self._values[key] = value
+        self._sizes[key] = size
+        self.total_size += size
+        self._on_insert(key)
+
+    def __delitem__(self, key):
+        if key not in self._values:
+            raise KeyError(key)
+        self._remove(key)
+
+    def _remove(self, key):
+        self._on_remove(key)
+        del self._values[key]
+        self.total_size -= self._sizes.pop(key)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def clear(self):
+        for key in tuple(self._values):
+            self._remove(key)
+
+    def __repr__(self):
+        return '<%s: %s entries, total size %s out of %s>' % (
+            type(self).__name__, len(self), self.total_size, self.max_size
+        )
+
+    def _prepare_insert(self, key, size):
+        '''Prepare for inserting `key`, before making room for it.'''
+
+    def _on_insert(self, key):
+        '''Record that `key` was inserted.'''
+        raise NotImplementedError
+
+    def _on_use(self, key):
+        '''Record that the entry of `key` was used.'''
+        raise NotImplementedError
+
+    def _on_remove(self, key):
+        '''Record that `key` was removed, either by eviction or explicitly.'''
+        raise NotImplementedError
+
+    def _pick_entry_to_evict(self):
+        '''Get the key of the entry that should be evicted next.'''
+        raise NotImplementedError
+
+
+class LruPolicy(EvictionPolicy):
+    '''Evicts the least-recently-used entry. This is the default policy.'''
+    def __init__(self, max_size=infinity, sizeof=None):
+        super().__init__(max_size=max_size, sizeof=sizeof)
+        self._order = collections.OrderedDict()
+
+    def _on_insert(self, key):
+        self._order[key] = None
+
+    def _on_use(self, key):
+        self._order.move_to_end(key)
+
+    def _on_remove(self, key):
+        del self._order[key]
+
+    def _pick_entry_to_evict(self):
+        return next(iter(self._order))
+
+
+class LfuPolicy(EvictionPolicy):
+    '''
+    Evicts the least-frequently-used entry.
+
+    Among entries that were used equally often, the least-recently-used one is
+    evicted. Entries are kept in buckets by their number of uses, so all
+    operations take constant time.
+    '''
+    def __init__(self, max_size=infinity, sizeof=None):
+        super().__init__(max_size=max_size, sizeof=sizeof)
+        self._n_uses = {}
+        self._buckets = collections.defaultdict(collections.OrderedDict)
+        self._min_n_uses = None
+
+    def _move_to_bucket(self, key, n_uses):
+        old_n_uses = self._n_uses.get(key)
+        if old_n_uses is not None:
+            old_bucket = self._buckets[old_n_uses]
+            del old_bucket[key]
+            if not old_bucket:
+                del self._buckets[old_n_uses]
+                if self._min_n_uses == old_n_uses:
+                    self._min_n_uses = n_uses
+        self._n_uses[key] = n_uses
+        self._buckets[n_uses][key] = None
+
+    def _on_insert(self, key):
+        self._move_to_bucket(key, 0)
+        self._min_n_uses = 0
+
+    def _on_use(self, key):
+        self._move_to_bucket(key, self._n_uses[key] + 1)
+
+    def _on_remove(self, key):
+        n_uses = self._n_uses.pop(key)
+        bucket = self._buckets[n_uses]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[n_uses]
+            if self._min_n_uses == n_uses:
+                self._min_n_uses = None
+
+    def _pick_entry_to_evict(self):
+        if self._min_n_uses is None:
+            self._min_n_uses = min(self._buckets)
+        return next(iter(self._buckets[self._min_n_uses]))
+
+
+class TwoQueuePolicy(EvictionPolicy):
+    '''
+    Evicts entries according to the 2Q algorithm, which resists scans.
+
+    New entries go into a FIFO queue that takes up to a quarter of `max_size`,
+    and move to the main LRU queue only when they're used again. Entries that
+    are evicted from the FIFO queue are remembered (only their keys, not their
+    values) in a "ghost" queue, and if they're inserted again while they're
+    remembered, they go straight into the main queue. This way, a scan over
+    many entries that are used only once flushes only the FIFO queue, and not
+    the entries that are used repeatedly.
+    '''
+    def __init__(self, max_size=infinity, sizeof=None):
+        super().__init__(max_size=max_size, sizeof=sizeof)
+        self._new_queue = collections.OrderedDict()
+        self._new_queue_size = 0
+        self._main_queue = collections.OrderedDict()
+        self._ghost_queue = collections.OrderedDict()
+        self._ghost_queue_size = 0
+
+    def _on_insert(self, key):
+        if key in self._ghost_queue:
+            self._ghost_queue_size -= self._ghost_queue.pop(key)
+            self._main_queue[key] = None
+        else:
+            self._new_queue[key] = None
+            self._new_queue_size += self._sizes[key]
+
+    def _on_use(self, key):
+        if key in self._new_queue:
+            del self._new_queue[key]
+            self._new_queue_size -= self._sizes[key]
+            self._main_queue[key] = None
+        else:
+            self._main_queue.move_to_end(key)
+
+    def _on_remove(self, key):
+        if key in self._new_queue:
+            del self._new_queue[key]
+            self._new_queue_size -= self._sizes[key]
+        else:
+            del self._main_queue[key]
+
+    def _pick_entry_to_evict(self):
+        if self._new_queue and (self._new_queue_size > self.max_size / 4 or
+                                not self._main_queue):
+            key = next(iter(self._new_queue))
+            size = self._sizes[key]
+            self._ghost_queue[key] = size
+            self._ghost_queue_size += size
+            while self._ghost_queue_size > self.max_size / 2:
+                self._ghost_queue_size -= \
+                                      self._ghost_queue.popitem(last=False)[1]
+            return key
+        else:
+            return next(iter(self._main_queue))
+
+
+class ArcPolicy(EvictionPolicy):
+    '''
+    Evicts entries according to the ARC algorithm, which resists scans.
+
+    ARC (Adaptive Replacement Cache) keeps entries that were used once and
+    entries that were used more than once in two separate LRU lists. It
+    remembers the keys of entries recently evicted from each list in "ghost"
+    lists, and when an evicted key is inserted again, it adapts the share of
+    `max_size` that each list gets according to which ghost list the key was
+    found in.
+    '''
+    def __init__(self, max_size=infinity, sizeof=None):
+        super().__init__(max_size=max_size, sizeof=sizeof)
+        self._recent = collections.OrderedDict()
+        self._recent_size = 0
+        self._frequent = collections.OrderedDict()
+        self._recent_ghosts = collections.OrderedDict()
+        self._recent_ghosts_size = 0
+        self._frequent_ghosts = collections.OrderedDict()
+        self._frequent_ghosts_size = 0
+        self._target_recent_size = 0
+        '''The size that ARC is aiming for the list of recent entries.'''
+        self._is_ghost_hit = False
+
+    def _prepare_insert(self, key, size):
+        # If the key was evicted recently, we adapt the target size of the
+        # list of recent entries according to which list it was evicted from.
+        self._is_ghost_hit = True
+        if key in self._recent_ghosts:
+            self._target_recent_size = min(
+                self.max_size,
+                self._target_recent_size + size * max(
+                    self._frequent_ghosts_size / self._recent_ghosts_size, 1
+                )
+            )
+            self._recent_ghosts_size -= self._recent_ghosts.pop(key)
+        elif key in self._frequent_ghosts:
+            self._target_recent_size = max(
+                0,
+                self._target_recent_size - size * max(
+                    self._recent_ghosts_size / self._frequent_ghosts_size, 1
+                )
+            )
+            self._frequent_ghosts_size -= self._frequent_ghosts.pop(key)
+        else:
+            self._is_ghost_hit = False
+
+    def _on_insert(self, key):
+        if self._is_ghost_hit:
+            self._frequent[key] = None
+        else:
+            self._recent[key] = None
+            self._recent_size += self._sizes[key]
+
+    def _on_use(self, key):
+        if key in self._recent:
+            del self._recent[key]
+            self._recent_size -= self._sizes[key]
+            self._frequent[key] = None
+        else:
+            self._frequent.move_to_end(key)
+
+    def _on_remove(self, key):
+        if key in self._recent:
+            del self._recent[key]
+            self._recent_size -= self._sizes[key]
+        else:
+            del self._frequent[key]
+
+    def _pick_entry_to_evict(self):
+        if self._recent and (self._recent_size > self._target_recent_size or
+                             not self._frequent):
+            key = next(iter(self._recent))
+            self._recent_ghosts[key] = size = self._sizes[key]
+            self._recent_ghosts_size += size
+        else:
+            key = next(iter(self._frequent))
+            self._frequent_ghosts[key] = size = self._sizes[key]
+            self._frequent_ghosts_size += size
+        ### Trimming the ghost lists: #########################################
+        #                                                                     #
+        while self._recent_ghosts and (self._recent_ghosts_size +
+                                       self._recent_size > self.max_size):
+            self._recent_ghosts_size -= \
+                                    self._recent_ghosts.popitem(last=False)[1]
+        while self._frequent_ghosts and (
+                    self.total_size + self._recent_ghosts_size +
+                    self._frequent_ghosts_size > 2 * self.max_size):
+            self._frequent_ghosts_size -= \
+                                  self._frequent_ghosts.popitem(last=False)[1]
+        #                                                                     #
+        ### Finished trimming the ghost lists. ################################
+        return key
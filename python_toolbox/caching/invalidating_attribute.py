@@ -0,0 +1,121 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines the `InvalidatingAttribute` class.
+
+See its documentation for more details.
+'''
+
+import weakref
+
+from python_toolbox import misc_tools
+
+from .cached_property import CachedProperty
+
+
+def _get_dependents(cls, name):
+    '''
+    Get the cached properties of `cls` that depend on attribute `name`.
+
+    This includes the properties that depend on it indirectly, through other
+    cached properties. Returns a tuple of `(name, cached_property)` pairs.
+    '''
+    cached_properties = [
+        (property_name, value) for property_name, value in
+        ((property_name, getattr(cls, property_name, None)) for
+         property_name in dir(cls))
+        if isinstance(value, CachedProperty)
+    ]
+    dependent_names = set()
+    names_to_check = [name]
+    while names_to_check:
+        name_to_check = names_to_check.pop()
+        for property_name, cached_property in cached_properties:
+            if property_name not in dependent_names and \
+                                   name_to_check in cached_property.depends_on:
+                dependent_names.add(property_name)
+                names_to_check.append(property_name)
+    return tuple((property_name, cached_property) for
+                 property_name, cached_property in cached_properties
+                 if property_name in dependent_names)
+
+
+class InvalidatingAttribute(misc_tools.OwnNameDiscoveringDescriptor):
+    '''
+    An attribute that invalidates the cached properties that depend on it.
+
+    Usage:
+
+        class Rectangle:
+
+            width = InvalidatingAttribute()
+            height = InvalidatingAttribute()
+
+            area = CachedProperty(lambda self: self.width * self.height,
+                                  depends_on=('width', 'height'))
+
+            description = CachedProperty(lambda self: 'Area %s' % self.area,
+                                         depends_on='area')
+
+    Setting or deleting `rectangle.width` throws away the cached values of
+    `area` and of `description`, which depends on `area`, so they'll be
+    calculated again on next access. Cached properties that don't depend on
+    `width` keep their values.
+
+    The value of the attribute itself is stored in the object's `__dict__`.
+    '''
+    def __init__(self, doc=None, name=None):
+        '''
+        Construct the invalidating attribute.
+
+        You may optionally pass in the name that this attribute has in the
+        class; this will save a bit of processing later.
+        '''
+        misc_tools.OwnNameDiscoveringDescriptor.__init__(self, name=name)
+        self.__doc__ = doc
+        self._dependents_by_type = weakref.WeakKeyDictionary()
+        '''Cache of the dependent cached properties of each class.'''
+
+
+    def __get__(self, thing, our_type=None):
+
+        if thing is None:
+            # We're being accessed from the class itself, not from an object
+            return self
+
+        name = self.get_our_name(thing, our_type=our_type)
+        try:
+            return vars(thing)[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+
+    def __set__(self, thing, value):
+        vars(thing)[self.get_our_name(thing)] = value
+        self.invalidate_dependents(thing)
+
+
+    def __delete__(self, thing):
+        name = self.get_our_name(thing)
+        try:
+            del vars(thing)[name]
+        except KeyError:
+            raise AttributeError(name) from None
+        self.invalidate_dependents(thing)
+
+
+    def invalidate_dependents(self, thing):
+        '''Throw away the cached values that depend on this attribute.'''
+        our_type = type(thing)
+        try:
+            dependents = self._dependents_by_type[our_type]
+        except KeyError:
+            dependents = self._dependents_by_type[our_type] = \
+                          _get_dependents(our_type, self.get_our_name(thing))
+        for property_name, cached_property in dependents:
+            cached_property._forget_value(thing, our_type)
+
+
+    def __repr__(self):
+        return f'<{type(self).__name__}: {self.our_name}>'
@@ -0,0 +1,169 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines the `PersistentTier` class, an on-disk tier for the `cache` decorator.
+
+See its documentation for more details.
+'''
+
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import threading
+
+from python_toolbox import pickle_tools
+
+
+def _get_canonical_form(thing):
+    '''
+    Get a form of `thing` that pickles the same way in every process.
+
+    Sets and dicts are pickled in the order of their items, which depends on
+    the hash seed of the process, so we sort their items by their pickles.
+    '''
+    if isinstance(thing, (set, frozenset)):
+        return (type(thing).__name__,
+                tuple(sorted(map(_get_canonical_pickle, thing))))
+    elif isinstance(thing, dict):
+        return ('dict', tuple(sorted(
+            (_get_canonical_pickle(key), _get_canonical_pickle(value))
+            for key, value in thing.items()
+        )))
+    elif isinstance(thing, (list, tuple)):
+        return (type(thing).__name__, tuple(map(_get_canonical_form, thing)))
+    else:
+        return thing
+
+
+def _get_canonical_pickle(thing):
+    return pickle.dumps(_get_canonical_form(thing), protocol=4)
+
+
+def get_stable_key(sleek_call_args):
+    '''
+    Get a key for call args that's the same in every process.
+
+    Unlike `hash`, this doesn't depend on the hash seed of the process, so
+    it can be used for looking up call args in a file that's shared between
+    processes. Raises an exception if the call args can't be pickled.
+    '''
+    return hashlib.sha256(
+        _get_canonical_pickle((sleek_call_args.args,
+                               sleek_call_args.star_args,
+                               sleek_call_args.star_kwargs))
+    ).digest()
+
+
+class PersistentTier:
+    '''
+    An on-disk tier of a cache, stored in an sqlite database.
+
+    Values are stored compickled, keyed by the name of the cached function
+    and by a stable hash of the call args, so they survive process restarts
+    and can be shared by several processes that use the same file. Several
+    cached functions may share the same file.
+
+    Call args that can't be pickled, and values that can't be pickled, are
+    just not stored.
+    '''
+    def __init__(self, path, namespace):
+        self.path = os.fspath(path)
+        '''Path of the sqlite database file.'''
+
+        self.namespace = namespace
+        '''Name that tells our entries apart from other functions' entries.'''
+
+        self._local = threading.local()
+        with self._get_connection() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS cache_entries ('
+                'namespace TEXT NOT NULL, key BLOB NOT NULL, '
+                'value BLOB NOT NULL, expiry_timestamp REAL, '
+                'PRIMARY KEY (namespace, key))'
+            )
+
+
+    def _get_connection(self):
+        '''
+        Get an sqlite connection for the current thread and process.
+
+        Sqlite connections may not be shared between threads, or between
+        processes after forking, so we keep one per thread per process.
+        '''
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=60)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+
+    def get(self, sleek_call_args, now_timestamp=None):
+        '''
+        Get `(value, expiry_timestamp)` for the call args.
+
+        Raises `KeyError` if they're not stored, or if their entry expired
+        before `now_timestamp`. (Which defaults to the current time.)
+        '''
+        try:
+            key = get_stable_key(sleek_call_args)
+        except Exception as exception:
+            raise KeyError(sleek_call_args) from exception
+        row = self._get_connection().execute(
+            'SELECT value, expiry_timestamp FROM cache_entries '
+            'WHERE namespace = ? AND key = ?', (self.namespace, key)
+        ).fetchone()
+        if row is None:
+            raise KeyError(sleek_call_args)
+        compickled_value, expiry_timestamp = row
+        if now_timestamp is None:
+            now_timestamp = time.time()
+        if expiry_timestamp is not None and expiry_timestamp <= now_timestamp:
+            self.delete(sleek_call_args)
+            raise KeyError(sleek_call_args)
+        return (pickle_tools.decompickle(compickled_value), expiry_timestamp)
+
+
+    def set(self, sleek_call_args, value, expiry_timestamp=None):
+        '''Store `value` for the call args, if they can be pickled.'''
+        try:
+            key = get_stable_key(sleek_call_args)
+            compickled_value = pickle_tools.compickle(value)
+        except Exception:
+            return
+        with self._get_connection() as connection:
+            connection.execute(
+                'INSERT OR REPLACE INTO cache_entries '
+                '(namespace, key, value, expiry_timestamp) '
+                'VALUES (?, ?, ?, ?)',
+                (self.namespace, key, compickled_value, expiry_timestamp)
+            )
+
+
+    def delete(self, sleek_call_args):
+        '''Delete the entry of the call args, if there is one.'''
+        try:
+            key = get_stable_key(sleek_call_args)
+        except Exception:
+            return
+        with self._get_connection() as connection:
+            connection.execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND key = ?',
+                (self.namespace, key)
+            )
+
+
+    def clear(self):
+        '''Delete all of our entries.'''
+        with self._get_connection() as connection:
+            connection.execute('DELETE FROM cache_entries WHERE namespace = ?',
+                               (self.namespace,))
+
+
+    def __repr__(self):
+        return '<%s: %s in %s>' % (type(self).__name__, self.namespace,
+                                   self.path)
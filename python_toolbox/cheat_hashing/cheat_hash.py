@@ -10,8 +10,6 @@ See its documentation for more details.
 from .cheat_hash_functions import (cheat_hash_dict, cheat_hash_object,
                                    cheat_hash_sequence, cheat_hash_set)
 
-infinity = float('inf')
-
 dispatch_map = {
     object: cheat_hash_object,
     tuple: cheat_hash_sequence,
@@ -19,7 +17,60 @@ dispatch_map = {
     dict: cheat_hash_dict,
     set: cheat_hash_set
 }
-'''`dict` mapping from a type to a function that cheat-hashes it.'''
+'''
+`dict` mapping from a type to a function that cheat-hashes it.
+
+Each function is called with the object to cheat-hash as its only argument.
+'''
+
+_recursive_dispatch_map = {
+    tuple: cheat_hash_sequence,
+    list: cheat_hash_sequence,
+    dict: cheat_hash_dict,
+}
+'''
+The built-in functions in `dispatch_map` that cheat-hash containers.
+
+These get a second argument, a function for cheat-hashing the items inside
+the container. (Unless they were replaced in `dispatch_map`.)
+'''
+
+
+_cycle_hash = hash(('cheat_hash', 'cycle'))
+'''The cheat-hash of a container inside itself.'''
+
+_cheat_hash_functions = {}
+'''Cache of `_get_cheat_hash_function`, for the current `dispatch_map`.'''
+
+_dispatch_map_snapshot = {}
+'''Copy of `dispatch_map` as it was when `_cheat_hash_functions` was filled.'''
+
+
+def _get_cheat_hash_function(thing_type):
+    '''
+    Get the function for cheat-hashing `thing_type`, and whether it recurses.
+
+    The function is the one from `dispatch_map` that's closest in the MRO. It
+    recurses if it should be given a function for cheat-hashing items. Results
+    are cached per type, until `dispatch_map` is changed.
+    '''
+    if _dispatch_map_snapshot != dispatch_map:
+        _cheat_hash_functions.clear()
+        _dispatch_map_snapshot.clear()
+        _dispatch_map_snapshot.update(dispatch_map)
+    try:
+        return _cheat_hash_functions[thing_type]
+    except KeyError:
+        pass
+    for type_ in thing_type.__mro__:
+        try:
+            function = dispatch_map[type_]
+        except KeyError:
+            continue
+        result = _cheat_hash_functions[thing_type] = (
+            function, _recursive_dispatch_map.get(type_) is function
+        )
+        return result
 
 
 def cheat_hash(thing):
@@ -33,19 +84,41 @@ def cheat_hash(thing):
     This is intended for situtations where you have mutable objects that you
     never modify, and you want to be able to hash them despite Python not
     letting you.
-    '''
-    thing_type = type(thing)
-    matching_types = \
-        [type_ for type_ in dispatch_map if issubclass(thing_type, type_)]
-
-    mro = thing_type.mro()
-
-    matching_type = min(
-        matching_types,
-        key=lambda type_: (mro.index(type_) if type_ in mro else infinity)
-    )
-
-    return dispatch_map[matching_type](thing)
 
+    Hashable objects are hashed with `hash`, and unhashable ones with the
+    function from `dispatch_map` for their type. A container that appears
+    several times inside `thing` is cheat-hashed only once, and a container
+    that contains itself doesn't cause infinite recursion.
+    '''
+    # Both keyed by `id`, which is safe because `thing` keeps all the items
+    # alive until we're done:
+    memo = {}
+    ids_in_progress = set()
 
+    def cheat_hash_item(item):
+        item_type = type(item)
+        if item_type.__hash__ is not None:
+            try:
+                return hash(item)
+            except Exception:
+                # Probably a tuple containing unhashable items.
+                pass
+        item_id = id(item)
+        try:
+            return memo[item_id]
+        except KeyError:
+            pass
+        if item_id in ids_in_progress:
+            return _cycle_hash
+        ids_in_progress.add(item_id)
+        function, is_recursive = _get_cheat_hash_function(item_type)
+        try:
+            result = memo[item_id] = (
+                function(item, cheat_hash_item) if is_recursive else
+                function(item)
+            )
+        finally:
+            ids_in_progress.discard(item_id)
+        return result
 
+    return cheat_hash_item(thing)
@@ -1,13 +1,19 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
-'''Defines functions for cheat-hashing various types.'''
+'''
+Defines functions for cheat-hashing various types.
+
+Each function takes the object to cheat-hash, and optionally a function for
+cheat-hashing the items inside it. (`cheat_hash` passes in a function that
+shares a memo and cycle detection among all the items of one computation.)
+'''
 
 # todo: there are some recommended hash implementations in `_abcoll`, maybe
 # they'll help
 
 
-def cheat_hash_object(thing):
+def cheat_hash_object(thing, cheat_hash_item=None):
     '''Cheat-hash an `object`.'''
     try:
         return hash(thing)
@@ -15,63 +21,27 @@ def cheat_hash_object(thing):
         return id(thing)
 
 
-def cheat_hash_set(my_set):
+def cheat_hash_set(my_set, cheat_hash_item=None):
     '''Cheat-hash a `set`.'''
-    hashables = set()
-    unhashables = set()
-    for thing in my_set:
-        try:
-            hash(thing)
-        except Exception:
-            unhashables.add(thing)
-        else:
-            hashables.add(thing)
-
-    return hash(
-        (
-            frozenset(hashables),
-            tuple(sorted(cheat_hash(thing) for thing in unhashables))
-        )
-    )
+    # The items of a set are always hashable, and a set is equal to a
+    # `frozenset` with the same items, so it should have the same hash.
+    return hash(frozenset(my_set))
 
 
-def cheat_hash_sequence(my_sequence):
+def cheat_hash_sequence(my_sequence, cheat_hash_item=None):
     '''Cheat-hash a sequence.'''
-    hashables = []
-    unhashables = []
-    for thing in my_sequence:
-        try:
-            hash(thing)
-        except Exception:
-            unhashables.append(thing)
-        else:
-            hashables.append(thing)
-
-    return hash(
-        (
-            tuple(hashables),
-            tuple(cheat_hash(thing) for thing in unhashables)
-        )
-    )
+    if cheat_hash_item is None:
+        cheat_hash_item = cheat_hash
+    return hash(tuple(map(cheat_hash_item, my_sequence)))
 
 
-def cheat_hash_dict(my_dict):
+def cheat_hash_dict(my_dict, cheat_hash_item=None):
     '''Cheat-hash a `dict`.'''
-    hashable_items = []
-    unhashable_items = []
-    for key, value in my_dict.items():
-        try:
-            hash((key, value))
-        except Exception:
-            unhashable_items.append((key, value))
-        else:
-            hashable_items.append((key, value))
-
-    return hash(
-        (
-            tuple(sorted(hashable_items)),
-            tuple(cheat_hash(thing) for thing in sorted(unhashable_items))
-        )
-    )
-
-from .cheat_hash import cheat_hash
\ No newline at end of file
+    if cheat_hash_item is None:
+        cheat_hash_item = cheat_hash
+    # Hashing a `frozenset` of the items, so the order of the items doesn't
+    # matter, without having to sort them. The keys are always hashable.
+    return hash(frozenset([(key, cheat_hash_item(value)) for key, value in
+                           my_dict.items()]))
+
+from .cheat_hash import cheat_hash
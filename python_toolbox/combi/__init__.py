@@ -13,3 +13,5 @@ from .selection_space import SelectionSpace
 
 from .perming import (PermSpace, CombSpace, Perm, UnrecurrentedPerm, Comb,
                       UnrecurrentedComb, UnallowedVariationSelectionException)
+
+from .sharding import map_sharded, get_shard_ranges, iterate_shard
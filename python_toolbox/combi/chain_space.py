@@ -116,6 +116,15 @@ class ChainSpace(sequence_tools.CuteSequenceMixin, collections.abc.Sequence):
         else:
             raise ValueError
 
+    def __reduce__(self):
+        # The lazy tuples can't be pickled, so we exhaust them.
+        return (
+            type(self),
+            (tuple(tuple(sequence) if isinstance(sequence,
+                                                 nifty_collections.LazyTuple)
+                   else sequence for sequence in self.sequences),)
+        )
+
     def __bool__(self):
         try: next(iter(self))
         except StopIteration: return False
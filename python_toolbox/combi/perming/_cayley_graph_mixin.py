@@ -0,0 +1,74 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import collections
+import random
+
+
+class _CayleyGraphMixin:
+    '''
+    Mixin for `PermSpace` to walk between perms that are neighbors.
+
+    Two perms are neighbors if switching two items in one of them gives the
+    other. These are the edges of the Cayley graph of the perms, generated by
+    transpositions, and restricted to the perms in this space.
+    '''
+
+    def iterate_breadth_first(self, perm=None):
+        '''
+        Iterate over the perms reachable from `perm`, closest ones first.
+
+        `perm` defaults to the first perm in the space. Every perm is yielded
+        once, in breadth-first order; perms that can't be reached from `perm`
+        by switching items without leaving the space aren't yielded.
+
+        Visited perms are kept as bits in a `bytearray` indexed by their index
+        numbers in the space, so this takes `self.length / 8` bytes of memory
+        regardless of how many perms are visited.
+        '''
+        if self.is_combination or self.is_recurrent or self.is_partial:
+            raise NotImplementedError
+        perm = self[0] if perm is None else self.coerce_perm(perm)
+        is_visited = bytearray((self.length + 7) // 8)
+        i = self.index(perm)
+        is_visited[i >> 3] |= 1 << (i & 7)
+        queue = collections.deque((perm,))
+        while queue:
+            perm = queue.popleft()
+            yield perm
+            for swap in perm.iterate_neighbor_swaps(perm_space=self):
+                perm_sequence = perm._get_swapped_perm_sequence(*swap)
+                i = self.index(perm_sequence)
+                if not is_visited[i >> 3] & (1 << (i & 7)):
+                    is_visited[i >> 3] |= 1 << (i & 7)
+                    queue.append(self.coerce_perm(perm_sequence))
+
+
+    def iterate_random_walk(self, perm=None, random_generator=None):
+        '''
+        Walk randomly between neighbor perms in the space, forever.
+
+        Starting from `perm`, which defaults to the first perm in the space,
+        every step moves to a random neighbor of the current perm, chosen
+        uniformly from the neighbors that are in the space. Each perm on the
+        walk is yielded, starting with `perm` itself. If a perm on the walk has
+        no neighbors in the space, `ValueError` is raised.
+
+        You may pass a `random.Random` instance as `random_generator` for
+        reproducible results.
+        '''
+        if self.is_combination or self.is_recurrent or self.is_partial:
+            raise NotImplementedError
+        if random_generator is None:
+            random_generator = random
+        perm = self[0] if perm is None else self.coerce_perm(perm)
+        while True:
+            yield perm
+            swaps = tuple(perm.iterate_neighbor_swaps(perm_space=self))
+            if not swaps:
+                raise ValueError(
+                    "Can't walk from %s, because it has no neighbors in %s." %
+                    (perm, self)
+                )
+            i, j = random_generator.choice(swaps)
+            perm = self.coerce_perm(perm._get_swapped_perm_sequence(i, j))
@@ -0,0 +1,137 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+from python_toolbox import caching
+from python_toolbox import math_tools
+
+
+class _DisjointChains:
+    '''
+    Union-find structure for tracking cycles while building a perm.
+
+    While we're assigning items to a perm one by one, the partial perm consists
+    of closed cycles and open chains. For every item, `find` returns the end of
+    the chain that starts at it, i.e. the item that the chain is waiting to be
+    continued from. Assigning `j -> value` closes a cycle exactly when the
+    chain starting at `value` ends at `j`.
+    '''
+    def __init__(self, n_items):
+        self.parents = list(range(n_items))
+
+    def find(self, item):
+        '''Get the end of the chain that starts at `item`.'''
+        parents = self.parents
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    def assign(self, key, value):
+        '''
+        Record that `key` points to `value`.
+
+        Returns whether this closed a cycle.
+        '''
+        end = self.find(value)
+        self.parents[key] = end
+        return end == key
+
+
+class _DegreedIndexingMixin:
+    '''Mixin for `PermSpace` to index and rank perms in degreed spaces.'''
+
+    @caching.CachedProperty
+    def _degreed_n_completions_table(self):
+        '''
+        Table of the number of ways to complete a partial perm in this space.
+
+        `table[n_unassigned][n_cycles]` is the number of perms with one of
+        this space's degrees that extend a partial perm which has
+        `n_unassigned` items left to assign and `n_cycles` closed cycles.
+        The Stirling numbers are calculated once per space, instead of once for
+        every candidate item.
+        '''
+        sequence_length = self.sequence_length
+        return tuple(
+            tuple(
+                sum(
+                    math_tools.abs_stirling(
+                        n_unassigned,
+                        sequence_length - degree - n_cycles
+                    ) for degree in self.degrees
+                ) for n_cycles in range(sequence_length + 1)
+            ) for n_unassigned in range(sequence_length + 1)
+        )
+
+
+    def _get_initial_disjoint_chains(self):
+        '''Get a `_DisjointChains` with the fixed map of this space applied.'''
+        disjoint_chains = _DisjointChains(self.sequence_length)
+        for key, value in self.fixed_map.items():
+            disjoint_chains.assign(key, value)
+        return disjoint_chains
+
+
+    def _get_degreed_perm_sequence(self, i):
+        '''
+        Get the perm sequence at index `i` of this degreed space.
+
+        Assumes the space is pure except for being degreed and possibly fixed.
+        '''
+        sequence_length = self.sequence_length
+        table = self._degreed_n_completions_table
+        disjoint_chains = self._get_initial_disjoint_chains()
+        available_values = list(self.free_values)
+        wip_perm_sequence = [None] * sequence_length
+        for key, value in self.fixed_map.items():
+            wip_perm_sequence[key] = value
+        n_unassigned = len(available_values)
+        n_cycles = self._n_cycles_in_fixed_items_of_just_fixed
+        wip_i = i
+        for j in range(sequence_length):
+            if wip_perm_sequence[j] is not None:
+                continue
+            n_unassigned -= 1
+            for value_index, value in enumerate(available_values):
+                closed_cycle = (disjoint_chains.find(value) == j)
+                n_completions = table[n_unassigned][n_cycles + closed_cycle]
+                if wip_i < n_completions:
+                    del available_values[value_index]
+                    disjoint_chains.assign(j, value)
+                    wip_perm_sequence[j] = value
+                    n_cycles += closed_cycle
+                    break
+                wip_i -= n_completions
+            else:
+                raise RuntimeError
+        assert wip_i == 0
+        return tuple(wip_perm_sequence)
+
+
+    def _index_degreed_perm_sequence(self, perm_sequence):
+        '''
+        Get the index number of `perm_sequence` in this degreed space.
+
+        Assumes the space is pure except for being degreed and possibly fixed,
+        and that the perm has one of the space's degrees.
+        '''
+        table = self._degreed_n_completions_table
+        disjoint_chains = self._get_initial_disjoint_chains()
+        fixed_map = self.fixed_map
+        available_values = list(self.free_values)
+        n_unassigned = len(available_values)
+        n_cycles = self._n_cycles_in_fixed_items_of_just_fixed
+        wip_perm_number = 0
+        for j, value in enumerate(perm_sequence):
+            if j in fixed_map:
+                if fixed_map[j] != value:
+                    raise ValueError
+                continue
+            n_unassigned -= 1
+            value_index = available_values.index(value)
+            for lower_value in available_values[:value_index]:
+                closed_cycle = (disjoint_chains.find(lower_value) == j)
+                wip_perm_number += table[n_unassigned][n_cycles + closed_cycle]
+            del available_values[value_index]
+            n_cycles += disjoint_chains.assign(j, value)
+        return wip_perm_number
@@ -0,0 +1,286 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import collections
+import itertools
+
+
+class _IteratingMixin:
+    '''
+    Mixin for `PermSpace` to iterate over its perms incrementally.
+
+    Instead of unranking every perm from scratch through `__getitem__`, we walk
+    from each perm to the next one, yielding perms in exactly the same order
+    that indexing would give them.
+    '''
+
+    def __iter__(self):
+        if not self.length:
+            return iter(())
+        perm_type = self.perm_type
+        return (
+            perm_type(perm_sequence, self) for perm_sequence in
+            itertools.islice(
+                self._iterate_perm_sequences(self.canonical_slice.start),
+                self.length
+            )
+        )
+
+
+    def _iterate_perm_sequences(self, start=0):
+        '''
+        Iterate over the sequences of the perms in this space, ignoring slice.
+
+        The iteration starts from the perm with index `start` in the unsliced
+        version of this space, and goes on until the end of the unsliced
+        space. Each perm sequence is yielded as a `tuple`.
+        '''
+        if self.is_dapplied:
+            # Dapplying changes only the domain, not the items, so we can just
+            # use the items of the undapplied space.
+            return self.undapplied._iterate_perm_sequences(start)
+
+        elif self.is_degreed:
+            if self.is_rapplied:
+                sequence = self.sequence
+                return (
+                    tuple(map(sequence.__getitem__, perm_sequence)) for
+                    perm_sequence in
+                    self.unrapplied._iterate_perm_sequences(start)
+                )
+            return self._iterate_degreed_perm_sequences(
+                self._get_start_perm_sequence(start)
+            )
+
+        elif self.is_recurrent:
+            return self._iterate_recurrent_perm_sequences(
+                self._get_start_perm_sequence(start)
+            )
+
+        elif self.is_fixed:
+            return self._iterate_fixed_perm_sequences(start)
+
+        elif self.is_combination:
+            return self._iterate_comb_sequences(
+                self._get_start_perm_sequence(start)
+            )
+
+        else:
+            return self._iterate_plain_perm_sequences(
+                self._get_start_perm_sequence(start)
+            )
+
+
+    def _get_start_perm_sequence(self, start):
+        '''
+        Get the perm sequence that iteration starting at `start` begins with.
+
+        Returns `None` when starting from the very first perm, in which case
+        there's no need to resume iteration from the middle of the space.
+        '''
+        if start == 0:
+            return None
+        return tuple(self.unsliced[start]._perm_sequence)
+
+
+    def _iterate_plain_perm_sequences(self, start_perm_sequence):
+        '''
+        Iterate over perm sequences of a non-recurrent, unfixed space.
+
+        The order of `itertools.permutations` is exactly our order, so we let
+        it do the heavy lifting. When resuming from `start_perm_sequence`, we
+        go over each prefix of it, from the longest to the shortest, and
+        exhaust the perms that share that prefix and come after it.
+        '''
+        sequence = tuple(self.sequence)
+        n_elements = self.n_elements
+        if start_perm_sequence is None:
+            yield from itertools.permutations(sequence, n_elements)
+            return
+
+        yield start_perm_sequence
+        for depth in reversed(range(n_elements)):
+            prefix = start_perm_sequence[:depth]
+            prefix_set = set(prefix)
+            remaining_items = [item for item in sequence
+                               if item not in prefix_set]
+            later_items = remaining_items[
+                remaining_items.index(start_perm_sequence[depth]) + 1:
+            ]
+            for item in later_items:
+                other_items = [other_item for other_item in remaining_items
+                               if other_item != item]
+                head = prefix + (item,)
+                for tail in itertools.permutations(other_items,
+                                                   n_elements - depth - 1):
+                    yield head + tail
+
+
+    def _iterate_comb_sequences(self, start_perm_sequence):
+        '''
+        Iterate over comb sequences of a non-recurrent combination space.
+
+        Works like `_iterate_plain_perm_sequences`, except we use
+        `itertools.combinations`.
+        '''
+        sequence = tuple(self.sequence)
+        n_elements = self.n_elements
+        if start_perm_sequence is None:
+            yield from itertools.combinations(sequence, n_elements)
+            return
+
+        positions = {item: i for i, item in enumerate(sequence)}
+        yield start_perm_sequence
+        for depth in reversed(range(n_elements)):
+            prefix = start_perm_sequence[:depth]
+            for position in range(positions[start_perm_sequence[depth]] + 1,
+                                  len(sequence)):
+                head = prefix + (sequence[position],)
+                for tail in itertools.combinations(sequence[position + 1:],
+                                                   n_elements - depth - 1):
+                    yield head + tail
+
+
+    def _iterate_fixed_perm_sequences(self, start):
+        '''
+        Iterate over perm sequences of a non-recurrent, fixed space.
+
+        We iterate over the perm space of the free values and weave the fixed
+        values into each of its perms.
+        '''
+        undapplied_fixed_map = self._undapplied_fixed_map
+        template = [undapplied_fixed_map.get(i) for i in self.indices]
+        free_positions = [i for i in self.indices
+                          if i not in undapplied_fixed_map]
+        free_values_perm_sequences = self._free_values_unsliced_perm_space. \
+                                                _iterate_perm_sequences(start)
+        for free_values_perm_sequence in free_values_perm_sequences:
+            wip_perm_sequence = list(template)
+            for position, value in zip(free_positions,
+                                       free_values_perm_sequence):
+                wip_perm_sequence[position] = value
+            yield tuple(wip_perm_sequence)
+
+
+    def _iterate_recurrent_perm_sequences(self, start_perm_sequence):
+        '''
+        Iterate over perm sequences of a recurrent space.
+
+        This is a depth-first walk that picks candidates in the same order as
+        the recurrent branch of `PermSpace.__getitem__`: At each position, the
+        candidates are the distinct available items in order of their first
+        appearance among the available items, excluding items reserved by the
+        fixed map. In combination spaces, items that were exhausted at a
+        position are excluded from any later position as well.
+        '''
+        n_elements = self.n_elements
+        fixed_map = self.fixed_map
+        is_combination = self.is_combination
+        available_values = list(self.sequence)
+        reserved_values = collections.Counter(fixed_map.values())
+        wip_perm_sequence = [None] * n_elements
+
+        def iterate(j, start_perm_sequence, shit_set):
+            if j == n_elements:
+                yield tuple(wip_perm_sequence)
+                return
+
+            if j in fixed_map:
+                value = fixed_map[j]
+                index = available_values.index(value)
+                del available_values[index]
+                reserved_values[value] -= 1
+                wip_perm_sequence[j] = value
+                yield from iterate(j + 1, start_perm_sequence, shit_set)
+                reserved_values[value] += 1
+                available_values.insert(index, value)
+                return
+
+            counter = collections.Counter(available_values)
+            candidates = [
+                value for value in dict.fromkeys(available_values)
+                if counter[value] > reserved_values[value] and
+                                                         value not in shit_set
+            ]
+            if is_combination:
+                shit_set = set(shit_set)
+                n_unexcluded_values = sum(counter[value] for value in
+                                          counter if value not in shit_set)
+            if start_perm_sequence is not None:
+                index = candidates.index(start_perm_sequence[j])
+                if is_combination:
+                    for value in candidates[:index]:
+                        shit_set.add(value)
+                        n_unexcluded_values -= counter[value]
+                del candidates[:index]
+
+            for value in candidates:
+                if is_combination and \
+                          (n_unexcluded_values - 1 < n_elements - j - 1):
+                    # Not enough items left to fill the remaining positions.
+                    break
+                index = available_values.index(value)
+                del available_values[index]
+                wip_perm_sequence[j] = value
+                yield from iterate(j + 1, start_perm_sequence, shit_set)
+                start_perm_sequence = None
+                available_values.insert(index, value)
+                if is_combination:
+                    shit_set.add(value)
+                    n_unexcluded_values -= counter[value]
+
+        return iterate(0, start_perm_sequence, frozenset())
+
+
+    def _iterate_degreed_perm_sequences(self, start_perm_sequence):
+        '''
+        Iterate over perm sequences of a degreed, unrapplied space.
+
+        This is a depth-first walk over the lexicographic order of perms,
+        pruning any branch that can't be completed to a perm with one of the
+        allowed degrees. (Using the same table of Stirling-number counts that
+        `PermSpace.__getitem__` uses for degreed spaces.)
+        '''
+        sequence_length = self.sequence_length
+        wip_perm_sequence = [None] * sequence_length
+        for key, value in self.fixed_map.items():
+            wip_perm_sequence[key] = value
+        free_indices = [i for i in range(sequence_length)
+                        if wip_perm_sequence[i] is None]
+        available_values = list(self.free_values)
+        n_free_indices = len(free_indices)
+
+        table = self._degreed_n_completions_table
+
+        def iterate(depth, n_cycles, start_perm_sequence):
+            if depth == n_free_indices:
+                yield tuple(wip_perm_sequence)
+                return
+            j = free_indices[depth]
+            n_unassigned = n_free_indices - depth - 1
+            candidates = list(available_values)
+            if start_perm_sequence is not None:
+                del candidates[:candidates.index(start_perm_sequence[j])]
+            for value in candidates:
+                ### Checking whether we closed a cycle: #######################
+                #                                                             #
+                current = value
+                while wip_perm_sequence[current] is not None:
+                    current = wip_perm_sequence[current]
+                candidate_n_cycles = n_cycles + (current == j)
+                #                                                             #
+                ### Finished checking whether we closed a cycle. ##############
+                if not table[n_unassigned][candidate_n_cycles]:
+                    start_perm_sequence = None
+                    continue
+                index = available_values.index(value)
+                del available_values[index]
+                wip_perm_sequence[j] = value
+                yield from iterate(depth + 1, candidate_n_cycles,
+                                   start_perm_sequence)
+                start_perm_sequence = None
+                wip_perm_sequence[j] = None
+                available_values.insert(index, value)
+
+        return iterate(0, self._n_cycles_in_fixed_items_of_just_fixed,
+                       start_perm_sequence)
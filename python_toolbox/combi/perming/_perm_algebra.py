@@ -0,0 +1,98 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Defines fast tools for the group operations on pure perm sequences.
+
+A pure perm sequence is a sequence of the numbers `0..n-1` in some order,
+given as either a `tuple` or a `bytes` object. (`Perm` keeps short pure perms
+as `bytes`.) Each function returns a sequence of the same type that it got, and
+`bytes` sequences are handled by `bytes` methods that run in C.
+'''
+
+import math
+
+
+def _compose(perm_sequence, other_perm_sequence):
+    '''
+    Get the sequence of `perm_sequence[i]` for every `i` in the other sequence.
+
+    This is the perm sequence of `perm * other_perm`.
+    '''
+    if isinstance(perm_sequence, bytes) and \
+       isinstance(other_perm_sequence, bytes) and \
+                     max(other_perm_sequence, default=0) < len(perm_sequence):
+        # (If an item is out of range, we let the `tuple` version below raise
+        # `IndexError` rather than have `translate` silently use the padding.)
+        return other_perm_sequence.translate(perm_sequence.ljust(256, b'\0'))
+    return tuple(map(perm_sequence.__getitem__, other_perm_sequence))
+
+
+def _invert(perm_sequence):
+    '''Get the inverse of a perm sequence.'''
+    sequence_length = len(perm_sequence)
+    if isinstance(perm_sequence, bytes):
+        # A translation table from our items to their indices:
+        return bytes.maketrans(
+            perm_sequence, bytes(range(sequence_length))
+        )[:sequence_length]
+    inverse = [None] * sequence_length
+    for i, item in enumerate(perm_sequence):
+        inverse[item] = i
+    return tuple(inverse)
+
+
+def _get_cycles(perm_sequence):
+    '''
+    Get the cycles of a perm sequence, as a list of lists.
+
+    Each cycle starts from its smallest item, and the cycles are ordered by
+    their first items. Fixed points are included as cycles of length 1.
+    '''
+    is_visited = bytearray(len(perm_sequence))
+    cycles = []
+    for starting_item in range(len(perm_sequence)):
+        if is_visited[starting_item]:
+            continue
+        cycle = []
+        current_item = starting_item
+        while not is_visited[current_item]:
+            is_visited[current_item] = True
+            cycle.append(current_item)
+            current_item = perm_sequence[current_item]
+        cycles.append(cycle)
+    return cycles
+
+
+def _power(perm_sequence, exponent):
+    '''
+    Raise a perm sequence by the power of `exponent`, which may be negative.
+
+    Instead of multiplying the perm by itself over and over, we move each item
+    `exponent` steps along its cycle. This takes `O(n)` time for any exponent.
+    '''
+    result = [None] * len(perm_sequence)
+    for cycle in _get_cycles(perm_sequence):
+        cycle_length = len(cycle)
+        shift = exponent % cycle_length
+        for i, item in enumerate(cycle):
+            result[item] = cycle[(i + shift) % cycle_length]
+    return bytes(result) if isinstance(perm_sequence, bytes) else \
+                                                                 tuple(result)
+
+
+def _get_cycle_type(perm_sequence):
+    '''Get the lengths of the cycles of a perm sequence, longest first.'''
+    return tuple(sorted(map(len, _get_cycles(perm_sequence)), reverse=True))
+
+
+def _get_order(cycle_type):
+    '''
+    Get the order of a perm with the given cycle type.
+
+    This is the smallest positive exponent that makes the perm the identity.
+    '''
+    order = 1
+    for cycle_length in set(cycle_type):
+        order = order * cycle_length // math.gcd(order, cycle_length)
+    return order
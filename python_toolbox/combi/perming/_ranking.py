@@ -0,0 +1,116 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''Defines tools for ranking perms, i.e. finding their index numbers.'''
+
+import math
+
+
+class _FenwickTree:
+    '''
+    Binary indexed tree, for prefix sums of a list of numbers that changes.
+
+    Both changing a number and getting the sum of the numbers before an index
+    take `O(log n)` time.
+    '''
+    def __init__(self, numbers):
+        self.tree = [0]
+        self.tree.extend(numbers)
+        tree_length = len(self.tree)
+        # Building in linear time, by adding each node to its parent:
+        for i in range(1, tree_length):
+            parent = i + (i & -i)
+            if parent < tree_length:
+                self.tree[parent] += self.tree[i]
+
+    def add(self, index, delta):
+        '''Add `delta` to the number at `index`.'''
+        tree = self.tree
+        i = index + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def get_prefix_sum(self, index):
+        '''Get the sum of the numbers before `index`.'''
+        tree = self.tree
+        result = 0
+        i = index
+        while i:
+            result += tree[i]
+            i -= i & -i
+        return result
+
+
+def _get_perm_rank(positions, sequence_length):
+    '''
+    Get the index number of a perm of distinct items.
+
+    `positions` are the positions in the sequence of the perm's items, in
+    order. The perm may be partial, i.e. use fewer items than the sequence has.
+    Raises `ValueError` if an item is used twice.
+
+    The digit of each item is the number of unused items before it in the
+    sequence, which we count with a `_FenwickTree`, and the digits are
+    accumulated with Horner's method. This takes `O(n log n)` arithmetic
+    operations, rather than the `O(n ** 2)` of removing items from a list.
+    '''
+    unused_items = _FenwickTree([1] * sequence_length)
+    is_used = bytearray(sequence_length)
+    rank = 0
+    for i, position in enumerate(positions):
+        if is_used[position]:
+            raise ValueError
+        is_used[position] = True
+        rank = rank * (sequence_length - i) + \
+                                         unused_items.get_prefix_sum(position)
+        unused_items.add(position, -1)
+    return rank
+
+
+def _get_multiset_perm_rank(perm_sequence, value_positions, sequence_length):
+    '''
+    Get the index number of a perm that uses all the items of a multiset.
+
+    `value_positions` maps each distinct value to the tuple of its positions in
+    the sequence. Raises `ValueError` if the perm has a value more times than
+    the sequence has it, or a value that the sequence doesn't have.
+
+    In a recurrent perm space, the candidates for each item are the distinct
+    remaining values, ordered by their first remaining appearance in the
+    sequence. For each item, the perms that come before ours are the ones that
+    have an earlier candidate at that position, and there are `n_perms *
+    count / m` of them for each candidate, where `n_perms` is the number of
+    arrangements of the `m` remaining items and `count` is the number of
+    remaining appearances of the candidate. We keep each value's remaining
+    count at its first remaining position in a `_FenwickTree`, so we can sum
+    the counts of the earlier candidates quickly.
+    '''
+    counts = {value: len(positions) for value, positions in
+              value_positions.items()}
+    n_items = sequence_length
+    n_perms = math.factorial(n_items)
+    numbers = [0] * sequence_length
+    for value, positions in value_positions.items():
+        n_perms //= math.factorial(counts[value])
+        numbers[positions[0]] = counts[value]
+    remaining_counts = _FenwickTree(numbers)
+    rank = 0
+    for m, value in zip(range(n_items, 0, -1), perm_sequence):
+        try:
+            count = counts[value]
+        except KeyError:
+            raise ValueError
+        if not count:
+            raise ValueError
+        positions = value_positions[value]
+        position = positions[len(positions) - count]
+        rank += n_perms * remaining_counts.get_prefix_sum(position) // m
+        n_perms = n_perms * count // m
+        counts[value] = count - 1
+        # Moving the value's remaining count to its next position:
+        remaining_counts.add(position, -count)
+        if count > 1:
+            remaining_counts.add(positions[len(positions) - count + 1],
+                                 count - 1)
+    return rank
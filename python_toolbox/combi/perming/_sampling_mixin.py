@@ -0,0 +1,150 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import random
+
+from python_toolbox import math_tools
+
+
+class _SamplingMixin:
+    '''
+    Mixin for `PermSpace` to draw random perms without unranking them.
+
+    `take_random` on a generic sequence picks a random index and gets the item
+    at it, which for a big `PermSpace` means arithmetic on huge numbers and a
+    slow trip through `__getitem__`. Here we build a uniformly-random perm
+    directly wherever the variations allow it, and fall back to picking a
+    random index otherwise.
+
+    All methods take an optional `random_generator`, which may be a
+    `random.Random` instance for reproducible results. By default the global
+    generator of the `random` module is used.
+    '''
+
+    def take_random(self, random_generator=None):
+        '''Take a random perm from the space.'''
+        return self.perm_type(self._sample_perm_sequence(
+            random if random_generator is None else random_generator
+        ), self)
+
+
+    def sample(self, k, random_generator=None):
+        '''
+        Get `k` random perm sequences from the space, as a tuple of tuples.
+
+        The perms are drawn independently and uniformly, so the same perm may
+        appear more than once. Like `get_many`, this doesn't create a `Perm`
+        object for each perm.
+
+        Example:
+
+            >>> perm_space = PermSpace(4)
+            >>> perm_space.sample(3, random.Random(0)) # doctest: +SKIP
+            ((2, 0, 1, 3), (3, 1, 0, 2), (0, 3, 1, 2))
+
+        '''
+        if random_generator is None:
+            random_generator = random
+        if not self.length:
+            if k:
+                raise IndexError
+            return ()
+        return tuple(self._sample_perm_sequence(random_generator)
+                     for _ in range(k))
+
+
+    def _sample_perm_sequence(self, random_generator):
+        '''Get the sequence of a uniformly-random perm from the space.'''
+        if not self.length:
+            raise IndexError
+
+        elif self.is_sliced or (self.is_recurrent and (
+                self.is_fixed or self.is_partial or self.is_combination)) or \
+                                          (self.is_degreed and self.is_fixed):
+            # No direct sampler for these; picking a random index instead.
+            i = random_generator.randrange(self.length)
+            return tuple(
+                self.unsliced[i + self.canonical_slice.start]._perm_sequence
+            )
+
+        elif self.is_dapplied:
+            return self.undapplied._sample_perm_sequence(random_generator)
+
+        elif self.is_degreed:
+            if self.is_rapplied:
+                return tuple(map(
+                    self.sequence.__getitem__,
+                    self.unrapplied._sample_perm_sequence(random_generator)
+                ))
+            return self._sample_degreed_perm_sequence(random_generator)
+
+        elif self.is_fixed:
+            free_values_perm_iterator = iter(
+                self._free_values_unsliced_perm_space._sample_perm_sequence(
+                                                             random_generator)
+            )
+            undapplied_fixed_map = self._undapplied_fixed_map
+            return tuple(
+                (undapplied_fixed_map[i] if i in undapplied_fixed_map else
+                 next(free_values_perm_iterator)) for i in self.indices
+            )
+
+        elif self.is_combination:
+            sequence = self._sequence_tuple
+            return tuple(
+                sequence[i] for i in sorted(
+                    random_generator.sample(range(self.sequence_length),
+                                            self.n_elements)
+                )
+            )
+
+        else:
+            # `random.sample` is a partial Fisher-Yates shuffle, so it gives
+            # every ordered selection of `n_elements` items the same chance.
+            # In a recurrent space, every distinct perm comes from the same
+            # number of orderings of the sequence's items, so it's uniform
+            # there too.
+            return tuple(random_generator.sample(self._sequence_tuple,
+                                                 self.n_elements))
+
+
+    def _sample_degreed_perm_sequence(self, random_generator):
+        '''
+        Get a uniformly-random perm sequence in a pure but degreed space.
+
+        A perm of degree `d` has `n - d` cycles. We first pick the number of
+        cycles, weighted by the number of perms that have it. Then we build
+        the perm by adding items one by one: Every perm of the first `m` items
+        with `c` cycles comes either from a perm of `m - 1` items with `c - 1`
+        cycles, with item `m - 1` added as a new cycle, or from a perm of
+        `m - 1` items with `c` cycles, with item `m - 1` added after one of the
+        `m - 1` items before it. The Stirling numbers tell us how likely each
+        of these is, so no perm is ever rejected.
+        '''
+        sequence_length = self.sequence_length
+        cycle_counts = [sequence_length - degree for degree in self.degrees]
+        wip_i = random_generator.randrange(self.length)
+        for n_cycles in cycle_counts:
+            n_perms = math_tools.abs_stirling(sequence_length, n_cycles)
+            if wip_i < n_perms:
+                break
+            wip_i -= n_perms
+        else:
+            raise RuntimeError
+
+        # Deciding from the last item backwards which items start new cycles:
+        is_new_cycle = [False] * sequence_length
+        for m in range(sequence_length, 0, -1):
+            n_new_cycle_perms = math_tools.abs_stirling(m - 1, n_cycles - 1)
+            if n_new_cycle_perms and random_generator.randrange(
+                     math_tools.abs_stirling(m, n_cycles)) < n_new_cycle_perms:
+                is_new_cycle[m - 1] = True
+                n_cycles -= 1
+        assert n_cycles == 0
+
+        perm_sequence = list(range(sequence_length))
+        for m in range(1, sequence_length):
+            if not is_new_cycle[m]:
+                j = random_generator.randrange(m)
+                perm_sequence[m], perm_sequence[j] = perm_sequence[j], m
+        return tuple(perm_sequence)
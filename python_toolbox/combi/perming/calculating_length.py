@@ -1,12 +1,109 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
-import itertools
+import math
+import collections.abc
 
+from python_toolbox import caching
 from python_toolbox import nifty_collections
 
 
-_length_of_recurrent_perm_space_cache = {}
+_length_cache_max_size = 10000
+
+
+def _get_canonical_counts(fbb):
+    '''
+    Get the counts of the items in `fbb` as a sorted tuple.
+
+    `fbb` may be a `FrozenBagBag`, or any other mapping that can be made into
+    one, or an iterable of the counts of the items. The sorted tuple is a
+    compact cache key that's quicker to build and hash than a `FrozenBagBag`.
+    '''
+    if isinstance(fbb, collections.abc.Mapping):
+        if not isinstance(fbb, nifty_collections.FrozenBagBag):
+            fbb = nifty_collections.FrozenBagBag(fbb)
+        return tuple(sorted(fbb.elements))
+    else:
+        return tuple(sorted(fbb))
+
+
+def _calculate_length_of_recurrent_perm_space(k, counts):
+    '''
+    Calculate the number of `k`-perms of a multiset with `counts`.
+
+    We go over the items one by one, and keep `n_perms[m]`, the number of
+    `m`-perms of the items so far. An `m`-perm that uses `j` copies of a new
+    item is an `(m - j)`-perm of the previous items with the copies put in
+    `binomial(m, j)` ways, so each item multiplies the generating function by a
+    polynomial instead of expanding a level of sub-`FrozenBagBag`s.
+    '''
+    n_perms = [1] + [0] * k
+    n_items = 0
+    for count in counts:
+        n_items += count
+        for m in range(min(k, n_items), 0, -1):
+            n_perms[m] = sum(
+                n_perms[m - j] * math.comb(m, j)
+                for j in range(min(count, m) + 1)
+            )
+    return n_perms[k]
+
+
+def _calculate_length_of_recurrent_comb_space(k, counts):
+    '''
+    Calculate the number of `k`-combinations of a multiset with `counts`.
+
+    This is the coefficient of `x ** k` in the product of the polynomials
+    `1 + x + ... + x ** count`. Multiplying by each of them is a sliding sum,
+    which we get from prefix sums.
+    '''
+    n_combs = [1] + [0] * k
+    for count in counts:
+        prefix_sums = [0]
+        for n_combs_ in n_combs:
+            prefix_sums.append(prefix_sums[-1] + n_combs_)
+        n_combs = [prefix_sums[m + 1] - prefix_sums[max(m - count, 0)]
+                   for m in range(k + 1)]
+    return n_combs[k]
+
+
+class _CachedLengthCalculators:
+    '''
+    Holder of the cached versions of the length calculators.
+
+    There's a single instance of it, and `use_persistent_length_cache` replaces
+    its calculators rather than the instance itself, so the change is seen by
+    anyone who got the instance.
+    '''
+    def __init__(self):
+        self.set_persistent_path(None)
+
+    def set_persistent_path(self, persistent_path):
+        '''Make new cached calculators, using the sqlite file if given.'''
+        # Thread-safe, because an LRU cache changes on every lookup, and
+        # lengths are calculated whenever a `PermSpace` is created.
+        self.calculate_length_of_recurrent_perm_space = caching.cache(
+            max_size=_length_cache_max_size, thread_safe=True,
+            persistent_path=persistent_path
+        )(_calculate_length_of_recurrent_perm_space)
+        self.calculate_length_of_recurrent_comb_space = caching.cache(
+            max_size=_length_cache_max_size, thread_safe=True,
+            persistent_path=persistent_path
+        )(_calculate_length_of_recurrent_comb_space)
+
+_cached_length_calculators = _CachedLengthCalculators()
+
+
+def use_persistent_length_cache(path):
+    '''
+    Store the lengths of recurrent spaces in an sqlite file at `path` as well.
+
+    Lengths stored there are reused by later processes, so they're calculated
+    only once across runs. Pass `None` to go back to caching only in memory.
+    (See the `persistent_path` argument of `caching.cache`.)
+    '''
+    _cached_length_calculators.set_persistent_path(path)
+
 
 def calculate_length_of_recurrent_perm_space(k, fbb):
     '''
@@ -16,84 +113,34 @@ def calculate_length_of_recurrent_perm_space(k, fbb):
     is the space's `FrozenBagBag`, meaning a bag where each key is the number
     of recurrences of an item and each count is the number of different items
     that have this number of recurrences. (See documentation of `FrozenBagBag`
-    for more info.)
+    for more info.) You may also pass the number of recurrences of each item,
+    e.g. `(3, 1, 1)`, which is quicker.
 
     It's assumed that the space is not a `CombSpace`, it's not fixed, not
     degreed and not sliced.
+
+    Results are kept in a bounded cache; see `use_persistent_length_cache` to
+    keep them on disk as well.
     '''
-    cache = _length_of_recurrent_perm_space_cache
-    if not isinstance(fbb, nifty_collections.FrozenBagBag):
-        fbb = nifty_collections.FrozenBagBag(fbb)
+    counts = _get_canonical_counts(fbb)
     ### Checking for edge cases: ##############################################
     #                                                                         #
     if k == 0:
         return 1
     elif k == 1:
-        assert fbb
-        # (Works because `FrozenBagBag` has a functioning `__bool__`, unlike
-        # Python's `Counter`.)
-        return fbb.n_elements
+        assert counts
+        return len(counts)
     #                                                                         #
     ### Finished checking for edge cases. #####################################
-
-    try:
-        return cache[(k, fbb)]
-    except KeyError:
-        pass
-
-    # This is a 2-phase algorithm, similar to recursion but not really
-    # recursion since we don't want to abuse the stack.
-    #
-    # In the first phase, we get all the sub-FBBs that we need to solve for to
-    # get a solution for this FBB, and then for these sub-FBBs we get the
-    # sub-sub-FBBs we need to solve in order to solve them, and we continue
-    # until we reach trivial FBBs.
-    #
-    # In the second phase, we'll go over the levels of FBBs, starting with the
-    # simplest ones and making our way up to the original FBB. The simplest
-    # FBBs will be solved trivially, and then as they get progressively more
-    # complex, each FBB will be solved using the solutions of its sub-FBB.
-    # Every solution will be stored in the global cache.
-
-
-    ### Doing phase one, getting all sub-FBBs: ################################
-    #                                                                         #
-    levels = []
-    current_fbbs = {fbb}
-    while len(levels) < k and current_fbbs:
-        k_ = k - len(levels)
-        levels.append(
-            {fbb_: fbb_.get_sub_fbbs_for_one_key_removed()
-             for fbb_ in current_fbbs if (k_, fbb_) not in cache}
-        )
-        current_fbbs = set(itertools.chain(*levels[-1].values()))
-    #                                                                         #
-    ### Finished doing phase one, getting all sub-FBBs. #######################
-
-    ### Doing phase two, solving FBBs from trivial to complex: ################
-    #                                                                         #
-    for k_, level in enumerate(reversed(levels), (k - len(levels) + 1)):
-        if k_ == 1:
-            for fbb_, sub_fbb_bag in level.items():
-                cache[(k_, fbb_)] = fbb_.n_elements
-        else:
-            for fbb_, sub_fbb_bag in level.items():
-                cache[(k_, fbb_)] = sum(
-                    (cache[(k_ - 1, sub_fbb)] * factor for
-                           sub_fbb, factor in sub_fbb_bag.items())
-                )
-    #                                                                         #
-    ### Finished doing phase two, solving FBBs from trivial to complex. #######
-
-    return cache[(k, fbb)]
+    return _cached_length_calculators.calculate_length_of_recurrent_perm_space(
+        k, counts
+    )
 
 
 
 
 ###############################################################################
 
-_length_of_recurrent_comb_space_cache = {}
-
 def calculate_length_of_recurrent_comb_space(k, fbb):
     '''
     Calculate the length of a recurrent `CombSpace`.
@@ -102,74 +149,24 @@ def calculate_length_of_recurrent_comb_space(k, fbb):
     is the space's `FrozenBagBag`, meaning a bag where each key is the number
     of recurrences of an item and each count is the number of different items
     that have this number of recurrences. (See documentation of `FrozenBagBag`
-    for more info.)
+    for more info.) You may also pass the number of recurrences of each item,
+    e.g. `(3, 1, 1)`, which is quicker.
 
     It's assumed that the space is not fixed, not degreed and not sliced.
+
+    Results are kept in a bounded cache; see `use_persistent_length_cache` to
+    keep them on disk as well.
     '''
-    cache = _length_of_recurrent_comb_space_cache
-    if not isinstance(fbb, nifty_collections.FrozenBagBag):
-        fbb = nifty_collections.FrozenBagBag(fbb)
+    counts = _get_canonical_counts(fbb)
     ### Checking for edge cases: ##############################################
     #                                                                         #
     if k == 0:
         return 1
     elif k == 1:
-        assert fbb
-        # (Works because `FrozenBagBag` has a functioning `__bool__`,
-        # unlike Python's `Counter`.)
-        return fbb.n_elements
+        assert counts
+        return len(counts)
     #                                                                         #
     ### Finished checking for edge cases. #####################################
-
-    try:
-        return cache[(k, fbb)]
-    except KeyError:
-        pass
-
-    # This is a 2-phase algorithm, similar to recursion but not really
-    # recursion since we don't want to abuse the stack.
-    #
-    # In the first phase, we get all the sub-FBBs that we need to solve for to
-    # get a solution for this FBB, and then for these sub-FBBs we get the
-    # sub-sub-FBBs we need to solve in order to solve them, and we continue
-    # until we reach trivial FBBs.
-    #
-    # In the second phase, we'll go over the levels of FBBs, starting with the
-    # simplest ones and making our way up to the original FBB. The simplest
-    # FBBs will be solved trivially, and then as they get progressively more
-    # complex, each FBB will be solved using the solutions of its sub-FBB.
-    # Every solution will be stored in the global cache.
-
-
-    ### Doing phase one, getting all sub-FBBs: ################################
-    #                                                                         #
-    levels = []
-    current_fbbs = {fbb}
-    while len(levels) < k and current_fbbs:
-        k_ = k - len(levels)
-        levels.append(
-            {fbb_: fbb_.get_sub_fbbs_for_one_key_and_previous_piles_removed()
-             for fbb_ in current_fbbs if (k_, fbb_) not in cache}
-        )
-        current_fbbs = set(itertools.chain(*levels[-1].values()))
-    #                                                                         #
-    ### Finished doing phase one, getting all sub-FBBs. #######################
-
-    ### Doing phase two, solving FBBs from trivial to complex: ################
-    #                                                                         #
-    for k_, level in enumerate(reversed(levels), (k - len(levels) + 1)):
-        if k_ == 1:
-            for fbb_, sub_fbbs in level.items():
-                cache[(k_, fbb_)] = len(sub_fbbs)
-        else:
-            for fbb_, sub_fbbs in level.items():
-                cache[(k_, fbb_)] = sum(
-                    (cache[(k_ - 1, sub_fbb)] for sub_fbb in sub_fbbs)
-                )
-    #                                                                         #
-    ### Finished doing phase two, solving FBBs from trivial to complex. #######
-
-    return cache[(k, fbb)]
-
-
-
+    return _cached_length_calculators.calculate_length_of_recurrent_comb_space(
+        k, counts
+    )
@@ -13,6 +13,7 @@ from python_toolbox import sequence_tools
 from python_toolbox import cute_iter_tools
 
 from .. import misc
+from . import _perm_algebra
 
 
 infinity = float('inf')
@@ -86,8 +87,16 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
         >>> perm_space.index(perm)
         23
 
+    To keep perms small in memory, they have `__slots__` and the `__dict__` is
+    only allocated when a cached property like `inverse` is first calculated.
+    The flags like `is_rapplied` are taken from the nominal perm space rather
+    than stored on each perm, and perms of a non-rapplied space of up to 256
+    items keep their items in a `bytes` object rather than a `tuple`.
     '''
 
+    __slots__ = ('nominal_perm_space', '_perm_sequence', '__dict__',
+                 '__weakref__')
+
     @classmethod
     def coerce(cls, item, perm_space=None):
         '''Coerce item into a perm, optionally of a specified `PermSpace`.'''
@@ -131,28 +140,60 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
         #                                                                     #
         ### Finished analyzing `perm_space`. ##################################
 
-        self.is_rapplied = self.nominal_perm_space.is_rapplied
-        self.is_recurrent = self.nominal_perm_space.is_recurrent
-        self.is_partial = self.nominal_perm_space.is_partial
-        self.is_combination = self.nominal_perm_space.is_combination
-        self.is_dapplied = self.nominal_perm_space.is_dapplied
-        self.is_pure = not (self.is_rapplied or self.is_dapplied
-                            or self.is_partial or self.is_combination)
+        if not self.nominal_perm_space.is_rapplied and \
+                          self.nominal_perm_space.sequence_length <= 256 and \
+                                         not isinstance(perm_sequence, bytes):
+            try:
+                perm_sequence = bytes(perm_sequence)
+            except (TypeError, ValueError):
+                # Not a valid pure perm sequence, we'll keep it as it is.
+                pass
+        self._perm_sequence = perm_sequence
 
-        if not self.is_rapplied: self.unrapplied = self
-        if not self.is_dapplied: self.undapplied = self
-        if not self.is_combination: self.uncombinationed = self
+        assert self.is_combination == isinstance(self, Comb)
 
-        self._perm_sequence = sequence_tools. \
-             ensure_iterable_is_immutable_sequence(perm_sequence)
 
-        assert self.is_combination == isinstance(self, Comb)
+    is_rapplied = property(
+        lambda self: self.nominal_perm_space.is_rapplied,
+        doc='''Whether this perm's space has a custom range.'''
+    )
+    is_recurrent = property(
+        lambda self: self.nominal_perm_space.is_recurrent,
+        doc='''Whether this perm's space has recurring items.'''
+    )
+    is_partial = property(
+        lambda self: self.nominal_perm_space.is_partial,
+        doc='''Whether this perm doesn't use all the items of its space.'''
+    )
+    is_combination = property(
+        lambda self: self.nominal_perm_space.is_combination,
+        doc='''Whether this perm is a combination.'''
+    )
+    is_dapplied = property(
+        lambda self: self.nominal_perm_space.is_dapplied,
+        doc='''Whether this perm's space has a custom domain.'''
+    )
 
+    @property
+    def is_pure(self):
+        '''
+        Whether this perm is none of rapplied, dapplied, partial and comb.
+        '''
+        nominal_perm_space = self.nominal_perm_space
+        return not (nominal_perm_space.is_rapplied or
+                    nominal_perm_space.is_dapplied or
+                    nominal_perm_space.is_partial or
+                    nominal_perm_space.is_combination)
 
     _reduced = property(lambda self: (
         type(self), self._perm_sequence, self.nominal_perm_space
     ))
 
+    def __reduce__(self):
+        # Needed for pickle protocols 0 and 1, which can't handle
+        # `__slots__` on their own. Cached properties aren't pickled.
+        return (type(self), (self._perm_sequence, self.nominal_perm_space))
+
     __iter__ = lambda self: iter(self._perm_sequence)
 
     def __eq__(self, other):
@@ -167,9 +208,9 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
     def __contains__(self, item):
         try:
             return (item in self._perm_sequence)
-        except TypeError:
+        except (TypeError, ValueError):
             # Gotta have this `except` because Python complains if you try `1
-            # in 'meow'`.
+            # in 'meow'`, or `'a' in b'meow'` or `300 in b'meow'`.
             return False
 
     def __repr__(self):
@@ -195,7 +236,11 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
             4
 
         '''
-        numerical_index = self._perm_sequence.index(member)
+        try:
+            numerical_index = self._perm_sequence.index(member)
+        except TypeError as type_error:
+            # `bytes.index` raises `TypeError` for items that aren't `int`.
+            raise ValueError from type_error
         return self.nominal_perm_space. \
                domain[numerical_index] if self.is_dapplied else numerical_index
 
@@ -230,24 +275,23 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
         if self.is_rapplied:
             return self.nominal_perm_space[0] * self.unrapplied.inverse
         else:
-            _perm = [None] * \
-                     self.nominal_perm_space.sequence_length
-            for i, item in enumerate(self):
-                _perm[item] = i
-            return type(self)(_perm, self.nominal_perm_space)
+            return type(self)(_perm_algebra._invert(self._perm_sequence),
+                              self.nominal_perm_space)
 
 
     __invert__ = lambda self: self.inverse
 
-    domain = caching.CachedProperty(
+    domain = property(
         lambda self: self.nominal_perm_space.domain,
-        '''The permutation's domain.'''
+        doc='''The permutation's domain.'''
     )
 
 
     @caching.CachedProperty
     def unrapplied(self):
         '''An unrapplied version of this permutation.'''
+        if not self.is_rapplied:
+            return self
         ### Calculating the new perm sequence: ################################
         #                                                                     #
         # This is more complex than a one-line generator because of recurrent
@@ -272,7 +316,7 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
         lambda self: type(self)(
             self._perm_sequence,
             self.nominal_perm_space.undapplied
-        ),
+        ) if self.is_dapplied else self,
         '''An undapplied version of this permutation.'''
 
     )
@@ -280,7 +324,7 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
         lambda self: Perm(
             self._perm_sequence,
             self.nominal_perm_space.uncombinationed
-        ),
+        ) if self.is_combination else self,
         '''A non-combination version of this permutation.'''
 
     )
@@ -295,6 +339,8 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
                 raise IndexError from type_error
         else:
             i_to_use = i
+            if isinstance(i, slice):
+                return tuple(self._perm_sequence[i])
         return self._perm_sequence[i_to_use]
 
     length = property(
@@ -326,6 +372,17 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
             raise Exception("Can't apply permutation on sequence of "
                             "shorter length.")
 
+        if result_type is None and isinstance(sequence, Perm) and \
+                              self._is_plain_sequence and \
+                              sequence._is_plain_sequence and \
+                                                 not sequence.is_dapplied:
+            # Multiplying perms, we can compose their sequences directly:
+            return type(self)(
+                _perm_algebra._compose(sequence._perm_sequence,
+                                       self._perm_sequence),
+                sequence.nominal_perm_space
+            )
+
         permed_generator = (sequence[i] for i in self)
         if result_type is not None:
             if result_type is str:
@@ -348,10 +405,21 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
     # multiplication of objects of the same type.)
 
     def __pow__(self, exponent):
-        '''Raise the perm by the power of `exponent`.'''
+        '''
+        Raise the perm by the power of `exponent`.
+
+        For pure perms this takes `O(n)` time for any exponent, because each
+        item is moved along its cycle rather than multiplying the perm by
+        itself over and over.
+        '''
         assert isinstance(exponent, numbers.Integral)
         if exponent <= -1:
             return self.inverse ** (- exponent)
+        elif self.is_pure:
+            return type(self)(
+                _perm_algebra._power(self._perm_sequence, exponent),
+                self.nominal_perm_space
+            )
         elif exponent == 0:
             return self.nominal_perm_space[0]
         else:
@@ -391,20 +459,50 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
             return self.unrapplied.n_cycles
         if self.is_dapplied:
             return self.undapplied.n_cycles
+        return len(_perm_algebra._get_cycles(self._perm_sequence))
 
-        unvisited_items = set(self)
-        n_cycles = 0
-        while unvisited_items:
-            starting_item = current_item = next(iter(unvisited_items))
 
-            while current_item in unvisited_items:
-                unvisited_items.remove(current_item)
-                current_item = self[current_item]
+    @caching.CachedProperty
+    def cycle_type(self):
+        '''
+        The lengths of the cycles in this permutation, longest first.
 
-            if current_item == starting_item:
-                n_cycles += 1
+        Items that the permutation doesn't move count as cycles of length 1.
 
-        return n_cycles
+        Example:
+
+            >>> PermSpace(5)[10]
+            <Perm: (0, 2, 4, 1, 3)>
+            >>> PermSpace(5)[10].cycle_type
+            (4, 1)
+
+        '''
+        if self.is_partial:
+            return NotImplemented
+        if self.is_rapplied:
+            return self.unrapplied.cycle_type
+        if self.is_dapplied:
+            return self.undapplied.cycle_type
+        return _perm_algebra._get_cycle_type(self._perm_sequence)
+
+
+    @caching.CachedProperty
+    def order(self):
+        '''
+        The order of this permutation.
+
+        This is the smallest positive number `k` such that `perm ** k` is the
+        identity permutation.
+        '''
+        if self.is_partial:
+            return NotImplemented
+        return _perm_algebra._get_order(self.cycle_type)
+
+
+    parity = property(
+        lambda self: NotImplemented if self.is_partial else self.degree % 2,
+        doc='''The parity of this permutation, 0 for even and 1 for odd.'''
+    )
 
 
     def get_neighbors(self, *, degrees=(1,), perm_space=None):
@@ -423,17 +521,119 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
             raise NotImplementedError
         if perm_space is None:
             perm_space = self.nominal_perm_space
-        return MapSpace(
-            perm_space.coerce_perm,
-            nifty_collections.LazyTuple(
+        if tuple(degrees) == (1,):
+            # The closest neighbors are the most common case, and we can get
+            # them straight from the swaps without going through a degreed
+            # `PermSpace`.
+            perm_sequences = (
+                self._get_swapped_perm_sequence(i, j) for i, j in
+                self.iterate_neighbor_swaps(perm_space=perm_space)
+            )
+        else:
+            perm_sequences = (
                 tuple(perm) for perm in PermSpace(
                     self._perm_sequence,
                     degrees=degrees
                 ) if tuple(perm) in perm_space
             )
+        return MapSpace(
+            perm_space.coerce_perm,
+            nifty_collections.LazyTuple(perm_sequences)
         )
 
 
+    def iterate_neighbor_swaps(self, *, perm_space=None):
+        '''
+        Iterate over the swaps that turn this perm into its closest neighbors.
+
+        Each swap is a pair `(i, j)` of positions in the perm, with `i < j`,
+        meaning that the neighbor is this perm with the items at positions `i`
+        and `j` switched. Yielding swaps rather than perms keeps allocations
+        out of loops that go over many neighbors, like local search.
+
+        The swaps are lazily generated, in the same order as the neighbors of
+        `get_neighbors()`. If `perm_space` is given, only swaps that make a
+        perm in `perm_space` are yielded.
+
+        Example:
+
+            >>> perm = PermSpace(3)[0]
+            >>> tuple(perm.iterate_neighbor_swaps())
+            ((1, 2), (0, 1), (0, 2))
+
+        '''
+        if self.is_combination or self.is_recurrent or self.is_partial:
+            raise NotImplementedError
+        is_swap_allowed = self._get_neighbor_swap_checker(perm_space)
+        length = self.length
+        for i in range(length - 2, -1, -1):
+            for j in range(i + 1, length):
+                if is_swap_allowed(i, j):
+                    yield (i, j)
+
+
+    def _get_swapped_perm_sequence(self, i, j):
+        '''Get our perm sequence with the items at `i` and `j` switched.'''
+        wip_perm_sequence = list(self._perm_sequence)
+        wip_perm_sequence[i], wip_perm_sequence[j] = \
+                                    wip_perm_sequence[j], wip_perm_sequence[i]
+        return tuple(wip_perm_sequence)
+
+
+    def _get_neighbor_swap_checker(self, perm_space):
+        '''
+        Get a function that checks whether a swap makes a perm in `perm_space`.
+
+        The function takes positions `i` and `j` and returns whether switching
+        our items at these positions makes a perm in `perm_space`. Swapping two
+        items of the same cycle splits it in two, lowering the degree by one,
+        and swapping items of different cycles merges them, raising it by one,
+        so we check degrees by labeling our cycles once instead of building
+        each neighbor.
+        '''
+        if perm_space is None or perm_space.is_sliced or \
+             perm_space.unsliced.undegreed.unfixed != self.nominal_perm_space:
+            if perm_space is None:
+                return lambda i, j: True
+            return lambda i, j: \
+                           self._get_swapped_perm_sequence(i, j) in perm_space
+
+        undapplied_fixed_map = perm_space._undapplied_fixed_map
+        if any(self._perm_sequence[i] != value for i, value in
+                                              undapplied_fixed_map.items()):
+            # We're not in the fixed space, so a swap might get us into it.
+            return lambda i, j: \
+                           self._get_swapped_perm_sequence(i, j) in perm_space
+
+        is_fixed = bytearray(self.length)
+        for i in undapplied_fixed_map:
+            is_fixed[i] = True
+
+        if not perm_space.is_degreed:
+            return lambda i, j: not (is_fixed[i] or is_fixed[j])
+
+        cycle_labels = [None] * self.length
+        cycles = _perm_algebra._get_cycles(
+                                  self.unrapplied.undapplied._perm_sequence)
+        for cycle_label, cycle in enumerate(cycles):
+            for item in cycle:
+                cycle_labels[item] = cycle_label
+        degree = self.length - len(cycles)
+        degrees = perm_space.degrees
+        is_splitting_allowed = (degree - 1) in degrees
+        is_merging_allowed = (degree + 1) in degrees
+
+        def is_swap_allowed(i, j):
+            if is_fixed[i] or is_fixed[j]:
+                return False
+            if cycle_labels[i] == cycle_labels[j]:
+                return is_splitting_allowed
+            else:
+                return is_merging_allowed
+
+        return is_swap_allowed
+
+
     def __lt__(self, other):
         if isinstance(other, Perm) and \
                            self.nominal_perm_space == other.nominal_perm_space:
@@ -441,6 +641,11 @@ class Perm(sequence_tools.CuteSequenceMixin, collections.abc.Sequence,
         else:
             return NotImplemented
 
+    _is_plain_sequence = property(
+        lambda self: not isinstance(self, UnrecurrentedMixin),
+        doc='''Whether iterating on this perm gives its `_perm_sequence`.'''
+    )
+
     __reversed__ = lambda self: type(self)(reversed(self._perm_sequence),
                                            self.nominal_perm_space)
 
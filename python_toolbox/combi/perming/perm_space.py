@@ -4,10 +4,12 @@
 import collections
 import abc
 import functools
+import itertools
 import types
 import math
 import numbers
 import inspect
+import bisect
 
 from python_toolbox import caching
 from python_toolbox import math_tools
@@ -24,8 +26,11 @@ from .variations import UnallowedVariationSelectionException
 from ._variation_removing_mixin import _VariationRemovingMixin
 from ._variation_adding_mixin import _VariationAddingMixin
 from ._fixed_map_managing_mixin import _FixedMapManagingMixin
-
-infinity = float('inf')
+from ._iterating_mixin import _IteratingMixin
+from ._degreed_indexing_mixin import _DegreedIndexingMixin
+from ._sampling_mixin import _SamplingMixin
+from ._cayley_graph_mixin import _CayleyGraphMixin
+from ._ranking import _get_perm_rank, _get_multiset_perm_rank
 
 
 class PermSpaceType(abc.ABCMeta):
@@ -58,7 +63,9 @@ class PermSpaceType(abc.ABCMeta):
 
 
 class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
-                _FixedMapManagingMixin, sequence_tools.CuteSequenceMixin,
+                _FixedMapManagingMixin, _IteratingMixin,
+                _DegreedIndexingMixin, _SamplingMixin, _CayleyGraphMixin,
+                sequence_tools.CuteSequenceMixin,
                 collections.abc.Sequence, metaclass=PermSpaceType):
     '''
     A space of permutations on a sequence.
@@ -407,21 +414,15 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         if self.is_degreed:
             assert not self.is_recurrent and not self.is_partial and \
                                                         not self.is_combination
-            return sum(
-                math_tools.abs_stirling(
-                    self.sequence_length - len(self.fixed_map),
-                    self.sequence_length - degree -
-                                    self._n_cycles_in_fixed_items_of_just_fixed
-                ) for degree in self.degrees
-            )
+            return self._degreed_n_completions_table[
+                self.sequence_length - len(self.fixed_map)
+            ][self._n_cycles_in_fixed_items_of_just_fixed]
         elif self.is_fixed:
             assert not self.is_degreed and not self.is_combination
             if self.is_recurrent:
                 return calculate_length_of_recurrent_perm_space(
                     self.n_elements - len(self.fixed_map),
-                    nifty_collections.FrozenBagBag(
-                        nifty_collections.Bag(self.free_values).values()
-                    )
+                    nifty_collections.Bag(self.free_values).values()
                 )
             else:
                 return math_tools.factorial(
@@ -571,61 +572,7 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             # If that wasn't an example of asserting one's dominance, I don't
             # know what is.
 
-            available_values = list(self.free_values)
-            wip_perm_sequence_dict = dict(self.fixed_map)
-            wip_n_cycles_in_fixed_items = \
-                                    self._n_cycles_in_fixed_items_of_just_fixed
-            wip_i = i
-            for j in self.sequence:
-                if j in wip_perm_sequence_dict:
-                    continue
-                for unused_value in available_values:
-                    candidate_perm_sequence_dict = dict(wip_perm_sequence_dict)
-                    candidate_perm_sequence_dict[j] = unused_value
-
-                    ### Checking whether we closed a cycle: ###################
-                    #                                                         #
-                    if j == unused_value:
-                        closed_cycle = True
-                    else:
-                        current = j
-                        while True:
-                            current = candidate_perm_sequence_dict[current]
-                            if current == j:
-                                closed_cycle = True
-                                break
-                            elif current not in candidate_perm_sequence_dict:
-                                closed_cycle = False
-                                break
-                    #                                                         #
-                    ### Finished checking whether we closed a cycle. ##########
-
-                    candidate_n_cycles_in_fixed_items = \
-                                     wip_n_cycles_in_fixed_items + closed_cycle
-
-                    candidate_fixed_perm_space_length = sum(
-                        math_tools.abs_stirling(
-                            self.sequence_length -
-                                             len(candidate_perm_sequence_dict),
-                            self.sequence_length - degree -
-                                              candidate_n_cycles_in_fixed_items
-                        ) for degree in self.degrees
-                    )
-
-
-                    if wip_i < candidate_fixed_perm_space_length:
-                        available_values.remove(unused_value)
-                        wip_perm_sequence_dict[j] = unused_value
-                        wip_n_cycles_in_fixed_items = \
-                                              candidate_n_cycles_in_fixed_items
-
-                        break
-                    wip_i -= candidate_fixed_perm_space_length
-                else:
-                    raise RuntimeError
-            assert wip_i == 0
-            return self.perm_type((wip_perm_sequence_dict[k] for k in
-                                   self.domain), self)
+            return self.perm_type(self._get_degreed_perm_sequence(i), self)
 
         #######################################################################
         elif self.is_recurrent:
@@ -646,26 +593,29 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
                     nifty_collections.OrderedBag(available_values) -
                     reserved_values if item not in shit_set
                 ]
+                free_value_counts = \
+                             self._get_free_value_counts(available_values,
+                                                         reserved_values,
+                                                         shit_set)
+                n_free_positions = (self.n_elements - j - 1 -
+                                    sum(reserved_values.values()))
                 for unused_value in unused_values:
-                    wip_perm_sequence_dict[j] = unused_value
-
-                    candidate_sub_perm_space = \
-                                             PermSpace._create_with_cut_prefix(
-                        self.sequence,
-                        n_elements=self.n_elements,
-                        fixed_map=wip_perm_sequence_dict,
-                        is_combination=self.is_combination,
-                        shit_set=shit_set, perm_type=self.perm_type
+                    free_value_counts[unused_value] -= 1
+                    candidate_sub_perm_space_length = \
+                                    self._get_length_of_recurrent_sub_space(
+                        n_free_positions, free_value_counts
                     )
+                    free_value_counts[unused_value] += 1
 
-                    if wip_i < candidate_sub_perm_space.length:
+                    if wip_i < candidate_sub_perm_space_length:
+                        wip_perm_sequence_dict[j] = unused_value
                         available_values.remove(unused_value)
                         break
                     else:
-                        wip_i -= candidate_sub_perm_space.length
+                        wip_i -= candidate_sub_perm_space_length
                         if self.is_combination:
-                            shit_set.add(wip_perm_sequence_dict[j])
-                        del wip_perm_sequence_dict[j]
+                            shit_set.add(unused_value)
+                            del free_value_counts[unused_value]
                 else:
                     raise RuntimeError
             assert wip_i == 0
@@ -689,20 +639,7 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
 
         #######################################################################
         elif self.is_combination:
-            wip_number = self.length - 1 - i
-            wip_perm_sequence = []
-            for i in range(self.n_elements, 0, -1):
-                for j in range(self.sequence_length, i - 2, -1):
-                    candidate = math_tools.binomial(j, i)
-                    if candidate <= wip_number:
-                        wip_perm_sequence.append(
-                            self.sequence[-(j+1)]
-                        )
-                        wip_number -= candidate
-                        break
-                else:
-                    raise RuntimeError
-            result = tuple(wip_perm_sequence)
+            result = self._get_combination_sequence(i)
             assert len(result) == self.n_elements
             return self.perm_type(result, self)
 
@@ -723,6 +660,164 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
             return self.perm_type(result, self)
 
 
+    def get_many(self, indices):
+        '''
+        Get the perm sequences at many indices at once, as a tuple of tuples.
+
+        `indices` may be either an iterable of index numbers or a slice. This
+        is much faster than doing `perm_space[i]` for each index, both because
+        no `Perm` object is created for each perm, and because work like
+        calculating factorials and binomial coefficients is shared between all
+        the indices.
+
+        Example:
+
+            >>> perm_space = PermSpace(3)
+            >>> perm_space.get_many((0, 5, 2))
+            ((0, 1, 2), (2, 1, 0), (1, 0, 2))
+            >>> perm_space.get_many(slice(2, 4))
+            ((1, 0, 2), (1, 2, 0))
+
+        '''
+        if isinstance(indices, (slice, sequence_tools.CanonicalSlice)):
+            sliced_perm_space = self[indices]
+            if not sliced_perm_space:
+                return ()
+            return tuple(
+                itertools.islice(
+                    sliced_perm_space._iterate_perm_sequences(
+                        sliced_perm_space.canonical_slice.start
+                    ),
+                    sliced_perm_space.length
+                )
+            )
+
+        unsliced_indices = []
+        for i in indices:
+            assert isinstance(i, numbers.Integral)
+            if i <= -1:
+                i += self.length
+            if not (0 <= i < self.length):
+                raise IndexError
+            unsliced_indices.append(i + self.canonical_slice.start)
+        return self.unsliced._get_many_from_unsliced(unsliced_indices)
+
+
+    def _get_many_from_unsliced(self, indices):
+        '''
+        Get the perm sequences at `indices`, assuming space isn't sliced.
+
+        The indices must already be normalized, i.e. non-negative and in range.
+        '''
+        assert not self.is_sliced
+        if self.is_dapplied:
+            return self.undapplied._get_many_from_unsliced(indices)
+
+        elif self.is_degreed or self.is_recurrent:
+            return tuple(tuple(self[i]._perm_sequence) for i in indices)
+
+        elif self.is_fixed:
+            undapplied_fixed_map = self._undapplied_fixed_map
+            template = [undapplied_fixed_map.get(i) for i in self.indices]
+            free_positions = [i for i in self.indices
+                              if i not in undapplied_fixed_map]
+            free_values_perm_sequences = \
+                        self._free_values_unsliced_perm_space. \
+                                              _get_many_from_unsliced(indices)
+            perm_sequences = []
+            for free_values_perm_sequence in free_values_perm_sequences:
+                wip_perm_sequence = list(template)
+                for position, value in zip(free_positions,
+                                           free_values_perm_sequence):
+                    wip_perm_sequence[position] = value
+                perm_sequences.append(tuple(wip_perm_sequence))
+            return tuple(perm_sequences)
+
+        elif self.is_combination:
+            return tuple(map(self._get_combination_sequence, indices))
+
+        else:
+            # Same algorithm as the factoradic branch of `__getitem__`, except
+            # we calculate the place values once for all indices. (For partial
+            # spaces these are falling factorials rather than factorials.)
+            sequence = tuple(self.sequence)
+            place_values = [1] * self.n_elements
+            for m in range(self.n_elements - 2, -1, -1):
+                place_values[m] = \
+                           place_values[m + 1] * (self.sequence_length - m - 1)
+            perm_sequences = []
+            for i in indices:
+                unused_items = list(sequence)
+                wip_perm_sequence = []
+                for place_value in place_values:
+                    digit, i = divmod(i, place_value)
+                    wip_perm_sequence.append(unused_items.pop(digit))
+                perm_sequences.append(tuple(wip_perm_sequence))
+            return tuple(perm_sequences)
+
+
+    @caching.CachedProperty
+    def _binomial_columns(self):
+        '''
+        Pascal's triangle up to our sequence length, as a list of columns.
+
+        `self._binomial_columns[m][j]` is `binomial(j, m)`, for `m` up to
+        `n_elements`. Each column is non-decreasing, so it can be
+        binary-searched. Used for combination spaces.
+        '''
+        columns = [[1] * (self.sequence_length + 1)]
+        for _ in range(self.n_elements):
+            previous_column = columns[-1]
+            column = [0]
+            for j in range(self.sequence_length):
+                # Pascal's rule: binomial(j + 1, m) == binomial(j, m) +
+                # binomial(j, m - 1)
+                column.append(column[j] + previous_column[j])
+            columns.append(column)
+        return columns
+
+
+    _sequence_tuple = caching.CachedProperty(
+        lambda self: tuple(self.sequence),
+        '''Our sequence as a tuple, which is quicker to index than a range.'''
+    )
+
+    _sequence_set = caching.CachedProperty(
+        lambda self: frozenset(self._sequence_tuple)
+    )
+
+    @caching.CachedProperty
+    def _value_positions(self):
+        '''Mapping from each value in our sequence to its positions in it.'''
+        value_positions = {}
+        for i, value in enumerate(self._sequence_tuple):
+            value_positions.setdefault(value, []).append(i)
+        return {value: tuple(positions) for value, positions in
+                value_positions.items()}
+
+
+    def _get_combination_sequence(self, i):
+        '''
+        Get the combination sequence at index `i`, assuming space is unsliced.
+
+        We find `i`'s combinadic, i.e. the strictly decreasing `j`s for which
+        `length - 1 - i` is the sum of `binomial(j, m)` for `m` from
+        `n_elements` down to 1. Each `j` is found by binary-searching a column
+        of Pascal's triangle, below the previous `j`.
+        '''
+        binomial_columns = self._binomial_columns
+        sequence = self._sequence_tuple
+        wip_number = self.length - 1 - i
+        wip_perm_sequence = []
+        j = self.sequence_length + 1
+        for m in range(self.n_elements, 0, -1):
+            column = binomial_columns[m]
+            j = bisect.bisect_right(column, wip_number, m - 1, j) - 1
+            wip_perm_sequence.append(sequence[-(j + 1)])
+            wip_number -= column[j]
+        return tuple(wip_perm_sequence)
+
+
     enumerated_sequence = caching.CachedProperty(
         lambda self: tuple(enumerate(self.sequence))
     )
@@ -732,8 +827,6 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         '''In partial perm spaces, number of elements that aren't used.'''
     )
 
-    __iter__ = lambda self: (self[i] for i in
-                                         sequence_tools.CuteRange(self.length))
     _reduced = property(
         lambda self: (
             type(self), self.sequence, self.domain,
@@ -759,7 +852,7 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
 
         perm_set = set(perm) if not isinstance(perm, UnrecurrentedPerm) \
                                                   else set(perm._perm_sequence)
-        if not (perm_set <= set(self.sequence)):
+        if not (perm_set <= self._sequence_set):
             raise ValueError
 
         if sequence_tools.get_length(perm) != self.n_elements:
@@ -784,71 +877,56 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         #######################################################################
         elif self.is_degreed:
             if perm.is_rapplied: return self.unrapplied.index(perm.unrapplied)
-            wip_perm_number = 0
-            wip_perm_sequence_dict = dict(self.fixed_map)
-            unused_values = list(self.free_values)
-            for i, value in enumerate(perm._perm_sequence):
-                if i in self.fixed_indices:
-                    continue
-                unused_values.remove(value)
-                lower_values = [j for j in unused_values if j < value]
-                for lower_value in lower_values:
-                    temp_fixed_map = dict(wip_perm_sequence_dict)
-                    temp_fixed_map[i] = lower_value
-                    wip_perm_number += PermSpace(
-                        self.sequence_length, degrees=self.degrees,
-                        fixed_map=temp_fixed_map
-                    ).length
+            perm_number = \
+                       self._index_degreed_perm_sequence(perm._perm_sequence)
 
-                wip_perm_sequence_dict[self.domain[i]] = value
-
-            perm_number = wip_perm_number
+        #######################################################################
+        elif self.is_recurrent and not self.is_fixed and \
+                              not self.is_combination and not self.is_partial:
+            assert not self.is_degreed and not self.is_dapplied
+            perm_number = _get_multiset_perm_rank(perm._perm_sequence,
+                                                  self._value_positions,
+                                                  self.sequence_length)
 
         #######################################################################
         elif self.is_recurrent:
             assert not self.is_degreed and not self.is_dapplied
 
             wip_perm_number = 0
-            unused_values = list(self.sequence)
-            reserved_values = list(self.fixed_map.values())
-            perm_sequence_list = list(perm._perm_sequence)
+            available_values = list(self.sequence)
+            reserved_values = collections.Counter(self.fixed_map.values())
             shit_set = set()
             for i, value in enumerate(perm._perm_sequence):
                 if i in self.fixed_map:
                     if self.fixed_map[i] == value:
-                        unused_values.remove(value)
-                        reserved_values.remove(value)
+                        available_values.remove(value)
+                        reserved_values[value] -= 1
                         continue
                     else:
                         raise ValueError
-                lower_values = [
-                    thing for thing in
-                    nifty_collections.OrderedSet(unused_values) if
-                    (thing not in reserved_values or unused_values.count(thing)
-                     > reserved_values.count(thing)) and
-                    unused_values.index(thing) < unused_values.index(value) and
-                                                          thing not in shit_set
+                free_value_counts = \
+                             self._get_free_value_counts(available_values,
+                                                         reserved_values,
+                                                         shit_set)
+                n_free_positions = (self.n_elements - i - 1 -
+                                    sum(reserved_values.values()))
+                unused_values = [
+                    item for item in dict.fromkeys(available_values)
+                    if free_value_counts[item] >= 1
                 ]
-                unused_values.remove(value)
+                if value not in unused_values:
+                    raise ValueError
+                lower_values = unused_values[:unused_values.index(value)]
+                available_values.remove(value)
                 for lower_value in lower_values:
-                    temp_fixed_map = dict(
-                            enumerate(perm_sequence_list[:i] + [lower_value])
+                    free_value_counts[lower_value] -= 1
+                    wip_perm_number += self._get_length_of_recurrent_sub_space(
+                        n_free_positions, free_value_counts
                     )
-                    temp_fixed_map.update(self.fixed_map)
-
-                    candidate_sub_perm_space = \
-                                             PermSpace._create_with_cut_prefix(
-                        self.sequence,
-                        n_elements=self.n_elements,
-                        fixed_map=temp_fixed_map,
-                        is_combination=self.is_combination,
-                        shit_set=shit_set, perm_type=self.perm_type
-                    )
-
-                    wip_perm_number += candidate_sub_perm_space.length
+                    free_value_counts[lower_value] += 1
                     if self.is_combination:
                         shit_set.add(lower_value)
-
+                        del free_value_counts[lower_value]
 
             perm_number = wip_perm_number
 
@@ -887,24 +965,25 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
                 self.sequence_length - 1 -
                                      item for item in perm._perm_sequence[::-1]
             )
+            binomial_columns = self._binomial_columns
             perm_number = self.unsliced.length - 1 - sum(
-                (math_tools.binomial(item, i) for i, item in
+                (binomial_columns[i][item] for i, item in
                                   enumerate(processed_perm_sequence, start=1)),
                 0
             )
 
         #######################################################################
         else:
-            factoradic_number = []
-            unused_values = list(self.sequence)
-            for i, value in enumerate(perm._perm_sequence):
-                index_of_current_number = unused_values.index(value)
-                factoradic_number.append(index_of_current_number)
-                unused_values.remove(value)
-            perm_number = math_tools.from_factoradic(
-                factoradic_number +
-                [0] * self.n_unused_elements
-            ) // math.factorial(self.n_unused_elements)
+            # In a non-recurrent space, each value has a single position.
+            value_positions = self._value_positions
+            try:
+                perm_number = _get_perm_rank(
+                    (value_positions[value][0] for value in
+                     perm._perm_sequence),
+                    self.sequence_length
+                )
+            except KeyError:
+                raise ValueError
 
 
         #######################################################################
@@ -952,58 +1031,41 @@ class PermSpace(_VariationRemovingMixin, _VariationAddingMixin,
         '''Coerce `perm` to be a permutation of this space.'''
         return self.perm_type(perm, self)
 
-    prefix = None
-
-    @classmethod
-    def _create_with_cut_prefix(cls, sequence, domain=None, *,
-        n_elements=None, fixed_map=None, degrees=None, is_combination=False,
-        slice_=None, perm_type=None, shit_set=frozenset()):
+    @staticmethod
+    def _get_free_value_counts(available_values, reserved_values, shit_set):
         '''
-        Create a `PermSpace`, cutting a prefix off the start if possible.
+        Count the items that the free positions of a recurrent space can use.
 
-        This is used internally in `PermSpace.__getitem__` and
-        `PermSpace.index`. It's important to cut off the prefix, especially for
-        `CombSpace` because in such cases it obviates the need for a
-        `fixed_map`, and `CombSpace` doesn't work with `fixed_map`.
+        `available_values` are the items not used yet, `reserved_values` is a
+        bag of the items reserved for fixed positions, and `shit_set` has the
+        items that a combination space may no longer use.
         '''
-        if degrees is not None:
-            raise NotImplementedError
-
-        prefix = []
-        fixed_map = dict(fixed_map)
-        for i in sequence_tools.CuteRange(infinity):
-            try:
-                prefix.append(fixed_map[i])
-            except KeyError:
-                break
-            else:
-                del fixed_map[i]
-                n_elements -= 1
-
-
-        sequence = list(sequence)
-        for item in prefix:
-            if is_combination:
-                sequence = sequence[sequence.index(item) + 1:]
-            else:
-                sequence[sequence.index(item)] = misc.MISSING_ELEMENT
-                # More efficient than removing the element, we filter these out
-                # later.
-
-        shit_set = {misc.MISSING_ELEMENT} | shit_set
-        sequence = [item for item in sequence if item not in shit_set]
+        free_value_counts = collections.Counter(available_values)
+        free_value_counts.subtract(reserved_values)
+        for item in shit_set:
+            del free_value_counts[item]
+        return free_value_counts
 
-        fixed_map = {key - len(prefix): value
-                                           for key, value in fixed_map.items()}
-
-        perm_space = cls(
-            sequence, n_elements=n_elements, fixed_map=fixed_map,
-            is_combination=is_combination, slice_=slice_,
-            perm_type=perm_type
-        )
-        perm_space.prefix = tuple(prefix)
-        return perm_space
 
+    def _get_length_of_recurrent_sub_space(self, n_elements, value_counts):
+        '''
+        Get the length of a sub-space of this recurrent space, without making
+        the sub-space.
+
+        The sub-space is what's left of this space after choosing the items at
+        some of the positions. `n_elements` is the number of free positions
+        left to fill, and `value_counts` maps each item that can still be used
+        to the number of its copies that are left. We go straight to the cached
+        `calculate_length_of_recurrent_*` functions instead of creating a
+        `PermSpace` for every candidate item.
+        '''
+        counts = [count for count in value_counts.values() if count >= 1]
+        if n_elements > sum(counts):
+            return 0
+        if self.is_combination:
+            return calculate_length_of_recurrent_comb_space(n_elements, counts)
+        else:
+            return calculate_length_of_recurrent_perm_space(n_elements, counts)
 
 
 
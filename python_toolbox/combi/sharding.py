@@ -0,0 +1,180 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''
+Tools for enumerating combinatorial spaces in parallel over a process pool.
+
+See documentation of `map_sharded` for more details.
+'''
+
+import os
+import numbers
+import itertools
+
+from python_toolbox import future_tools
+from python_toolbox import sequence_tools
+
+from .chain_space import ChainSpace
+from .product_space import ProductSpace
+from .perming import PermSpace
+
+
+def get_shard_ranges(space, n_shards):
+    '''
+    Divide the indices of `space` into `n_shards` contiguous ranges.
+
+    The ranges are as equal in length as possible, and together they cover the
+    entire space in order. Shards may be empty if `n_shards` is bigger than the
+    length of the space.
+
+    Example:
+
+        >>> get_shard_ranges(PermSpace(3), 4)
+        [range(0, 2), range(2, 4), range(4, 5), range(5, 6)]
+
+    '''
+    assert isinstance(n_shards, numbers.Integral)
+    if n_shards < 1:
+        raise ValueError('`n_shards` must be at least 1.')
+    # Not using `sequence_tools.divide_to_slices` on a `range`, because `len`
+    # fails on ranges longer than `sys.maxsize`, and sharding is most useful
+    # for huge spaces.
+    base_shard_length, remainder = divmod(sequence_tools.get_length(space),
+                                          n_shards)
+    shard_ranges = []
+    start = 0
+    for i in range(n_shards):
+        stop = start + base_shard_length + (remainder > i)
+        shard_ranges.append(range(start, stop))
+        start = stop
+    return shard_ranges
+
+
+def iterate_shard(space, start, stop):
+    '''
+    Iterate over the items of `space` with indices in `range(start, stop)`.
+
+    Rather than fetching each item by its index number, this finds the first
+    item and walks from it to the following ones, which is much faster for the
+    spaces in `combi`. Other sequences are iterated by index number.
+    '''
+    if start >= stop:
+        return iter(())
+
+    if isinstance(space, PermSpace):
+        return iter(space[start:stop])
+
+    elif isinstance(space, ProductSpace):
+        return _iterate_product_space_shard(space, start, stop)
+
+    elif isinstance(space, ChainSpace):
+        return _iterate_chain_space_shard(space, start, stop)
+
+    else:
+        return map(space.__getitem__, range(start, stop))
+
+
+def _iterate_product_space_shard(product_space, start, stop):
+    '''Iterate over a range of a `ProductSpace` like an odometer.'''
+    sequences = product_space.sequences
+    sequence_lengths = product_space.sequence_lengths
+    wip_i = start
+    reverse_indices = []
+    for sequence_length in reversed(sequence_lengths):
+        wip_i, current_index = divmod(wip_i, sequence_length)
+        reverse_indices.append(current_index)
+    indices = list(reversed(reverse_indices))
+    wip_item = [sequence[index] for sequence, index in zip(sequences, indices)]
+    last_position = len(sequences) - 1
+
+    for _ in range(stop - start):
+        yield tuple(wip_item)
+        ### Advancing the odometer: ###########################################
+        #                                                                     #
+        position = last_position
+        while position >= 0:
+            indices[position] += 1
+            if indices[position] < sequence_lengths[position]:
+                wip_item[position] = sequences[position][indices[position]]
+                break
+            indices[position] = 0
+            wip_item[position] = sequences[position][0]
+            position -= 1
+        #                                                                     #
+        ### Finished advancing the odometer. ##################################
+
+
+def _iterate_chain_space_shard(chain_space, start, stop):
+    '''Iterate over a range of a `ChainSpace` one sequence at a time.'''
+    n_remaining_items = stop - start
+    for sequence, accumulated_length in zip(chain_space.sequences,
+                                            chain_space.accumulated_lengths):
+        sequence_length = sequence_tools.get_length(sequence)
+        if start >= accumulated_length + sequence_length:
+            continue
+        offset = max(start - accumulated_length, 0)
+        n_items = min(sequence_length - offset, n_remaining_items)
+        yield from iterate_shard(sequence, offset, offset + n_items)
+        n_remaining_items -= n_items
+        if not n_remaining_items:
+            return
+
+
+def _map_shard(function, space, start, stop):
+    '''Apply `function` to every item in a shard. Runs in the worker.'''
+    return [function(item) for item in iterate_shard(space, start, stop)]
+
+
+def map_sharded(function, space, n_shards=None, *, executor=None,
+                as_completed=False, timeout=None):
+    '''
+    Map `function` over `space` in parallel, by sharding it over processes.
+
+    `space` may be a `PermSpace`, `CombSpace`, `ProductSpace`, `ChainSpace` or
+    any other sequence. It's divided into `n_shards` contiguous index ranges
+    (by default 4 for every CPU,) and each shard is sent to a worker process,
+    which iterates over its items incrementally and applies `function` to each
+    one of them. Since `function` and `space` are pickled to be sent to the
+    workers, `function` must be defined at module level.
+
+    Returns an iterator over the results. If `as_completed=False`, results are
+    in the same order as the items of `space`. If `as_completed=True`, the
+    results of each shard come as soon as the shard is done, though results
+    inside a shard are still in order.
+
+    You may pass in your own `executor`, which would be left running when
+    we're done; otherwise a `future_tools.CuteProcessPoolExecutor` is created
+    and shut down once the results are exhausted.
+
+    Example:
+
+        >>> tuple(map_sharded(str, ChainSpace(('ab', range(2)))))
+        ('a', 'b', '0', '1')
+
+    '''
+    if n_shards is None:
+        n_shards = 4 * (os.cpu_count() or 1)
+    shard_ranges = [shard_range for shard_range in
+                    get_shard_ranges(space, n_shards) if shard_range]
+
+    def iterate_results(executor):
+        # Calling `BaseCuteExecutor.map` explicitly, because
+        # `ProcessPoolExecutor.map` shadows it and doesn't take the
+        # `as_completed` argument. It works with any executor.
+        shard_results = future_tools.BaseCuteExecutor.map(
+            executor, _map_shard, itertools.repeat(function),
+            itertools.repeat(space),
+            [shard_range.start for shard_range in shard_ranges],
+            [shard_range.stop for shard_range in shard_ranges],
+            timeout=timeout, as_completed=as_completed
+        )
+        return itertools.chain.from_iterable(shard_results)
+
+    if executor is not None:
+        return iterate_results(executor)
+
+    def iterate_results_and_shut_down():
+        with future_tools.CuteProcessPoolExecutor() as executor:
+            yield from iterate_results(executor)
+
+    return iterate_results_and_shut_down()
@@ -45,8 +45,9 @@ class BaseCuteExecutor(concurrent.futures.Executor):
             return future
 
         futures = tuple(map(make_future, iterable))
-        futures_iterator = concurrent.futures.as_completed(futures) if \
-                                                      as_completed else futures
+        futures_iterator = concurrent.futures.as_completed(
+            futures, timeout=timeout
+        ) if as_completed else futures
 
         # Yield must be hidden in closure so that the futures are submitted
         # before the first iterator value is required.
@@ -77,8 +78,9 @@ class BaseCuteExecutor(concurrent.futures.Executor):
             end_time = timeout + time.time()
 
         futures = [self.submit(function, *args) for args in zip(*iterables)]
-        futures_iterator = concurrent.futures.as_completed(futures) if \
-                                                      as_completed else futures
+        futures_iterator = concurrent.futures.as_completed(
+            futures, timeout=timeout
+        ) if as_completed else futures
 
         # Yield must be hidden in closure so that the futures are submitted
         # before the first iterator value is required.
@@ -262,9 +262,19 @@ def ensure_iterable_is_sequence(iterable, default_type=tuple,
 
 class CuteSequenceMixin(misc_tools.AlternativeLengthMixin):
     '''A sequence mixin that adds extra functionality.'''
-    def take_random(self):
-        '''Take a random item from the sequence.'''
-        return self[random.randint(0, get_length(self) - 1)]
+    __slots__ = ()
+
+    def take_random(self, random_generator=None):
+        '''
+        Take a random item from the sequence.
+
+        You may pass a `random.Random` instance as `random_generator` for
+        reproducible results.
+        '''
+        if random_generator is None:
+            random_generator = random
+        return self[random_generator.randrange(get_length(self))]
+
     def __contains__(self, item):
         try: self.index(item)
         except ValueError: return False
@@ -2,9 +2,9 @@
 # This program is distributed under the MIT license.
 
 '''
-Defines the `SleekCallArgs` class.
+Defines the `SleekCallArgs` and `CallArgsBinder` classes.
 
-See its documentation for more details.
+See their documentation for more details.
 '''
 
 import inspect
@@ -15,7 +15,91 @@ from .sleek_ref import SleekRef
 from .cute_sleek_value_dict import CuteSleekValueDict
 
 
-__all__ = ['SleekCallArgs']
+__all__ = ['SleekCallArgs', 'CallArgsBinder']
+
+
+_value_types = {int, float, complex, bool, str, bytes, type(None)}
+'''Types that can't be weakreffed, are hashable and hold no other objects.'''
+
+
+def _is_value(thing):
+    '''
+    Is `thing` a value that's hashable and can't hold weakreffable objects?
+
+    These are the immutable builtin types and tuples of them. Sleekreffing
+    them would just hold them strongly. (Frozensets are weakreffable, so
+    they're not values.)
+    '''
+    thing_type = type(thing)
+    if thing_type in _value_types:
+        return True
+    elif thing_type is tuple:
+        return all(map(_is_value, thing))
+    else:
+        return False
+
+
+class CallArgsBinder:
+    '''
+    Binds call args for a function, analyzing its signature only once.
+
+    `inspect.getcallargs` analyzes the function's signature on every call,
+    which is slow when done millions of times. A `CallArgsBinder` analyzes the
+    signature once when it's created. After that it binds simple calls by
+    itself: calls with only positional arguments to a function that has no
+    keyword-only arguments. Only the other calls go through
+    `inspect.getcallargs`.
+
+    Calling it returns a tuple `(call_args, star_args, star_kwargs)`.
+    `call_args` is a `dict` mapping each named argument to its value,
+    `star_args` is a tuple of extraneous positional arguments and
+    `star_kwargs` is a `dict` of extraneous keyword arguments.
+    '''
+    def __init__(self, function):
+        self.function = function
+        '''The function whose call args we bind.'''
+
+        args_spec = inspect.getfullargspec(function)
+        self.star_args_name = args_spec.varargs
+        self.star_kwargs_name = args_spec.varkw
+        self.arg_names = tuple(args_spec.args)
+        self.n_args = len(self.arg_names)
+
+        defaults = args_spec.defaults or ()
+        self.n_required_args = self.n_args - len(defaults)
+        self.default_items = tuple(
+            zip(self.arg_names[self.n_required_args:], defaults)
+        )
+
+        self.is_argumentless = not (self.arg_names or self.star_args_name or
+                                    self.star_kwargs_name or
+                                    args_spec.kwonlyargs)
+        '''Whether the function takes no arguments at all.'''
+
+        # Bound methods get their `self` argument from `inspect.getcallargs`,
+        # so we don't bind them ourselves.
+        self.can_bind_positional_calls = not (args_spec.kwonlyargs or
+                                              inspect.ismethod(function))
+        '''Whether we can bind calls with only positional arguments.'''
+
+
+    def __call__(self, *args, **kwargs):
+        if not kwargs and self.can_bind_positional_calls and \
+                            self.n_required_args <= len(args) and \
+                            (self.star_args_name or len(args) <= self.n_args):
+            call_args = dict(zip(self.arg_names, args))
+            for arg_name, default in \
+                    self.default_items[len(args) - self.n_required_args:]:
+                call_args[arg_name] = default
+            return (call_args, args[self.n_args:], {})
+
+        call_args = inspect.getcallargs(self.function, *args, **kwargs)
+        star_args = call_args.pop(self.star_args_name) if \
+                                                  self.star_args_name else ()
+        star_kwargs = call_args.pop(self.star_kwargs_name) if \
+                                                  self.star_kwargs_name else {}
+        return (call_args, star_args, star_kwargs)
+
 
 
 class SleekCallArgs:
@@ -32,6 +116,11 @@ class SleekCallArgs:
 
     All the argument values are sleekreffed to avoid memory leaks. (See
     documentation of `python_toolbox.sleek_reffing.SleekRef` for more details.)
+
+    If all the argument values are numbers, strings, `None`, or tuples of
+    these, they can't be weakreffed anyway, so we skip the
+    sleekrefs and keep the values themselves, which is much faster to create
+    and to compare.
     '''
     # What if we one of the args gets gc'ed before this SCA gets added to the
     # dictionary? It will render this SCA invalid, but we'll still be in the
@@ -43,7 +132,9 @@ class SleekCallArgs:
 
         `containing_dict` is the `dict` we'll try to remove ourselves from when
         one of our sleekrefs dies. `function` is the function for which we
-        calculate call args from `*args` and `**kwargs`.
+        calculate call args from `*args` and `**kwargs`. You may pass in a
+        `CallArgsBinder` of the function instead of the function itself, to
+        save analyzing its signature again.
         '''
 
         self.containing_dict = containing_dict
@@ -51,55 +142,80 @@ class SleekCallArgs:
         `dict` we'll try to remove ourselves from when 1 of our sleekrefs dies.
         '''
 
-        args_spec = inspect.getfullargspec(function)
-        star_args_name, star_kwargs_name = args_spec.varargs, args_spec.varkw
-
-        call_args = inspect.getcallargs(function, *args, **kwargs)
+        if not isinstance(function, CallArgsBinder):
+            function = CallArgsBinder(function)
+        call_args, star_args, star_kwargs = function(*args, **kwargs)
         del args, kwargs
 
+        star_args = tuple(star_args)
+
+        if all(map(_is_value, call_args.values())) and \
+                                         all(map(_is_value, star_args)) and \
+                                 all(map(_is_value, star_kwargs.values())):
+            self._values = (call_args, star_args, star_kwargs)
+            '''The call args themselves, if they're all values, or `None`.'''
+            # This is what `cheat_hash` would give for these values, so we'd
+            # have the same hash as an equal `SleekCallArgs` that uses
+            # sleekrefs; we just skip `cheat_hash`'s dispatching.
+            self._hash = hash((
+                hash(frozenset([(name, hash(value)) for name, value in
+                                call_args.items()])),
+                hash(star_args),
+                hash(frozenset([(name, hash(value)) for name, value in
+                                star_kwargs.items()])),
+            ))
+            return
+
+        self._values = None
+
+        # In the future the `.args`, `.star_args` and `.star_kwargs` attributes
+        # may change, so we must record the hash now. (We hash the values we
+        # were given rather than dereference the sleekrefs we'll make.)
+        self._hash = cheat_hashing.cheat_hash(
+            (
+                call_args,
+                star_args,
+                star_kwargs
+            )
+        )
+
         self.star_args_refs = []
         '''Sleekrefs to star-args.'''
 
-        if star_args_name:
-            star_args = call_args.pop(star_args_name, None)
-            if star_args:
-                self.star_args_refs = [SleekRef(star_arg, self.destroy) for
-                                       star_arg in star_args]
+        if star_args:
+            self.star_args_refs = [SleekRef(star_arg, self.destroy) for
+                                   star_arg in star_args]
 
         self.star_kwargs_refs = {}
         '''Sleerefs to star-kwargs.'''
-        if star_kwargs_name:
-            star_kwargs = call_args.pop(star_kwargs_name, {})
-            if star_kwargs:
-                self.star_kwargs_refs = CuteSleekValueDict(self.destroy,
-                                                           star_kwargs)
+        if star_kwargs:
+            self.star_kwargs_refs = CuteSleekValueDict(self.destroy,
+                                                       star_kwargs)
 
         self.args_refs = CuteSleekValueDict(self.destroy, call_args)
         '''Mapping from argument name to value, sleek-style.'''
 
-        # In the future the `.args`, `.star_args` and `.star_kwargs` attributes
-        # may change, so we must record the hash now:
-        self._hash = cheat_hashing.cheat_hash(
-            (
-                self.args,
-                self.star_args,
-                self.star_kwargs
-            )
-        )
-
-
 
-    args = property(lambda self: dict(self.args_refs))
-    '''The arguments.'''
+    @property
+    def args(self):
+        '''The arguments.'''
+        if self._values is not None:
+            return dict(self._values[0])
+        return dict(self.args_refs)
 
-    star_args = property(
-        lambda self:
-            tuple((star_arg_ref() for star_arg_ref in self.star_args_refs))
-    )
-    '''Extraneous arguments. (i.e. `*args`.)'''
+    @property
+    def star_args(self):
+        '''Extraneous arguments. (i.e. `*args`.)'''
+        if self._values is not None:
+            return self._values[1]
+        return tuple((star_arg_ref() for star_arg_ref in self.star_args_refs))
 
-    star_kwargs = property(lambda self: dict(self.star_kwargs_refs))
-    '''Extraneous keyword arguments. (i.e. `*kwargs`.)'''
+    @property
+    def star_kwargs(self):
+        '''Extraneous keyword arguments. (i.e. `*kwargs`.)'''
+        if self._values is not None:
+            return dict(self._values[2])
+        return dict(self.star_kwargs_refs)
 
 
     def destroy(self, _=None):
@@ -118,6 +234,8 @@ class SleekCallArgs:
     def __eq__(self, other):
         if not isinstance(other, SleekCallArgs):
             return NotImplemented
+        if self._values is not None and other._values is not None:
+            return self._values == other._values
         return self.args == other.args and \
                self.star_args == other.star_args and \
                self.star_kwargs == other.star_kwargs
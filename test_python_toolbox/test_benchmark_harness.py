@@ -0,0 +1,79 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''Testing module for `benchmark_python_toolbox.harness`.'''
+
+import io
+import json
+import contextlib
+
+from python_toolbox import temp_file_tools
+from python_toolbox import temp_value_setting
+
+from benchmark_python_toolbox import harness
+
+
+baseline = {
+    'fast thing': {'ops_per_second': 1000.0, 'peak_memory': 100},
+    'slow thing': {'ops_per_second': 10.0, 'peak_memory': 100},
+    'old thing': {'ops_per_second': 10.0, 'peak_memory': 100},
+}
+
+
+def test_compare_to_baseline():
+    '''Test finding the benchmarks that got slower than the baseline.'''
+    results = {
+        'fast thing': {'ops_per_second': 900.0, 'peak_memory': 100},
+        'slow thing': {'ops_per_second': 12.0, 'peak_memory': 100},
+        'new thing': {'ops_per_second': 1.0, 'peak_memory': 100},
+    }
+    assert harness.compare_to_baseline(results, baseline) == []
+
+    results['fast thing']['ops_per_second'] = 500.0
+    assert harness.compare_to_baseline(results, baseline) == \
+                                                        [('fast thing', 0.5)]
+    assert harness.compare_to_baseline(results, baseline,
+                                       tolerance=0.6) == []
+    assert harness.compare_to_baseline(results, baseline, tolerance=0) == \
+                                                        [('fast thing', 0.5)]
+
+
+def _run_main(results, baseline_path, save_path=None):
+    '''Run `main` on a baseline file, with `results` as the timings.'''
+    def _mock_run_benchmarks(benchmarks, min_time, n_repeats):
+        return results
+    arguments = ['--baseline', str(baseline_path)]
+    if save_path is not None:
+        arguments += ['--save', str(save_path)]
+    output = io.StringIO()
+    with temp_value_setting.TempValueSetter(
+                         (harness, 'run_benchmarks'), _mock_run_benchmarks), \
+         contextlib.redirect_stdout(output):
+        exit_code = harness.main(arguments)
+    return exit_code, output.getvalue()
+
+
+def test_main():
+    '''Test that `main` fails when a benchmark regressed.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        baseline_path = temp_folder / 'baseline.json'
+        with baseline_path.open('w') as file:
+            json.dump(baseline, file)
+
+        results = {
+            'fast thing': {'ops_per_second': 1100.0, 'peak_memory': 100},
+            'slow thing': {'ops_per_second': 9.0, 'peak_memory': 100},
+        }
+        save_path = temp_folder / 'results.json'
+        exit_code, output = _run_main(results, baseline_path, save_path)
+        assert exit_code == 0
+        assert 'No regressions' in output
+        with save_path.open() as file:
+            assert json.load(file) == results
+
+        results['slow thing']['ops_per_second'] = 5.0
+        exit_code, output = _run_main(results, baseline_path)
+        assert exit_code == 1
+        assert 'Regression: slow thing is at 50% of its baseline speed.' in \
+                                                                        output
+        assert 'fast thing' not in output
@@ -0,0 +1,131 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''Testing module for caching coroutine functions with `caching.cache`.'''
+
+import asyncio
+import inspect
+import datetime as datetime_module
+
+from python_toolbox import caching
+from python_toolbox.caching import cache
+from python_toolbox import temp_value_setting
+from python_toolbox import cute_testing
+
+
+def test_basic():
+    '''Test that the awaited result is cached.'''
+    calls = []
+
+    @cache()
+    async def f(a, b=2):
+        calls.append((a, b))
+        await asyncio.sleep(0)
+        return a + b
+
+    assert inspect.iscoroutinefunction(f)
+
+    async def main():
+        assert await f(1) == await f(1, 2) == await f(b=2, a=1) == 3
+        assert await f(2) == 4
+    asyncio.run(main())
+    assert calls == [(1, 2), (2, 2)]
+    assert f.cache_statistics.n_misses == 2
+    assert f.cache_statistics.n_hits == 2
+
+    # Cached results are available to other event loops too:
+    assert asyncio.run(f(1)) == 3
+    assert calls == [(1, 2), (2, 2)]
+
+
+def test_coalescing():
+    '''Test that concurrent awaits of the same call compute it only once.'''
+    calls = []
+
+    @cache()
+    async def f(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x * 2
+
+    async def main():
+        return await asyncio.gather(*(f(x) for x in (1, 2, 1, 1, 2)))
+
+    assert asyncio.run(main()) == [2, 4, 2, 2, 4]
+    assert sorted(calls) == [1, 2]
+    assert f.cache_statistics.n_misses == 2
+    assert f.cache_statistics.n_hits == 3
+
+
+def test_exception():
+    '''Test that an exception reaches all the awaits and isn't cached.'''
+    calls = []
+
+    @cache()
+    async def f(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise ZeroDivisionError
+        return x
+
+    async def main():
+        return await asyncio.gather(f(7), f(7), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert len(results) == 2
+    assert all(isinstance(result, ZeroDivisionError) for result in results)
+    assert calls == [7]
+
+    assert asyncio.run(f(7)) == 7
+    assert calls == [7, 7]
+
+
+def test_cancellation():
+    '''Test that cancelling one await doesn't cancel the others.'''
+    calls = []
+
+    @cache()
+    async def f(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return x
+
+    async def main():
+        first = asyncio.ensure_future(f(3))
+        second = asyncio.ensure_future(f(3))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 3
+        with cute_testing.RaiseAssertor(asyncio.CancelledError):
+            await first
+
+    asyncio.run(main())
+    assert calls == [3]
+
+
+def test_max_size_and_time_to_keep():
+    '''Test that `max_size` and `time_to_keep` apply to coroutine functions.'''
+    calls = []
+
+    @cache(max_size=2, time_to_keep={'days': 10})
+    async def f(x):
+        calls.append(x)
+        return len(calls)
+
+    fixed_time = datetime_module.datetime.now()
+    def _mock_now():
+        return fixed_time
+
+    async def get_results(xs):
+        return [await f(x) for x in xs]
+
+    with temp_value_setting.TempValueSetter(
+                                  (caching.decorators, '_get_now'), _mock_now):
+        assert asyncio.run(get_results('ab')) == [1, 2]
+        assert asyncio.run(get_results('abc')) == [1, 2, 3] # Throwing out `a`.
+        assert asyncio.run(get_results('a')) == [4]
+        assert f.cache_statistics.n_evictions == 2
+        fixed_time += datetime_module.timedelta(days=11)
+        assert asyncio.run(get_results('ca')) == [5, 6]
+        assert f.cache_statistics.n_expirations >= 1
@@ -6,6 +6,8 @@
 
 import datetime as datetime_module
 import re
+import threading
+import time
 import weakref
 
 from python_toolbox import caching
@@ -230,3 +232,175 @@ def test_time_to_keep():
         fixed_time += datetime_module.timedelta(days=1000)
         assert list(map(f, 'abcdef')) == [13, 14, 15, 16, 17, 18]
         assert f(a='d', b='meow') == 19
+
+
+def test_thread_safe():
+    '''Test that a thread-safe cache computes each value only once.'''
+    calls = []
+    calls_lock = threading.Lock()
+
+    @cache(thread_safe=True)
+    def f(x):
+        with calls_lock:
+            calls.append(x)
+        time.sleep(0.05)
+        return x * 2
+
+    results = []
+    def call_f(x):
+        results.append(f(x))
+
+    threads = [threading.Thread(target=call_f, args=(i % 3,))
+               for i in range(30)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(calls) == [0, 1, 2]
+    assert sorted(results) == [0] * 10 + [2] * 10 + [4] * 10
+    assert f(1) == 2
+    assert len(calls) == 3
+    f.cache_clear()
+    assert f(1) == 2
+    assert len(calls) == 4
+
+
+def test_thread_safe_lru():
+    '''Test a thread-safe LRU cache under contention.'''
+    f = cache(max_size=5, thread_safe=True, n_lock_stripes=3)(
+        lambda x: x ** 2
+    )
+    errors = []
+    def hammer_f(seed):
+        try:
+            for i in range(2000):
+                assert f((i * seed) % 11) == ((i * seed) % 11) ** 2
+        except Exception as exception:
+            errors.append(exception)
+
+    threads = [threading.Thread(target=hammer_f, args=(seed,))
+               for seed in range(1, 9)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_thread_safe_exception():
+    '''Test that waiting threads get the exception of the computing thread.'''
+    calls = []
+    event = threading.Event()
+
+    @cache(thread_safe=True)
+    def f(x):
+        calls.append(x)
+        event.wait()
+        raise ZeroDivisionError
+
+    exceptions = []
+    def call_f():
+        try:
+            f(1)
+        except ZeroDivisionError as exception:
+            exceptions.append(exception)
+
+    threads = [threading.Thread(target=call_f) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    event.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(exceptions) == 5
+    assert calls == [1]
+
+    # Exceptions aren't cached:
+    with cute_testing.RaiseAssertor(ZeroDivisionError):
+        f(1)
+    assert calls == [1, 1]
+
+
+def test_thread_safe_store_exception():
+    '''Test that an exception while storing the value doesn't hang waiters.'''
+    calls = []
+    event = threading.Event()
+
+    def sizeof(value):
+        raise ZeroDivisionError
+
+    @cache(max_size=10, sizeof=sizeof, thread_safe=True)
+    def f(x):
+        calls.append(x)
+        event.wait()
+        return x
+
+    exceptions = []
+    def call_f():
+        try:
+            f(1)
+        except ZeroDivisionError as exception:
+            exceptions.append(exception)
+
+    threads = [threading.Thread(target=call_f) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    event.set()
+    for thread in threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+
+    assert len(exceptions) == 5
+    assert calls == [1]
+
+    # The call isn't left in flight, so the next call computes again:
+    with cute_testing.RaiseAssertor(ZeroDivisionError):
+        f(1)
+    assert calls == [1, 1]
+
+
+def test_argumentless():
+    '''Test caching a function that takes no arguments.'''
+    f = cache()(lambda: counting_func())
+    result = f()
+    assert f() == f() == result
+    with cute_testing.RaiseAssertor(TypeError):
+        f(1)
+    with cute_testing.RaiseAssertor(TypeError):
+        f(a=1)
+    f.cache_clear()
+    assert f() != result
+
+
+def test_max_size_and_time_to_keep():
+    '''Test a cache with both `max_size` and `time_to_keep`.'''
+    counting_func.i = 0
+    f = cache(max_size=3, time_to_keep={'days': 10})(counting_func)
+
+    fixed_time = datetime_module.datetime.now()
+    def _mock_now():
+        return fixed_time
+
+    with temp_value_setting.TempValueSetter(
+                                  (caching.decorators, '_get_now'), _mock_now):
+        assert list(map(f, 'abc')) == [0, 1, 2]
+        fixed_time += datetime_module.timedelta(days=5)
+        assert f('a') == 0 # Now `b` is the least-recently-used.
+        assert f('d') == 3 # And now `b` has been thrown out.
+        assert list(map(f, 'acd')) == [0, 2, 3]
+        assert f('b') == 4 # Throwing out `a`.
+        assert list(map(f, 'cdb')) == [2, 3, 4]
+        fixed_time += datetime_module.timedelta(days=6)
+        # `c` expired, even though it was used recently:
+        assert list(map(f, 'cdb')) == [5, 3, 4]
+        fixed_time += datetime_module.timedelta(days=5)
+        assert list(map(f, 'cdb')) == [5, 6, 7]
+
+        for i in range(1000):
+            f(i)
+        assert list(map(f, (997, 998, 999))) == [1005, 1006, 1007]
+        fixed_time += datetime_module.timedelta(days=11)
+        assert list(map(f, (997, 998, 999))) == [1008, 1009, 1010]
@@ -0,0 +1,83 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''Testing module for statistics of `python_toolbox.caching.cache`.'''
+
+import io
+import time
+import datetime as datetime_module
+
+from python_toolbox import caching
+from python_toolbox import temp_value_setting
+from python_toolbox.caching import cache
+
+
+def test_counting():
+    '''Test counting of hits, misses, evictions and expirations.'''
+    f = cache(max_size=2)(lambda x: x)
+    statistics = f.cache_statistics
+    assert isinstance(statistics, caching.CacheStatistics)
+    assert statistics.n_hits == statistics.n_misses == statistics.size == 0
+
+    f(1), f(1), f(2), f(1), f(3)
+    assert statistics.n_hits == 2
+    assert statistics.n_misses == 3
+    assert statistics.n_evictions == 1
+    assert statistics.size == 2
+    assert statistics.hit_rate == 2 / 5
+    assert statistics.key_building_time == statistics.computing_time == 0
+
+    statistics.reset()
+    assert statistics.n_hits == statistics.n_misses == \
+                                                  statistics.n_evictions == 0
+    assert statistics.size == 2
+
+    fixed_time = datetime_module.datetime.now()
+    def _mock_now():
+        return fixed_time
+    with temp_value_setting.TempValueSetter(
+                                  (caching.decorators, '_get_now'), _mock_now):
+        g = cache(time_to_keep={'seconds': 10})(lambda x: x)
+        g(1), g(2)
+        fixed_time += datetime_module.timedelta(seconds=11)
+        g(1)
+        assert g.cache_statistics.n_expirations == 2
+        assert g.cache_statistics.n_misses == 3
+        assert g.cache_statistics.size == 1
+
+
+def test_timing():
+    '''Test measuring time spent building keys and computing values.'''
+    def slow_function(x):
+        time.sleep(0.01)
+        return x
+
+    f = cache(timing_sample_interval=1)(slow_function)
+    for i in range(5):
+        f(i)
+        f(i)
+    statistics = f.cache_statistics
+    assert 0.04 <= statistics.computing_time < 1
+    assert 0 < statistics.key_building_time < statistics.computing_time
+
+    g = cache(timing_sample_interval=5)(slow_function)
+    for i in range(10):
+        g(i)
+    # Only 2 calls were timed, but the estimate covers all of them:
+    assert 0.08 <= g.cache_statistics.computing_time < 2
+
+
+def test_registry():
+    '''Test getting and dumping the statistics of all cached functions.'''
+    def registered_function(x):
+        return x
+    f = cache()(registered_function)
+    f(1)
+    f(1)
+    all_statistics = caching.get_all_cache_statistics()
+    assert f.cache_statistics in all_statistics
+    assert f.cache_statistics.to_dict()['n_hits'] == 1
+
+    string_io = io.StringIO()
+    caching.dump_cache_statistics(string_io)
+    assert 'registered_function' in string_io.getvalue()
@@ -3,10 +3,17 @@
 
 '''Testing module for `python_toolbox.caching.CachedProperty`.'''
 
+import threading
+import time
+
 from python_toolbox import context_management
+from python_toolbox import cute_testing
 from python_toolbox import misc_tools
 
-from python_toolbox.caching import cache, CachedType, CachedProperty
+from python_toolbox.caching import (cache, CachedType, CachedProperty,
+                                    ThreadSafeCachedProperty,
+                                    SlotCachedProperty,
+                                    ThreadSafeSlotCachedProperty)
 from python_toolbox.context_management import (as_idempotent, as_reentrant,
                                                BlankContextManager)
 
@@ -205,3 +212,84 @@ def test_force_value_not_getter():
 
     a = A()
     assert a.personality == counting_func == a.personality == counting_func
+
+
+def test_thread_safe():
+    '''Test that `ThreadSafeCachedProperty` is computed once per object.'''
+    calls = []
+
+    class A:
+        @ThreadSafeCachedProperty
+        def personality(self):
+            calls.append(self)
+            time.sleep(0.01)
+            return object()
+
+    a1, a2 = A(), A()
+    results = []
+    barrier = threading.Barrier(8)
+    def get_personalities():
+        barrier.wait()
+        results.append((a1.personality, a2.personality))
+    threads = [threading.Thread(target=get_personalities) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(map(id, calls)) == sorted(map(id, (a1, a2)))
+    assert set(results) == {(a1.personality, a2.personality)}
+    assert not A.personality._in_flight_futures
+
+
+def test_thread_safe_exception():
+    '''Test that `ThreadSafeCachedProperty` doesn't cache exceptions.'''
+    class A:
+        personality = ThreadSafeCachedProperty(lambda self: 1 / self.x)
+
+    a = A()
+    a.x = 0
+    with cute_testing.RaiseAssertor(ZeroDivisionError):
+        a.personality
+    a.x = 2
+    assert a.personality == a.personality == 0.5
+    assert not A.personality._in_flight_futures
+
+
+def test_thread_safe_recursion():
+    '''Test a `ThreadSafeCachedProperty` whose getter accesses itself.'''
+    class A:
+        @ThreadSafeCachedProperty
+        def personality(self):
+            return self.personality
+
+    class B:
+        __slots__ = ('_cached_personality',)
+        @ThreadSafeSlotCachedProperty
+        def personality(self):
+            return self.personality
+
+    for thing in (A(), B()):
+        # This used to wait for its own computation forever:
+        with cute_testing.RaiseAssertor(RecursionError):
+            thing.personality
+        assert not type(thing).personality._in_flight_futures
+
+
+def test_slots():
+    '''Test `SlotCachedProperty` on a class with `__slots__`.'''
+    class A:
+        __slots__ = ('_cached_personality', 'meow_slot')
+        personality = SlotCachedProperty(counting_func)
+        meow = ThreadSafeSlotCachedProperty(counting_func,
+                                            slot_name='meow_slot')
+
+    assert isinstance(A.personality, SlotCachedProperty)
+
+    a1 = A()
+    assert not hasattr(a1, '__dict__')
+    assert a1.personality == a1.personality == a1._cached_personality
+    assert a1.meow == a1.meow == a1.meow_slot == a1.personality + 1
+
+    a2 = A()
+    assert a2.personality == a2.personality == a1.personality + 2
@@ -3,6 +3,12 @@
 
 '''Testing module for `python_toolbox.caching.CachedType`.'''
 
+import datetime as datetime_module
+import threading
+import time
+
+from python_toolbox import caching
+from python_toolbox import temp_value_setting
 from python_toolbox.caching import CachedType
 
 
@@ -20,4 +26,100 @@ def test_keyword_only_separator_and_annotations():
         def __init__(self, a: int, b: float, *, c: 'lol' = 7) -> None:
             pass
 
-    assert B(1, 2) is B(b=2, a=1, c=7) is not B(b=2, a=1, c=8)
\ No newline at end of file
+    assert B(1, 2) is B(b=2, a=1, c=7) is not B(b=2, a=1, c=8)
+
+
+def test_star_args_init():
+    '''Test classes whose `__init__` doesn't have a `self` parameter.'''
+    class D(metaclass=CachedType):
+        def __init__(*args):
+            args[0].args = args[1:]
+
+    assert D(1).args == (1,)
+    assert D(1) is D(1) is not D(1, 2)
+    assert D() is D()
+
+    def undecorated_wrapper(function):
+        def inner(*args, **kwargs):
+            return function(*args, **kwargs)
+        return inner
+
+    class E(metaclass=CachedType):
+        @undecorated_wrapper
+        def __init__(self, a, b=2):
+            self.a = a
+            self.b = b
+
+    assert E(1).b == 2
+    assert E(1) is E(1) is not E(1, 2)
+    assert E(1, b=3) is E(1, b=3)
+
+def test_max_instances():
+    '''Test that `max_instances` bounds the number of instances kept.'''
+    class C(metaclass=CachedType, max_instances=2):
+        def __init__(self, x):
+            self.x = x
+
+    c1 = C(1)
+    assert C(1) is c1
+    c2 = C(2)
+    assert C(1) is c1 # Now `C(2)` is the least-recently-used.
+    C(3)
+    assert C(1) is c1
+    assert C(2) is not c2
+    assert C.instance_cache_statistics.n_evictions == 2
+    assert C.instance_cache_statistics.size == 2
+
+    class D(C):
+        pass
+
+    # Subclasses inherit the bounds, but keep their own instances:
+    assert D(1) is D(1) is not C(1)
+    D(2), D(3), D(4)
+    assert D.instance_cache_statistics.size == 2
+    assert C.instance_cache_statistics.size == 2
+
+
+def test_time_to_keep():
+    '''Test that instances are forgotten after `time_to_keep`.'''
+    class E(metaclass=CachedType, time_to_keep={'days': 1}):
+        def __init__(self, x):
+            pass
+
+    fixed_time = datetime_module.datetime.now()
+    def _mock_now():
+        return fixed_time
+
+    with temp_value_setting.TempValueSetter(
+                                  (caching.decorators, '_get_now'), _mock_now):
+        e = E('meow')
+        assert E('meow') is e
+        fixed_time += datetime_module.timedelta(days=2)
+        assert E('meow') is not e
+        assert E.instance_cache_statistics.n_expirations == 1
+
+
+def test_thread_safe():
+    '''Test that threads instantiating at the same time get one instance.'''
+    n_instantiations = []
+
+    class F(metaclass=CachedType, thread_safe=True, max_instances=100):
+        def __init__(self, x):
+            n_instantiations.append(x)
+            time.sleep(0.01)
+
+    instances = []
+    barrier = threading.Barrier(8)
+    def instantiate():
+        barrier.wait()
+        instances.append(F(7))
+    threads = [threading.Thread(target=instantiate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert n_instantiations == [7]
+    assert len(set(map(id, instances))) == 1
+    assert F.instance_cache_statistics.n_misses == 1
+    assert F.instance_cache_statistics.n_hits == 7
@@ -0,0 +1,126 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''Testing module for the eviction policies of `caching.cache`.'''
+
+import random
+
+from python_toolbox import caching
+from python_toolbox import misc_tools
+from python_toolbox.caching import (cache, LruPolicy, LfuPolicy,
+                                    TwoQueuePolicy, ArcPolicy)
+
+
+policies = (LruPolicy, LfuPolicy, TwoQueuePolicy, ArcPolicy)
+
+
+def test_random_operations():
+    '''Test that all policies stay within bounds under random operations.'''
+    random_ = random.Random(0)
+    for policy_type in policies:
+        for sizeof in (None, len):
+            policy = policy_type(max_size=20, sizeof=sizeof)
+            assert isinstance(policy, caching.EvictionPolicy)
+            shadow = {}
+            for _ in range(3000):
+                key = random_.randrange(60)
+                operation = random_.random()
+                if operation < 0.5:
+                    value = 'x' * random_.randrange(1, 6)
+                    policy[key] = value
+                    shadow[key] = value
+                elif operation < 0.9:
+                    if key in policy:
+                        assert policy[key] == shadow[key]
+                else:
+                    if key in policy:
+                        del policy[key]
+                assert policy.total_size <= 20
+                assert policy.total_size == sum(
+                    (1 if sizeof is None else sizeof(value))
+                    for value in policy.values()
+                )
+                for key_ in policy:
+                    assert policy.get(key_) == shadow[key_]
+            policy.clear()
+            assert len(policy) == policy.total_size == 0
+
+
+def test_lfu():
+    '''Test that `LfuPolicy` evicts the least-frequently-used entry.'''
+    f = cache(max_size=3, eviction_policy=LfuPolicy)(lambda x: object())
+
+    r0, r1, r2 = f(0), f(1), f(2)
+    assert f(0) is f(0) is f(0) is r0
+    assert f(1) is f(1) is r1
+    assert f(2) is r2
+    # Now `f(2)` is the least-frequently-used, even though it's the most
+    # recently-used.
+    r3 = f(3)
+    assert f(3) is f(3) is r3
+    assert f(0) is r0
+    assert f(1) is r1
+    assert f(2) is not r2
+
+
+def test_scan_resistance():
+    '''Test that 2Q and ARC keep hot entries through a scan.'''
+    for policy_type in (TwoQueuePolicy, ArcPolicy):
+        f = cache(max_size=20, eviction_policy=policy_type)(
+            lambda x: object()
+        )
+        hot_results = {}
+        for _ in range(3):
+            for i in range(10):
+                hot_results[i] = f(i)
+        for i in range(1000, 1200):
+            f(i) # The scan
+        assert all(f(i) is hot_results[i] for i in range(10))
+
+    # Whereas LRU would lose them:
+    f = cache(max_size=20)(lambda x: object())
+    hot_results = {i: f(i) for i in range(10)}
+    for i in range(1000, 1200):
+        f(i)
+    assert not any(f(i) is hot_results[i] for i in range(10))
+
+
+def test_sizeof():
+    '''Test bounding the cache by the total size of the results.'''
+
+    @misc_tools.set_attributes(n_calls=0)
+    def make_string(length):
+        make_string.n_calls += 1
+        return 'x' * length
+
+    f = cache(max_size=10, sizeof=len)(make_string)
+    f(4)
+    f(5)
+    assert make_string.n_calls == 2
+    f(4)
+    f(5)
+    assert make_string.n_calls == 2
+    f(3) # Now `f(4)` is thrown out, since 4 + 5 + 3 > 10.
+    assert make_string.n_calls == 3
+    f(5)
+    f(3)
+    assert make_string.n_calls == 3
+    f(4) # Throwing out `f(5)`.
+    assert make_string.n_calls == 4
+    f(11) # Too big to keep at all, so nothing is thrown out for it.
+    f(11)
+    assert make_string.n_calls == 6
+    f(3)
+    f(4)
+    assert make_string.n_calls == 6
+
+    g = cache(max_size=10, sizeof=len, time_to_keep={'days': 1})(make_string)
+    g(4)
+    g(5)
+    g(4)
+    assert make_string.n_calls == 8
+    g(3) # Throwing out `g(5)`.
+    g(4)
+    assert make_string.n_calls == 9
+    g(5)
+    assert make_string.n_calls == 10
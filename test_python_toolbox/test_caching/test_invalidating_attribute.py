@@ -0,0 +1,91 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''Testing module for `python_toolbox.caching.InvalidatingAttribute`.'''
+
+from python_toolbox import cute_testing
+
+from python_toolbox.caching import (CachedProperty, SlotCachedProperty,
+                                    InvalidatingAttribute)
+
+
+def test():
+    '''Test that setting an attribute invalidates exactly its dependents.'''
+    calls = []
+
+    def get_area(rectangle):
+        calls.append('area')
+        return rectangle.width * rectangle.height
+
+    def get_description(rectangle):
+        calls.append('description')
+        return 'Area %s' % rectangle.area
+
+    def get_color_name(rectangle):
+        calls.append('color_name')
+        return rectangle.color.title()
+
+    class Rectangle:
+        width = InvalidatingAttribute()
+        height = InvalidatingAttribute()
+        color = InvalidatingAttribute()
+
+        area = CachedProperty(get_area, depends_on=('width', 'height'))
+        description = CachedProperty(get_description, depends_on='area')
+        color_name = CachedProperty(get_color_name, depends_on=('color',))
+
+        def __init__(self, width, height, color):
+            self.width = width
+            self.height = height
+            self.color = color
+
+    assert isinstance(Rectangle.width, InvalidatingAttribute)
+
+    rectangle = Rectangle(2, 3, 'red')
+    other_rectangle = Rectangle(5, 5, 'blue')
+    assert rectangle.description == 'Area 6'
+    assert rectangle.color_name == 'Red'
+    assert other_rectangle.area == 25
+    assert calls == ['description', 'area', 'color_name', 'area']
+    assert rectangle.description == 'Area 6'
+    assert len(calls) == 4
+
+    rectangle.width = 4
+    assert rectangle.width == 4
+    assert rectangle.color_name == 'Red'
+    assert other_rectangle.area == 25
+    assert len(calls) == 4
+    assert rectangle.description == 'Area 12'
+    assert calls[4:] == ['description', 'area']
+
+    rectangle.color = 'green'
+    assert rectangle.description == 'Area 12'
+    assert rectangle.color_name == 'Green'
+    assert calls[6:] == ['color_name']
+
+    del rectangle.height
+    with cute_testing.RaiseAssertor(AttributeError):
+        rectangle.area
+    with cute_testing.RaiseAssertor(AttributeError):
+        del rectangle.height
+
+
+def test_subclass():
+    '''Test dependents that are defined in a subclass.'''
+    class A:
+        x = InvalidatingAttribute()
+        doubled = CachedProperty(lambda self: self.x * 2, depends_on='x')
+
+    class B(A):
+        quadrupled = SlotCachedProperty(lambda self: self.doubled * 2,
+                                        depends_on='doubled')
+
+    a = A()
+    a.x = 1
+    assert a.doubled == 2
+    b = B()
+    b.x = 1
+    assert b.quadrupled == 4
+    a.x = b.x = 10
+    assert a.doubled == 20
+    assert b.quadrupled == 40
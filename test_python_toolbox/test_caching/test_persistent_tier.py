@@ -0,0 +1,214 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+'''Testing module for the persistent tier of `python_toolbox.caching.cache`.'''
+
+import os
+import sys
+import datetime as datetime_module
+import subprocess
+
+from python_toolbox import caching
+from python_toolbox import cute_testing
+from python_toolbox import future_tools
+from python_toolbox import temp_file_tools
+from python_toolbox import temp_value_setting
+from python_toolbox.caching import cache
+from python_toolbox.sleek_reffing import SleekCallArgs
+from python_toolbox.caching.persistent_tier import get_stable_key
+
+
+def get_pid_and_square(x):
+    return (os.getpid(), x ** 2)
+
+
+def _compute_in_process(path, x):
+    return cache(persistent_path=path)(get_pid_and_square)(x)
+
+
+def test_survives_restart():
+    '''Test that results are kept in the file between cached functions.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'cache.sqlite'
+        calls = []
+        def f(x, y=2):
+            calls.append((x, y))
+            return {'x': x, 'y': y}
+
+        f_1 = cache(persistent_path=path, persistent_namespace='f')(f)
+        assert f_1(1) == {'x': 1, 'y': 2}
+        assert f_1(1, y=3) == {'x': 1, 'y': 3}
+        assert f_1([1, 2]) == {'x': [1, 2], 'y': 2}
+        assert len(calls) == 3
+
+        # Like restarting the process:
+        f_2 = cache(persistent_path=path, persistent_namespace='f')(f)
+        assert f_2(1) == f_2(1, 2) == {'x': 1, 'y': 2}
+        assert f_2([1, 2]) == {'x': [1, 2], 'y': 2}
+        assert len(calls) == 3
+        assert f_2.cache_statistics.n_persistent_hits == 2
+        assert f_2.cache_statistics.n_hits == 1
+
+        # Clearing a single key:
+        f_2.cache_clear(SleekCallArgs({}, f, 1))
+        f_3 = cache(persistent_path=path, persistent_namespace='f')(f)
+        f_3(1)
+        f_3(1, y=3)
+        assert len(calls) == 4
+
+        # Clearing everything:
+        f_3.cache_clear()
+        cache(persistent_path=path, persistent_namespace='f')(f)(1, y=3)
+        assert len(calls) == 5
+
+        # Other functions in the same file don't interfere:
+        def g(x, y=2):
+            return 'g'
+        assert cache(persistent_path=path,
+                     persistent_namespace='g')(g)(1) == 'g'
+
+
+def test_unpicklable():
+    '''Test that unpicklable arguments and results are cached in memory.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'cache.sqlite'
+        f = cache(persistent_path=path, persistent_namespace='f')(
+            lambda x: (lambda: x)
+        )
+        result = f(1)
+        assert f(1) is result
+        g = cache(persistent_path=path, persistent_namespace='g')(
+            lambda x: x
+        )
+        unpicklable = lambda: None
+        assert g(unpicklable) is g(unpicklable) is unpicklable
+
+
+def test_namespace():
+    '''Test that functions that may share a name need a namespace.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'cache.sqlite'
+        def make_scaler(factor):
+            def scale(x):
+                return x * factor
+            return scale
+
+        with cute_testing.RaiseAssertor(ValueError, 'persistent_namespace'):
+            cache(persistent_path=path)(make_scaler(2))
+        with cute_testing.RaiseAssertor(ValueError, 'persistent_namespace'):
+            cache(persistent_path=path)(lambda x: x)
+
+        double = cache(persistent_path=path,
+                       persistent_namespace='double')(make_scaler(2))
+        triple = cache(persistent_path=path,
+                       persistent_namespace='triple')(make_scaler(3))
+        assert double(5) == 10
+        assert triple(5) == 15
+        # The namespace is all that tells the functions apart:
+        assert cache(persistent_path=path,
+                     persistent_namespace='triple')(make_scaler(4))(5) == 15
+
+
+def test_time_to_keep():
+    '''Test that `time_to_keep` applies to the persistent tier.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'cache.sqlite'
+        calls = []
+        def f(x):
+            calls.append(x)
+            return x
+
+        fixed_time = datetime_module.datetime.now()
+        def _mock_now():
+            return fixed_time
+
+        with temp_value_setting.TempValueSetter(
+                                  (caching.decorators, '_get_now'), _mock_now):
+            cache(persistent_path=path, persistent_namespace='f',
+                  time_to_keep={'days': 1})(f)(1)
+            fixed_time += datetime_module.timedelta(hours=20)
+            g = cache(persistent_path=path, persistent_namespace='f',
+                  time_to_keep={'days': 1})(f)
+            g(1)
+            assert calls == [1]
+            # The entry expires in memory when it expires on disk:
+            fixed_time += datetime_module.timedelta(hours=5)
+            g(1)
+            assert calls == [1, 1]
+
+
+def test_time_to_keep_mixed_with_fresh_entries():
+    '''Test persisted entries that expire before fresher entries in memory.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'cache.sqlite'
+        calls = []
+        def f(x):
+            calls.append(x)
+            return x
+
+        fixed_time = datetime_module.datetime.now()
+        def _mock_now():
+            return fixed_time
+
+        with temp_value_setting.TempValueSetter(
+                                  (caching.decorators, '_get_now'), _mock_now):
+            cache(persistent_path=path, persistent_namespace='f',
+                  time_to_keep={'seconds': 10})(f)(1)
+            fixed_time += datetime_module.timedelta(seconds=8)
+            g = cache(persistent_path=path, persistent_namespace='f',
+                  time_to_keep={'seconds': 10})(f)
+            g(2) # Fresh, expires at 18 seconds.
+            fixed_time += datetime_module.timedelta(seconds=0.5)
+            g(1) # Loaded from the file, expires at 10 seconds.
+            g(3) # Fresh, expires at 18.5 seconds.
+            assert calls == [1, 2, 3]
+            assert g.cache_statistics.n_persistent_hits == 1
+
+            fixed_time += datetime_module.timedelta(seconds=5)
+            g(1)
+            assert calls == [1, 2, 3, 1]
+            assert g.cache_statistics.n_expirations == 1
+            g(2), g(3)
+            assert calls == [1, 2, 3, 1]
+
+            fixed_time += datetime_module.timedelta(seconds=5)
+            g(2), g(3)
+            assert calls == [1, 2, 3, 1, 2, 3]
+
+
+def test_shared_between_processes():
+    '''Test that sibling processes share results through the file.'''
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'cache.sqlite'
+        with future_tools.CuteProcessPoolExecutor(1) as executor:
+            child_pid, result = executor.submit(_compute_in_process, path,
+                                                7).result()
+        assert child_pid != os.getpid()
+        assert result == 49
+        assert cache(persistent_path=path)(get_pid_and_square)(7) == \
+                                                             (child_pid, 49)
+
+
+def test_stable_key():
+    '''Test that the stable key doesn't depend on the hash seed.'''
+    def f(*args, **kwargs): pass
+    code = (
+        'from python_toolbox.sleek_reffing import SleekCallArgs\n'
+        'from python_toolbox.caching.persistent_tier import get_stable_key\n'
+        'def f(*args, **kwargs): pass\n'
+        'a, b, c = {"a", "b", "c"}, {"x": frozenset("xyz")}, ["a", {"b"}]\n'
+        'print(get_stable_key(SleekCallArgs({}, f, a, b, meow=c)).hex())\n'
+    )
+    package_parent_folder = os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(caching.__file__)))
+    )
+    keys = set()
+    for hash_seed in ('1', '2', '3'):
+        environment = dict(os.environ, PYTHONHASHSEED=hash_seed,
+                           PYTHONPATH=package_parent_folder)
+        keys.add(subprocess.check_output(
+            [sys.executable, '-c', code], env=environment
+        ).decode().strip())
+    assert len(keys) == 1
+    a, b, c = {'a', 'b', 'c'}, {'x': frozenset('xyz')}, ['a', {'b'}]
+    assert keys == {get_stable_key(SleekCallArgs({}, f, a, b, meow=c)).hex()}
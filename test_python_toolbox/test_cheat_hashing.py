@@ -1,7 +1,7 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
-'''Testing module for `python_toolbox.abc_tools.AbstractStaticMethod`.'''
+'''Testing module for `python_toolbox.cheat_hashing.cheat_hash`.'''
 
 import copy
 
@@ -31,3 +31,69 @@ def test_cheat_hash():
     for thing, thing_copy in zip(things, things_copy):
         assert cheat_hash(thing) == cheat_hash(thing) == \
                cheat_hash(thing_copy) == cheat_hash(thing_copy)
+
+
+def test_equal_things():
+    '''Test that equal things have equal cheat-hashes.'''
+    assert cheat_hash({1: [2], 'a': {3}}) == cheat_hash({'a': {3}, 1: [2]})
+    assert cheat_hash({1.0: 'meow', True: [1]}) == \
+                                          cheat_hash({1: 'meow', True: [1]})
+    assert cheat_hash({1, 2, 3}) == cheat_hash(frozenset((3, 2, 1)))
+    assert cheat_hash([{1: 2}, [3]]) == cheat_hash([{1: 2}, [3]])
+    assert cheat_hash(([1], [2])) != cheat_hash(([2], [1]))
+
+
+def test_cycles():
+    '''Test `cheat_hash` on containers that contain themselves.'''
+    my_list = [1, 2]
+    my_list.append(my_list)
+    assert cheat_hash(my_list) == cheat_hash(my_list)
+
+    my_dict = {'a': [1]}
+    my_dict['b'] = [my_dict, my_list]
+    assert cheat_hash(my_dict) == cheat_hash(my_dict)
+
+
+def test_repeated_items():
+    '''Test that repeated items are cheat-hashed only once.'''
+    class CountingList(list):
+        n_iterations = 0
+        def __iter__(self):
+            CountingList.n_iterations += 1
+            return super().__iter__()
+
+    item = CountingList([[1], [2]])
+    thing = [item, {'x': item, 'y': (item, item)}]
+    thing_copy = copy.deepcopy(thing)
+    CountingList.n_iterations = 0
+    assert cheat_hash(thing) == cheat_hash(thing_copy)
+    assert CountingList.n_iterations == 2
+
+
+def test_dispatch_map():
+    '''Test registering one-argument functions in `dispatch_map`.'''
+    from python_toolbox.cheat_hashing.cheat_hash import dispatch_map
+
+    class Point:
+        __hash__ = None
+        def __init__(self, x, y):
+            self.x, self.y = x, y
+
+    class TaggedList(list):
+        pass
+
+    assert cheat_hash(Point(1, 2)) != cheat_hash(Point(1, 2))
+    assert cheat_hash(TaggedList([[1]])) == cheat_hash([[1]])
+
+    dispatch_map[Point] = lambda point: hash((point.x, point.y))
+    dispatch_map[TaggedList] = lambda tagged_list: 7
+    try:
+        assert cheat_hash(Point(1, 2)) == cheat_hash(Point(1, 2)) == \
+                                                               hash((1, 2))
+        assert cheat_hash([Point(1, 2)]) == cheat_hash([Point(1, 2)])
+        assert cheat_hash(TaggedList([[1]])) == 7
+        assert cheat_hash([[1]]) != 7
+    finally:
+        del dispatch_map[Point], dispatch_map[TaggedList]
+
+    assert cheat_hash(TaggedList([[1]])) == cheat_hash([[1]])
@@ -1,6 +1,10 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import math
+
+from python_toolbox import nifty_collections
+from python_toolbox import temp_file_tools
 from python_toolbox.combi.perming.calculating_length import *
 
 def test_recurrent_perm_space_length():
@@ -13,3 +17,49 @@ def test_recurrent_comb_space_length():
     assert calculate_length_of_recurrent_comb_space(3, (3, 1, 1)) == 4
     assert calculate_length_of_recurrent_comb_space(2, (3, 2, 2, 1)) == 9
     assert calculate_length_of_recurrent_comb_space(3, (3, 2, 2, 1)) == 14
+
+
+def test_frozen_bag_bag_argument():
+    fbb = nifty_collections.FrozenBagBag((3, 2, 2, 1))
+    assert calculate_length_of_recurrent_perm_space(3, fbb) == 52
+    assert calculate_length_of_recurrent_comb_space(3, fbb) == 14
+    assert calculate_length_of_recurrent_perm_space(3, (1, 2, 3, 2)) == 52
+
+
+def test_mapping_argument():
+    # A mapping is read as a `FrozenBagBag`, from number of recurrences to
+    # number of items, like in `FrozenBagBag((1, 1, 2))`:
+    assert calculate_length_of_recurrent_perm_space(3, {2: 1, 1: 2}) == 12
+    assert calculate_length_of_recurrent_perm_space(
+                              3, nifty_collections.Bag({2: 1, 1: 2})) == 12
+    assert calculate_length_of_recurrent_comb_space(2, {2: 1, 1: 2}) == 4
+
+
+def test_big_length():
+    assert calculate_length_of_recurrent_perm_space(400, (100,) * 4) == \
+                 math.factorial(400) // math.factorial(100) ** 4
+    assert calculate_length_of_recurrent_comb_space(200, (100,) * 4) == \
+                                            sum(
+        math.comb(4, j) * (-1) ** j * math.comb(200 - 101 * j + 3, 3)
+        for j in range(2)
+    )
+
+
+def test_persistent_length_cache():
+    with temp_file_tools.create_temp_folder() as temp_folder:
+        path = temp_folder / 'lengths.sqlite'
+        try:
+            use_persistent_length_cache(path)
+            assert calculate_length_of_recurrent_perm_space(
+                                                   5, (3, 2, 2, 1, 7)) == 1941
+            assert path.exists()
+            # Starting over with an empty memory cache, like a new process:
+            use_persistent_length_cache(path)
+            assert calculate_length_of_recurrent_perm_space(
+                                                   5, (3, 2, 2, 1, 7)) == 1941
+            from python_toolbox.combi.perming import calculating_length
+            assert calculating_length._cached_length_calculators. \
+                    calculate_length_of_recurrent_perm_space. \
+                                       cache_statistics.n_persistent_hits == 1
+        finally:
+            use_persistent_length_cache(None)
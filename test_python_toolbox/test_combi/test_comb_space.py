@@ -1,6 +1,8 @@
 # Copyright 2009-2017 Ram Rachum.
 # This program is distributed under the MIT license.
 
+import itertools
+
 from python_toolbox import sequence_tools
 from python_toolbox import math_tools
 from python_toolbox import cute_testing
@@ -80,3 +82,25 @@ def test_unrecurrented():
         assert unrecurrented_comb_space.index(comb) == i
 
 
+
+
+def test_ranking():
+    '''Test `CombSpace` indexing against `itertools.combinations`.'''
+    for sequence, n_elements in (('abcdefg', 3), (range(9), 4), ('xyz', 3),
+                                 ('abcde', 1), ('abcd', 0)):
+        comb_space = CombSpace(sequence, n_elements)
+        combinations = tuple(itertools.combinations(sequence, n_elements))
+        assert comb_space.length == len(combinations)
+        assert tuple(map(tuple, comb_space)) == \
+               tuple(map(tuple, map(comb_space.__getitem__,
+                                    range(comb_space.length)))) == \
+               comb_space.get_many(range(comb_space.length)) == combinations
+        for i, combination in enumerate(combinations):
+            assert comb_space.index(combination) == i
+
+    big_comb_space = CombSpace(40, 20)
+    assert big_comb_space.length == math_tools.binomial(40, 20)
+    assert tuple(big_comb_space[0]) == tuple(range(20))
+    assert tuple(big_comb_space[-1]) == tuple(range(20, 40))
+    for i in (1, 12345, 10 ** 9, big_comb_space.length - 2):
+        assert big_comb_space.index(big_comb_space[i]) == i
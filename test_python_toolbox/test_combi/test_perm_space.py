@@ -3,8 +3,11 @@
 
 import pickle
 import itertools
+import random
+import collections
 import functools
 import math
+import tracemalloc
 
 from python_toolbox import cute_testing
 from python_toolbox import math_tools
@@ -414,6 +417,38 @@ def test_degreed_perm_space():
 
 
 
+def test_degreed_indexing():
+    def get_degree(perm_sequence):
+        unvisited_items = set(perm_sequence)
+        n_cycles = 0
+        while unvisited_items:
+            current_item = unvisited_items.pop()
+            n_cycles += 1
+            while perm_sequence[current_item] in unvisited_items:
+                current_item = perm_sequence[current_item]
+                unvisited_items.remove(current_item)
+        return len(perm_sequence) - n_cycles
+
+    for degrees, fixed_map in (((0, 2, 4, 5), {}), ((1,), {}),
+                               ((2, 3), {0: 1, 4: 3,}), ((3,), {2: 2,}),
+                               ((1, 4), {0: 0, 1: 2,})):
+        perm_space = PermSpace(6, degrees=degrees, fixed_map=fixed_map)
+        brute_perm_sequences = [
+            perm_sequence for perm_sequence in itertools.permutations(range(6))
+            if get_degree(perm_sequence) in degrees and all(
+                perm_sequence[key] == value for key, value in fixed_map.items()
+            )
+        ]
+        assert perm_space.length == len(brute_perm_sequences)
+        for i, perm_sequence in enumerate(brute_perm_sequences):
+            assert tuple(perm_space[i]) == perm_sequence
+            assert perm_space.index(perm_sequence) == i
+
+    big_perm_space = PermSpace(15, degrees=(3, 7))
+    for i in range(0, big_perm_space.length, big_perm_space.length // 20):
+        assert big_perm_space.index(big_perm_space[i]) == i
+
+
 def test_partial_perm_space():
     empty_partial_perm_space = PermSpace(5, n_elements=6)
     assert empty_partial_perm_space.length == 0
@@ -532,6 +567,76 @@ def test_neighbors():
                                         len(perm.get_neighbors(degrees=(0, 1)))
 
 
+def test_neighbor_swaps():
+    perm = PermSpace(4)[10]
+    swaps = tuple(perm.iterate_neighbor_swaps())
+    assert len(swaps) == 6
+    assert tuple(perm._get_swapped_perm_sequence(i, j) for i, j in swaps) == \
+                    tuple(tuple(neighbor) for neighbor in perm.get_neighbors())
+
+    perm_spaces = (
+        PermSpace(5), PermSpace('abcde'), PermSpace(5, domain='vwxyz'),
+        PermSpace(5, fixed_map={1: 3}), PermSpace(5, degrees=(1, 3)),
+        PermSpace(5, domain='vwxyz', fixed_map={'w': 3}, degrees=(1, 2)),
+        PermSpace(5)[10:80],
+    )
+    for perm_space in perm_spaces:
+        for perm in itertools.islice(perm_space, 0, None, 7):
+            neighbors = tuple(
+                tuple(perm) for perm in PermSpace(perm._perm_sequence,
+                                                  degrees=1)
+                if tuple(perm) in perm_space
+            )
+            assert tuple(
+                perm._get_swapped_perm_sequence(i, j) for i, j in
+                perm.iterate_neighbor_swaps(perm_space=perm_space)
+            ) == neighbors
+            assert tuple(map(tuple, perm.get_neighbors(
+                                         perm_space=perm_space))) == neighbors
+
+    with cute_testing.RaiseAssertor(NotImplementedError):
+        next(PermSpace('aab')[0].iterate_neighbor_swaps())
+
+
+def test_cayley_graph():
+    perm_space = PermSpace(5)
+    perms = tuple(perm_space.iterate_breadth_first())
+    assert len(perms) == len(set(perms)) == perm_space.length
+    assert perms[0] == perm_space[0]
+    assert [perm.degree for perm in perms] == \
+                                        sorted(perm.degree for perm in perms)
+
+    fixed_perm_space = PermSpace(5, fixed_map={0: 0})
+    assert set(fixed_perm_space.iterate_breadth_first(fixed_perm_space[7])) \
+                                                      == set(fixed_perm_space)
+
+    # Neighbors always differ in degree by one, so a space with degrees 1 and 2
+    # is connected, but in a space with degrees 1 and 3 no perm has neighbors:
+    degreed_perm_space = PermSpace(5, degrees=(1, 2))
+    assert set(degreed_perm_space.iterate_breadth_first(
+                  degreed_perm_space[0])) == set(degreed_perm_space)
+    assert tuple(PermSpace(5, degrees=(1, 3)).iterate_breadth_first()) == \
+                                             (PermSpace(5, degrees=(1, 3))[0],)
+
+    random_walk = perm_space.iterate_random_walk(
+        random_generator=random.Random(0)
+    )
+    walked_perms = tuple(itertools.islice(random_walk, 100))
+    assert walked_perms[0] == perm_space[0]
+    for perm, next_perm in cute_iter_tools.iterate_overlapping_subsequences(
+                                                                walked_perms):
+        assert next_perm in perm.get_neighbors()
+
+    walked_perms = tuple(itertools.islice(
+        degreed_perm_space.iterate_random_walk(), 100
+    ))
+    assert all(perm in degreed_perm_space for perm in walked_perms)
+    lonely_random_walk = PermSpace(5, degrees=3).iterate_random_walk()
+    assert next(lonely_random_walk) == PermSpace(5, degrees=3)[0]
+    with cute_testing.RaiseAssertor(ValueError, 'no neighbors'):
+        next(lonely_random_walk)
+
+
 def test_recurrent():
     recurrent_perm_space = PermSpace('abbccddd', n_elements=3)
     assert recurrent_perm_space.is_recurrent
@@ -603,6 +708,222 @@ def test_recurrent():
     assert PermSpace(4).unrecurrented == PermSpace(4)
 
 
+def test_iteration_matches_indexing():
+    perm_spaces = (
+        PermSpace(5),
+        PermSpace(5, n_elements=3),
+        PermSpace('abcde', n_elements=3),
+        PermSpace(6, domain='qwerty', n_elements=4),
+        PermSpace('abracab'),
+        PermSpace('abracab', n_elements=4),
+        PermSpace('abracab', fixed_map={0: 'b', 3: 'c',}),
+        PermSpace((1, 2, 3, 4, 5, 5, 4, 3), n_elements=3, fixed_map={0: 2,}),
+        PermSpace(6, fixed_map={0: 1, 4: 3,}),
+        PermSpace(6, n_elements=4, fixed_map={0: 1,}),
+        PermSpace(6, domain='qwerty', fixed_map={'q': 3,}),
+        PermSpace(6, degrees=(0, 2, 4, 5)),
+        PermSpace(6, degrees=(2, 3), fixed_map={0: 1, 4: 3,}),
+        PermSpace([1, 4, 2, 5, 3, 7], degrees=(1, 3)),
+        CombSpace(7, 3),
+        CombSpace('abracab', 3),
+        CombSpace('abracab', 5),
+    )
+    for perm_space in perm_spaces:
+        length = perm_space.length
+        for sliced_perm_space in (perm_space, perm_space[2:-2],
+                                  perm_space[length // 2:length // 2 + 7],
+                                  perm_space[-3:]):
+            assert list(sliced_perm_space) == [
+                sliced_perm_space[i] for i in range(sliced_perm_space.length)
+            ]
+
+    assert not tuple(PermSpace(3)[3:3])
+
+
+def test_get_many():
+    perm_space = PermSpace(4)
+    assert perm_space.get_many((0, 23, 7, -1)) == (
+        (0, 1, 2, 3), (3, 2, 1, 0), (1, 0, 3, 2), (3, 2, 1, 0)
+    )
+    assert perm_space.get_many(()) == ()
+    assert perm_space.get_many(slice(5, 8)) == \
+                                      tuple(map(tuple, perm_space[5:8]))
+    with cute_testing.RaiseAssertor(IndexError):
+        perm_space.get_many((0, 24))
+
+    perm_spaces = (
+        PermSpace(6, n_elements=3),
+        PermSpace('abcdef', domain='qwerty'),
+        PermSpace(6, fixed_map={0: 1, 4: 3,}),
+        PermSpace('abracab', n_elements=4),
+        PermSpace(5, degrees=(1, 3)),
+        CombSpace(8, 3),
+        CombSpace('abracab', 3),
+    )
+    for perm_space in perm_spaces:
+        for sliced_perm_space in (perm_space, perm_space[3:-5]):
+            indices = list(range(sliced_perm_space.length))[::-3]
+            assert sliced_perm_space.get_many(indices) == tuple(
+                tuple(sliced_perm_space[i]) for i in indices
+            )
+
+
+def test_perm_pickling():
+    perms = (
+        PermSpace(5)[7], PermSpace('abc')[2], CombSpace(5, 2)[3],
+        PermSpace(4, domain='abcd')[3], PermSpace('aab').unrecurrented[1],
+        PermSpace(300)[10 ** 100],
+    )
+    for perm in perms:
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            unpickled_perm = pickle.loads(pickle.dumps(perm, protocol))
+            assert unpickled_perm == perm
+            assert type(unpickled_perm) is type(perm)
+            assert type(unpickled_perm._perm_sequence) is \
+                                                   type(perm._perm_sequence)
+
+
+def test_perm_memory():
+    perm_space = PermSpace(7)
+    perm = perm_space[100]
+    assert isinstance(perm._perm_sequence, bytes)
+    assert perm.is_pure and not perm.is_rapplied
+    assert perm[1:3] == tuple(perm)[1:3]
+    assert 'a' not in perm and 300 not in perm
+    with cute_testing.RaiseAssertor(ValueError):
+        perm.index('a')
+    assert pickle.loads(pickle.dumps(perm)) == perm
+    assert not isinstance(PermSpace('abc')[0]._perm_sequence, bytes)
+
+    # Measuring perms of a fresh `Perm` subclass, because on some Python
+    # versions the memory that an instance gets for its attributes depends on
+    # how many instances of its class were created before, e.g. in other tests.
+    class FreshPerm(Perm):
+        __slots__ = ()
+    perm_space = PermSpace(7, perm_type=FreshPerm)
+    perm_space[0] # Warming up caches.
+    tracemalloc.start()
+    try:
+        perms = list(perm_space)
+        memory_per_perm = tracemalloc.get_traced_memory()[0] / len(perms)
+    finally:
+        tracemalloc.stop()
+    # Perms used to take about 280 bytes each when they had a `__dict__` full
+    # of flags and a tuple of items.
+    assert memory_per_perm < 200
+
+
+def test_recurrent_indexing():
+    recurrent_perm_spaces = (
+        PermSpace('abracab', n_elements=4),
+        PermSpace('abracab', fixed_map={0: 'b', 3: 'c',}),
+        PermSpace('aabbcc', fixed_map={5: 'a',}),
+        CombSpace('abracab', 3),
+        CombSpace('ab' * 10 + 'c', 2),
+    )
+    for recurrent_perm_space in recurrent_perm_spaces:
+        perm_sequences = [tuple(perm) for perm in recurrent_perm_space]
+        assert len(set(perm_sequences)) == len(perm_sequences) == \
+                                                   recurrent_perm_space.length
+        for i, perm_sequence in enumerate(perm_sequences):
+            assert tuple(recurrent_perm_space[i]) == perm_sequence
+            assert recurrent_perm_space.index(perm_sequence) == i
+
+    recurrent_comb_space = CombSpace('abracab', 2)
+    assert ('a', 'b') in recurrent_comb_space
+    assert ('b', 'a') not in recurrent_comb_space
+
+    big_recurrent_perm_space = PermSpace('aabbccddeeffgghhiijjkkllmmnnoo')
+    for i in range(0, big_recurrent_perm_space.length,
+                   big_recurrent_perm_space.length // 10):
+        assert big_recurrent_perm_space.index(big_recurrent_perm_space[i]) == i
+
+
+def test_ranking():
+    '''Test `PermSpace.index` on various spaces, including long perms.'''
+    perm_spaces = (
+        PermSpace(5), PermSpace(6, n_elements=3), PermSpace('dcba'),
+        PermSpace('aabbc'), PermSpace('cabbac'), PermSpace(5)[10:50],
+        PermSpace(5, fixed_map={1: 3}), PermSpace('aabbcc')[7:70],
+    )
+    for perm_space in perm_spaces:
+        for i, perm in enumerate(perm_space):
+            assert perm_space.index(perm) == i
+            assert perm_space.index(tuple(perm)) == i
+
+    with cute_testing.RaiseAssertor(ValueError):
+        PermSpace('aabbc').index('aabbb')
+
+    n = 2000
+    perm_sequence = tuple(range(0, n, 2)) + tuple(range(n - 1, 0, -2))
+    big_perm_space = PermSpace(n)
+    assert tuple(big_perm_space[big_perm_space.index(perm_sequence)]) == \
+                                                              perm_sequence
+    big_partial_perm_space = PermSpace(n, n_elements=n // 2)
+    assert tuple(big_partial_perm_space[
+        big_partial_perm_space.index(perm_sequence[:n // 2])
+    ]) == perm_sequence[:n // 2]
+
+
+def test_sampling():
+    '''Test `PermSpace.take_random` and `PermSpace.sample`.'''
+    perm_spaces = (
+        PermSpace(4), PermSpace(5, n_elements=2), PermSpace('dcba'),
+        PermSpace('aabc'), PermSpace(4, domain='abcd'), CombSpace(5, 3),
+        PermSpace(4, fixed_map={1: 3}), PermSpace(5, degrees=(1, 3)),
+        PermSpace('dcba', degrees=2), PermSpace(4, fixed_map={0: 1},
+                                               degrees=2),
+        PermSpace('aabc', n_elements=2), PermSpace(4)[3:9],
+    )
+    for perm_space in perm_spaces:
+        random_generator = random.Random(0)
+        perm_sequences = perm_space.sample(40 * perm_space.length,
+                                           random_generator)
+        assert len(perm_sequences) == 40 * perm_space.length
+        counter = collections.Counter(perm_sequences)
+        assert set(counter) == {tuple(perm) for perm in perm_space}
+        # Each perm should appear about 40 times:
+        assert all(10 <= count <= 80 for count in counter.values())
+        assert perm_space.take_random(random_generator) in perm_space
+        assert perm_space.sample(0) == ()
+
+    assert PermSpace(4).sample(5, random.Random(1)) == \
+                                      PermSpace(4).sample(5, random.Random(1))
+
+    big_perm_space = PermSpace(150, degrees=100)
+    (perm_sequence,) = big_perm_space.sample(1)
+    assert big_perm_space.perm_type(perm_sequence, big_perm_space) in \
+                                                                big_perm_space
+
+
+def test_perm_algebra():
+    perm = PermSpace(5)[10]
+    assert tuple(perm) == (0, 2, 4, 1, 3)
+    assert perm.cycle_type == (4, 1)
+    assert perm.n_cycles == 2
+    assert perm.order == 4
+    assert perm.parity == 1
+    assert perm ** 4 == perm ** 0 == PermSpace(5)[0]
+    assert perm ** 3 == perm * perm * perm == perm ** -1 == ~perm
+    assert PermSpace('dcba')[10].cycle_type == PermSpace(4)[10].cycle_type
+    assert PermSpace(4, domain='abcd')[10].order == PermSpace(4)[10].order
+
+    for n in (7, 300):
+        perm_space = PermSpace(n)
+        identity = perm_space[0]
+        for perm in perm_space.sample(20, random.Random(n)):
+            perm = Perm(perm, perm_space)
+            assert perm * ~perm == ~perm * perm == identity
+            assert perm ** perm.order == identity
+            assert perm ** 5 == perm * perm * perm * perm * perm
+            assert perm ** -2 == ~perm * ~perm
+            assert perm ** (10 ** 20 + 3) == \
+                                    perm ** ((10 ** 20 + 3) % perm.order)
+            assert sum(perm.cycle_type) == n
+            assert perm.degree == n - len(perm.cycle_type)
+            assert perm.parity == perm.degree % 2
+
+
 def test_unrecurrented():
     recurrent_perm_space = combi.PermSpace('abcabc')
     unrecurrented_perm_space = recurrent_perm_space.unrecurrented
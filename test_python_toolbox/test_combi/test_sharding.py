@@ -0,0 +1,89 @@
+# Copyright 2009-2017 Ram Rachum.
+# This program is distributed under the MIT license.
+
+import sys
+import time
+import concurrent.futures
+
+from python_toolbox import cute_testing
+from python_toolbox import future_tools
+from python_toolbox.combi import *
+
+
+def _sum_of_first_two(perm):
+    return perm[0] + perm[1]
+
+
+def _sleep(item):
+    time.sleep(1)
+    return item
+
+
+def test_iterate_shard():
+    spaces = (
+        PermSpace(5),
+        PermSpace(6, n_elements=3),
+        PermSpace('abcab', fixed_map={1: 'b'}),
+        PermSpace(6, degrees=(1, 3))[3:50],
+        CombSpace('abcdef', 3),
+        ProductSpace((range(3), 'ab', (True, False, None))),
+        ChainSpace(('abc', range(4), PermSpace(3), 'de')),
+        MapSpace(str, range(10)),
+    )
+    for space in spaces:
+        items = tuple(map(space.__getitem__, range(len(space))))
+        for n_shards in (1, 2, 3, 7, 100):
+            shard_ranges = get_shard_ranges(space, n_shards)
+            assert len(shard_ranges) == n_shards
+            assert tuple(
+                item for shard_range in shard_ranges for item in
+                iterate_shard(space, shard_range.start, shard_range.stop)
+            ) == items
+
+
+def test_huge_space():
+    perm_space = PermSpace(30)
+    assert perm_space.length > sys.maxsize
+    shard_ranges = get_shard_ranges(perm_space, 7)
+    assert shard_ranges[0].start == 0
+    assert shard_ranges[-1].stop == perm_space.length
+    for shard_range, next_shard_range in zip(shard_ranges, shard_ranges[1:]):
+        assert shard_range.stop == next_shard_range.start
+    assert {shard_range.stop - shard_range.start for shard_range in
+                    shard_ranges} <= {perm_space.length // 7,
+                                      perm_space.length // 7 + 1}
+    shard_range = shard_ranges[3]
+    assert tuple(iterate_shard(perm_space, shard_range.start,
+                               shard_range.start + 3)) == \
+                    tuple(perm_space[shard_range.start:shard_range.start + 3])
+
+
+def test_map_sharded():
+    perm_space = PermSpace(6, n_elements=4)
+    expected_results = tuple(map(_sum_of_first_two, perm_space))
+
+    assert tuple(map_sharded(_sum_of_first_two, perm_space, 5)) == \
+                                                               expected_results
+
+    with future_tools.CuteProcessPoolExecutor(2) as executor:
+        assert tuple(map_sharded(_sum_of_first_two, perm_space,
+                                 executor=executor)) == expected_results
+        assert sorted(map_sharded(_sum_of_first_two, perm_space, 3,
+                                  executor=executor, as_completed=True)) == \
+                                                      sorted(expected_results)
+        assert tuple(map_sharded(
+            str, ChainSpace(('ab', range(3))), 2, executor=executor
+        )) == ('a', 'b', '0', '1', '2')
+        assert tuple(map_sharded(sum, ProductSpace((range(3), range(4))),
+                                 executor=executor)) == \
+                              tuple(i + j for i in range(3) for j in range(4))
+
+
+def test_map_sharded_timeout():
+    with future_tools.CuteThreadPoolExecutor(2) as executor:
+        for as_completed in (False, True):
+            results = map_sharded(_sleep, range(4), 2, executor=executor,
+                                  as_completed=as_completed, timeout=0.1)
+            with cute_testing.RaiseAssertor(
+                                       concurrent.futures.TimeoutError):
+                tuple(results)
@@ -6,6 +6,7 @@
 import weakref
 
 from python_toolbox import gc_tools
+from python_toolbox import cute_testing
 
 from python_toolbox.sleek_reffing import (SleekCallArgs,
                                           SleekRef,
@@ -62,3 +63,80 @@ def test_unhashable():
     gc_tools.collect()
     # Not GCed because all objects in `kwargs` are not weakreffable:
     assert len(sca_dict) == 1
+
+
+def test_call_args_binder():
+    '''Test `CallArgsBinder` binds calls just like `inspect.getcallargs`.'''
+    import inspect
+    from python_toolbox.sleek_reffing import CallArgsBinder
+
+    def g(a, b=2, c=3): pass
+    def h(a, *args, z=7, **kwargs): pass
+    def i(): pass
+    def j(*args): pass
+    class B:
+        def method(self, x, y=1): pass
+
+    calls = (
+        (g, (1,), {}), (g, (1, 2), {}), (g, (1, 2, 3), {}),
+        (g, (), {'a': 1}), (g, (1,), {'c': 4}),
+        (h, (1,), {}), (h, (1, 2, 3), {}), (h, (1,), {'z': 2, 'w': 3}),
+        (i, (), {}), (j, (), {}), (j, (1, 2), {}),
+        (B().method, (1,), {}), (B().method, (1, 2), {}),
+    )
+    for function, args, kwargs in calls:
+        call_args_binder = CallArgsBinder(function)
+        call_args, star_args, star_kwargs = \
+                                        call_args_binder(*args, **kwargs)
+        expected_call_args = inspect.getcallargs(function, *args, **kwargs)
+        args_spec = inspect.getfullargspec(function)
+        expected_star_args = expected_call_args.pop(args_spec.varargs) if \
+                                                      args_spec.varargs else ()
+        expected_star_kwargs = expected_call_args.pop(args_spec.varkw) if \
+                                                        args_spec.varkw else {}
+        assert call_args == expected_call_args
+        assert tuple(star_args) == tuple(expected_star_args)
+        assert star_kwargs == expected_star_kwargs
+        assert SleekCallArgs({}, call_args_binder, *args, **kwargs) == \
+                                  SleekCallArgs({}, function, *args, **kwargs)
+
+    assert CallArgsBinder(i).is_argumentless
+    assert not CallArgsBinder(j).is_argumentless
+
+    for function, args in ((g, ()), (g, (1, 2, 3, 4)), (i, (1,))):
+        with cute_testing.RaiseAssertor(TypeError):
+            CallArgsBinder(function)(*args)
+
+
+def test_values():
+    '''Test `SleekCallArgs` whose arguments are all values.'''
+    sca_dict = {}
+
+    def g(a, b=2, *args, **kwargs): pass
+
+    sca1 = SleekCallArgs(sca_dict, g, 1, 'meow', (3, 4.5), c=(None, b'x'))
+    sca2 = SleekCallArgs(sca_dict, g, c=(None, b'x'), b='meow', a=1.0)
+    assert sca1._values is not None
+    assert sca1 != sca2
+    sca2 = SleekCallArgs(sca_dict, g, 1.0, 'meow', (3, 4.5), c=(None, b'x'))
+    assert sca1 == sca2 and hash(sca1) == hash(sca2)
+    assert sca1.args == {'a': 1, 'b': 'meow'}
+    assert sca1.star_args == ((3, 4.5),)
+    assert sca1.star_kwargs == {'c': (None, b'x')}
+
+    # Equal to call args that are sleekreffed, and with the same hash:
+    class Number(int):
+        pass
+    number = Number(1)
+    sca3 = SleekCallArgs(sca_dict, g, number, 'meow', (3, 4.5),
+                         c=(None, b'x'))
+    assert sca3._values is None
+    assert sca1 == sca3 and hash(sca1) == hash(sca3)
+
+    # Frozensets and tuples holding weakreffable objects aren't values:
+    a = A()
+    sca4 = SleekCallArgs(sca_dict, g, (1, a))
+    assert sca4._values is None
+    my_frozenset = frozenset((1, 2))
+    sca5 = SleekCallArgs(sca_dict, g, my_frozenset)
+    assert sca5._values is None